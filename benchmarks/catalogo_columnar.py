@@ -0,0 +1,94 @@
+"""
+Benchmark de reportes del panel: recorrido de objetos vs catálogo columnar.
+
+Publica N productos en un InMemoryProductoRepository, conecta un
+CatalogoColumnar y compara tres reportes (precio promedio por categoría, stock
+total por categoría y publicaciones por vendedor) calculados recorriendo
+`list_all()` contra los mismos reportes vectorizados. Requiere numpy.
+
+Uso:
+    PYTHONPATH=. python benchmarks/catalogo_columnar.py [N]
+"""
+
+import sys
+import time
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from marketplace.domain.categoria import Categoria
+from marketplace.domain.producto import Producto
+from marketplace.domain.usuario import Usuario
+from marketplace.infrastructure.catalogo_columnar import CatalogoColumnar
+from marketplace.infrastructure.repositories import InMemoryProductoRepository
+
+
+def poblar(repo: InMemoryProductoRepository, n: int) -> None:
+    vendedores = [Usuario(id=f"u{i}", nombre=f"Vecino {i}", email=f"v{i}@mail.com") for i in range(1000)]
+    categorias = [Categoria(id=f"c{i}", nombre=f"Categoría {i}") for i in range(20)]
+    repo.add_many(
+        Producto(
+            id=f"p{i}",
+            nombre=f"Producto {i:07d}",
+            precio=Decimal(1000 + (i * 7919) % 2_000_000),
+            vendedor=vendedores[i % 1000],
+            categoria=categorias[i % 20],
+            stock=i % 5,
+        )
+        for i in range(n)
+    )
+
+
+def reportes_objetos(repo: InMemoryProductoRepository):
+    sumas, conteos, stock, por_vendedor = defaultdict(int), Counter(), Counter(), Counter()
+    for producto in repo.list_all():
+        categoria = producto.categoria.id if producto.categoria else None
+        sumas[categoria] += int(producto.precio)
+        conteos[categoria] += 1
+        stock[categoria] += producto.stock
+        por_vendedor[producto.vendedor.id] += 1
+    promedios = {c: sumas[c] / conteos[c] for c in conteos}
+    return promedios, dict(stock), dict(por_vendedor)
+
+
+def reportes_columnar(catalogo: CatalogoColumnar):
+    return (
+        catalogo.precio_promedio_por_categoria(),
+        catalogo.stock_por_categoria(),
+        catalogo.publicaciones_por_vendedor(),
+    )
+
+
+def cronometrar(funcion, *args, repeticiones: int = 5):
+    mejor, resultado = float("inf"), None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repo = InMemoryProductoRepository()
+    poblar(repo, n)
+
+    inicio = time.perf_counter()
+    catalogo = CatalogoColumnar.desde_repositorio(repo)
+    carga = time.perf_counter() - inicio
+
+    t_objetos, esperado = cronometrar(reportes_objetos, repo, repeticiones=2)
+    t_columnar, obtenido = cronometrar(reportes_columnar, catalogo)
+    assert esperado[1:] == obtenido[1:]
+    assert all(abs(esperado[0][c] - obtenido[0][c]) < 1e-6 for c in esperado[0])
+
+    mascara = catalogo.filtrar(precio_max=200_000, solo_disponibles=True)
+    t_filtro, _ = cronometrar(catalogo.agrupar, "categoria", "precio", "conteo", mascara)
+
+    print(f"{n:,} productos (carga del catálogo: {carga:.2f} s)")
+    print(f"  reportes recorriendo objetos: {t_objetos * 1000:9.1f} ms")
+    print(f"  reportes columnares:          {t_columnar * 1000:9.1f} ms")
+    print(f"  conteo por categoría filtrado: {t_filtro * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
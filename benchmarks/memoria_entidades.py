@@ -0,0 +1,101 @@
+"""
+Benchmark de memoria de las entidades del dominio.
+
+Construye N productos y N consultas con las entidades actuales (slots, imágenes
+en tupla, usuarios y categorías compartidos) y los compara con la
+representación anterior: objetos con `__dict__`, lista de imágenes por producto
+y una copia del vendedor y la categoría por cada item.
+
+Uso:
+    PYTHONPATH=. python benchmarks/memoria_entidades.py [N]
+"""
+
+import sys
+import tracemalloc
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+from marketplace.domain.categoria import Categoria
+from marketplace.domain.consulta import Consulta
+from marketplace.domain.producto import Producto
+from marketplace.domain.usuario import Usuario
+
+IMAGENES = ["https://cdn.ejemplo.com/img/1.jpg", "https://cdn.ejemplo.com/img/2.jpg"]
+
+
+def _vendedores(cantidad: int):
+    return [
+        Usuario(id=f"u{i}", nombre=f"Vecino {i}", email=f"vecino{i}@mail.com", telefono="3001234567")
+        for i in range(cantidad)
+    ]
+
+
+def construir_actual(n: int):
+    """Entidades actuales: un Usuario/Categoria por id, compartidos por referencia."""
+    vendedores = _vendedores(100)
+    categorias = [Categoria(id=f"c{i}", nombre=f"Categoría {i}") for i in range(10)]
+    productos = [
+        Producto(
+            id=str(uuid.uuid4()),
+            nombre=f"Producto número {i}",
+            precio=Decimal(1000 + i),
+            vendedor=vendedores[i % 100],
+            categoria=categorias[i % 10],
+            imagenes=IMAGENES,
+        )
+        for i in range(n)
+    ]
+    consultas = [
+        Consulta(id=str(uuid.uuid4())[:8], comprador=vendedores[i % 100], item=productos[i])
+        for i in range(n)
+    ]
+    return productos, consultas
+
+
+def construir_anterior(n: int):
+    """Modelo de la representación anterior: `__dict__`, listas y copias por fila."""
+    productos = []
+    for i in range(n):
+        vendedor = SimpleNamespace(
+            id=f"u{i % 100}", nombre=f"Vecino {i % 100}", email=f"vecino{i % 100}@mail.com",
+            apartamento=None, telefono="3001234567",
+        )
+        categoria = SimpleNamespace(id=f"c{i % 10}", nombre=f"Categoría {i % 10}", descripcion=None)
+        productos.append(SimpleNamespace(
+            id=str(uuid.uuid4()), nombre=f"Producto número {i}", precio=Decimal(1000 + i),
+            vendedor=vendedor, descripcion=None, stock=1, categoria=categoria,
+            imagenes=list(IMAGENES), terminos=("producto", "numero", str(i)),
+        ))
+    consultas = [
+        SimpleNamespace(
+            id=str(uuid.uuid4())[:8], comprador=productos[i].vendedor, item=productos[i],
+            mensaje=None, fecha=None, estado=None,
+        )
+        for i in range(n)
+    ]
+    return productos, consultas
+
+
+def medir(construir, n: int) -> int:
+    """Bytes asignados (y aún vivos) al construir n productos y n consultas."""
+    tracemalloc.start()
+    datos = construir(n)
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del datos
+    return actual
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    anterior = medir(construir_anterior, n)
+    actual = medir(construir_actual, n)
+    print(f"{n:,} productos + {n:,} consultas")
+    print(f"  anterior: {anterior / 2**20:8.1f} MiB ({anterior / n:6.0f} B por par)")
+    print(f"  actual:   {actual / 2**20:8.1f} MiB ({actual / n:6.0f} B por par)")
+    print(f"  ahorro:   {100 * (1 - actual / anterior):7.1f} %")
+
+
+if __name__ == "__main__":
+    main()
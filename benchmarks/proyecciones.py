@@ -0,0 +1,106 @@
+"""
+Benchmark de la salida de listados: serializers DRF vs. proyecciones compiladas.
+
+Para productos, servicios y consultas compara
+- DRF: `Serializer(many=True).data` + `JSONRenderer`;
+- proyección: `proyeccion(Serializer).muchos()` + `RenderizadorJSONRapido`;
+y verifica antes que ambos caminos producen exactamente los mismos bytes
+(la mitad de las filas sin categoría, para cubrir los `None` intermedios).
+
+Uso:
+    PYTHONPATH=. python benchmarks/proyecciones.py [N]
+"""
+
+import gc
+import sys
+import time
+from datetime import datetime
+
+import django
+from django.conf import settings
+
+settings.configure(USE_TZ=False)
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from marketplace.domain.categoria import Categoria  # noqa: E402
+from marketplace.domain.consulta import Consulta  # noqa: E402
+from marketplace.domain.dinero import Dinero  # noqa: E402
+from marketplace.domain.producto import Producto  # noqa: E402
+from marketplace.domain.servicio import Servicio  # noqa: E402
+from marketplace.domain.usuario import Usuario  # noqa: E402
+from marketplace.interface.proyecciones import RenderizadorJSONRapido, orjson, proyeccion  # noqa: E402
+from marketplace.interface.serializers import (  # noqa: E402
+    ConsultaSerializer,
+    ProductoSerializer,
+    ServicioSerializer,
+)
+
+
+def _entidades(n: int):
+    vecinos = [
+        Usuario(id=f"u{i}", nombre=f"Vecino {i}", email=f"vecino{i}@mail.com") for i in range(100)
+    ]
+    categorias = [Categoria(id=f"c{i}", nombre=f"Categoría {i}") for i in range(10)] + [None] * 10
+    fecha = datetime(2026, 3, 1, 10, 30)
+    productos = [
+        Producto(id=f"p{i}", nombre=f"Producto número {i}", descripcion="Descripción de prueba",
+                 precio=Dinero(1000 + i), stock=i % 4, vendedor=vecinos[i % 100],
+                 categoria=categorias[i % 20], fecha_publicacion=fecha)
+        for i in range(n)
+    ]
+    servicios = [
+        Servicio(id=f"s{i}", nombre=f"Servicio número {i}", precio=Dinero(5000 + i),
+                 proveedor=vecinos[i % 100], descripcion="Clases a domicilio",
+                 disponible=bool(i % 2), categoria=categorias[i % 20])
+        for i in range(n)
+    ]
+    consultas = [
+        Consulta(id=f"k{i}", comprador=vecinos[(i + 1) % 100], item=productos[i],
+                 mensaje="¿Sigue disponible?", fecha=fecha)
+        for i in range(n)
+    ]
+    return (
+        ("productos", ProductoSerializer, productos),
+        ("servicios", ServicioSerializer, servicios),
+        ("consultas", ConsultaSerializer, consultas),
+    )
+
+
+def _drf(serializer_class, entidades) -> bytes:
+    return JSONRenderer().render({"resultados": serializer_class(entidades, many=True).data})
+
+
+def _proyeccion(serializer_class, entidades) -> bytes:
+    return RenderizadorJSONRapido().render({"resultados": proyeccion(serializer_class).muchos(entidades)})
+
+
+def medir(salida, serializer_class, entidades, repeticiones: int = 5) -> float:
+    """Mejor tiempo de varias corridas, sin el recolector de ciclos de por medio."""
+    tiempos = []
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            salida(serializer_class, entidades)
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        gc.enable()
+    return min(tiempos)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    print(f"{n:,} filas por respuesta (orjson: {'sí' if orjson else 'no'})")
+    for nombre, serializer_class, entidades in _entidades(n):
+        if _drf(serializer_class, entidades) != _proyeccion(serializer_class, entidades):
+            raise SystemExit(f"{nombre}: la proyección no produce los mismos bytes que DRF")
+        drf = medir(_drf, serializer_class, entidades)
+        rapido = medir(_proyeccion, serializer_class, entidades)
+        print(f"  {nombre + ':':11} DRF {drf * 1000:7.1f} ms  proyección {rapido * 1000:6.1f} ms"
+              f"  ({drf / rapido:.1f}x, mismos bytes)")
+
+
+if __name__ == "__main__":
+    main()
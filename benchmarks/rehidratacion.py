@@ -0,0 +1,90 @@
+"""
+Benchmark de rehidratación de productos.
+
+Compara tres formas de construir N productos desde filas ya validadas:
+- anterior: constructor con todas las validaciones y los términos de búsqueda
+  analizados en el acto (como antes de que `terminos` fuera perezoso);
+- constructor: validaciones de `__post_init__`, términos perezosos;
+- `construir_confiable`: el camino que usan los repositorios SQLite y el builder.
+
+Uso:
+    PYTHONPATH=. python benchmarks/rehidratacion.py [N]
+"""
+
+import gc
+import sys
+import time
+from datetime import datetime
+from marketplace.domain.dinero import Dinero
+
+from marketplace.domain.categoria import Categoria
+from marketplace.domain.producto import Producto
+from marketplace.domain.usuario import Usuario
+from marketplace.domain.validadores import construir_confiable
+
+
+def _filas(n: int):
+    vendedores = [
+        Usuario(id=f"u{i}", nombre=f"Vecino {i}", email=f"vecino{i}@mail.com") for i in range(100)
+    ]
+    categorias = [Categoria(id=f"c{i}", nombre=f"Categoría {i}") for i in range(10)]
+    fecha = datetime.now()
+    return [
+        (f"p{i}", f"Producto número {i}", "Descripción de prueba del producto", 1000 + i, 3,
+         ("https://cdn.ejemplo.com/img/1.jpg",), vendedores[i % 100], categorias[i % 10], fecha)
+        for i in range(n)
+    ]
+
+
+def _validando(filas):
+    return [
+        Producto(id=f[0], nombre=f[1], descripcion=f[2], precio=Dinero(f[3]), stock=f[4],
+                 imagenes=f[5], vendedor=f[6], categoria=f[7], fecha_publicacion=f[8])
+        for f in filas
+    ]
+
+
+def _anterior(filas):
+    productos = _validando(filas)
+    for producto in productos:
+        producto.terminos
+    return productos
+
+
+def _confiable(filas):
+    return [
+        construir_confiable(
+            Producto, id=f[0], nombre=f[1], descripcion=f[2], precio=Dinero(f[3]), stock=f[4],
+            imagenes=f[5], vendedor=f[6], categoria=f[7], fecha_publicacion=f[8],
+        )
+        for f in filas
+    ]
+
+
+def medir(construir, filas, repeticiones: int = 3) -> float:
+    """Mejor tiempo de varias corridas, sin el recolector de ciclos de por medio."""
+    tiempos = []
+    gc.disable()
+    try:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            construir(filas)
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        gc.enable()
+    return min(tiempos)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    filas = _filas(n)
+    anterior = medir(_anterior, filas)
+    print(f"{n:,} productos")
+    print(f"  anterior:            {anterior:6.2f} s")
+    for nombre, construir in (("constructor", _validando), ("construir_confiable", _confiable)):
+        tiempo = medir(construir, filas)
+        print(f"  {nombre + ':':20} {tiempo:6.2f} s ({anterior / tiempo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
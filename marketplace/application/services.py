@@ -1,401 +1,1293 @@
-"""Service Layer - Orquestación de lógica de negocio siguiendo SOLID."""
-
-from dataclasses import dataclass
-from typing import List, Optional
-
-from ..domain.exceptions import DomainError, PermissionError, ValidationError
-from ..domain.usuario import Usuario
-from ..domain.unidad_residencial import UnidadResidencial
-from ..domain.categoria import Categoria
-from ..domain.producto import Producto
-from ..domain.servicio import Servicio
-from ..domain.consulta import Consulta
-from ..domain.builders import ProductoBuilder
-from ..infrastructure.factories import NotifierFactory
-from ..infrastructure.repositories import (
-    InMemoryUsuarioRepository,
-    InMemoryUnidadResidencialRepository,
-    InMemoryCategoriaRepository,
-    InMemoryProductoRepository,
-    InMemoryServicioRepository,
-    InMemoryConsultaRepository,
-)
-
-
-# ============================================================================
-# Commands (DTOs para entrada de servicios)
-# ============================================================================
-
-@dataclass(frozen=True)
-class CrearUsuarioCommand:
-    """Comando para crear un usuario."""
-    id: str
-    nombre: str
-    email: str
-    apartamento: Optional[str] = None
-    telefono: Optional[str] = None
-
-
-@dataclass(frozen=True)
-class CrearUnidadResidencialCommand:
-    """Comando para crear una unidad residencial."""
-    id: str
-    nombre: str
-    direccion: str
-
-
-@dataclass(frozen=True)
-class CrearCategoriaCommand:
-    """Comando para crear una categoría."""
-    id: str
-    nombre: str
-    descripcion: str
-
-
-@dataclass(frozen=True)
-class PublicarProductoCommand:
-    """Comando para publicar un producto."""
-    vendedor_id: str
-    vendedor_status: str
-    nombre: str
-    descripcion: str
-    precio_cop: int
-    categoria_id: str
-    imagenes: List[str]
-
-
-@dataclass(frozen=True)
-class PublicarServicioCommand:
-    """Comando para publicar un servicio."""
-    proveedor_id: str
-    proveedor_status: str
-    nombre: str
-    descripcion: str
-    precio_cop: int
-    categoria_id: str
-
-
-@dataclass(frozen=True)
-class RegistrarConsultaCommand:
-    """Comando para registrar interés en un producto o servicio."""
-    comprador_id: str
-    item_id: str
-    item_type: str  # 'producto' o 'servicio'
-    mensaje: Optional[str] = None
-
-
-# ============================================================================
-# Excepciones de Aplicación
-# ============================================================================
-
-class ResourceAlreadyExistsError(DomainError):
-    """Excepción cuando se intenta crear un recurso que ya existe."""
-    pass
-
-
-class ResourceNotFoundError(DomainError):
-    """Excepción cuando no se encuentra un recurso."""
-    pass
-
-
-# ============================================================================
-# Services (SRP: Cada servicio tiene una única responsabilidad)
-# ============================================================================
-
-class UsuarioService:
-    """
-    Servicio para gestión de usuarios.
-    Responsabilidad: Orquestar operaciones del ciclo de vida de usuarios.
-    """
-
-    def __init__(self, usuario_repo: InMemoryUsuarioRepository):
-        self.usuario_repo = usuario_repo
-
-    def crear_usuario(self, cmd: CrearUsuarioCommand) -> Usuario:
-        """
-        Crea un nuevo usuario.
-        
-        Raises:
-            ResourceAlreadyExistsError: Si el usuario ya existe.
-        """
-        # Verificar duplicados
-        if self.usuario_repo.get(cmd.id):
-            raise ResourceAlreadyExistsError(f"Usuario con id {cmd.id} ya existe.")
-
-        # Crear entidad
-        usuario = Usuario(
-            id=cmd.id,
-            nombre=cmd.nombre,
-            email=cmd.email,
-            apartamento=cmd.apartamento,
-            telefono=cmd.telefono
-        )
-
-        # Persistir
-        self.usuario_repo.add(usuario)
-
-        return usuario
-
-    def listar_usuarios(self) -> List[Usuario]:
-        """Lista todos los usuarios."""
-        return self.usuario_repo.list_all()
-
-
-class UnidadResidencialService:
-    """
-    Servicio para gestión de unidades residenciales.
-    Responsabilidad: Orquestar operaciones del ciclo de vida de unidades.
-    """
-
-    def __init__(self, unidad_repo: InMemoryUnidadResidencialRepository):
-        self.unidad_repo = unidad_repo
-
-    def crear_unidad(self, cmd: CrearUnidadResidencialCommand) -> UnidadResidencial:
-        """
-        Crea una nueva unidad residencial.
-        
-        Raises:
-            ResourceAlreadyExistsError: Si la unidad ya existe.
-        """
-        if self.unidad_repo.get(cmd.id):
-            raise ResourceAlreadyExistsError(f"Unidad con id {cmd.id} ya existe.")
-
-        unidad = UnidadResidencial(
-            id=cmd.id,
-            nombre=cmd.nombre,
-            direccion=cmd.direccion
-        )
-
-        self.unidad_repo.add(unidad)
-
-        return unidad
-
-    def listar_unidades(self) -> List[UnidadResidencial]:
-        """Lista todas las unidades residenciales."""
-        return self.unidad_repo.list_all()
-
-
-class CategoriaService:
-    """
-    Servicio para gestión de categorías.
-    Responsabilidad: Orquestar operaciones del ciclo de vida de categorías.
-    """
-
-    def __init__(self, categoria_repo: InMemoryCategoriaRepository):
-        self.categoria_repo = categoria_repo
-
-    def crear_categoria(self, cmd: CrearCategoriaCommand) -> Categoria:
-        """
-        Crea una nueva categoría.
-        
-        Raises:
-            ResourceAlreadyExistsError: Si la categoría ya existe.
-        """
-        if self.categoria_repo.get(cmd.id):
-            raise ResourceAlreadyExistsError(f"Categoría con id {cmd.id} ya existe.")
-
-        categoria = Categoria(
-            id=cmd.id,
-            nombre=cmd.nombre,
-            descripcion=cmd.descripcion
-        )
-
-        self.categoria_repo.add(categoria)
-
-        return categoria
-
-    def listar_categorias(self) -> List[Categoria]:
-        """Lista todas las categorías."""
-        return self.categoria_repo.list_all()
-
-
-class PublicacionService:
-    """
-    Servicio para publicación de productos.
-    Responsabilidad: Orquestar el flujo de publicación de productos.
-    """
-
-    def __init__(
-        self,
-        producto_repo: InMemoryProductoRepository,
-        usuario_repo: InMemoryUsuarioRepository,
-        categoria_repo: InMemoryCategoriaRepository,
-        max_images: int = 4
-    ):
-        self.producto_repo = producto_repo
-        self.usuario_repo = usuario_repo
-        self.categoria_repo = categoria_repo
-        self.max_images = max_images
-
-    def publicar_producto(self, cmd: PublicarProductoCommand) -> Producto:
-        """
-        Publica un producto en el marketplace.
-        
-        Raises:
-            ResourceNotFoundError: Si el vendedor o categoría no existen.
-            PermissionError: Si el vendedor no tiene permisos.
-            ValidationError: Si los datos del producto son inválidos.
-        """
-        # Buscar vendedor
-        vendedor = self.usuario_repo.get(cmd.vendedor_id)
-        if not vendedor:
-            raise ResourceNotFoundError(f"Vendedor con id {cmd.vendedor_id} no encontrado.")
-
-        # Buscar categoría
-        categoria = self.categoria_repo.get(cmd.categoria_id)
-        if not categoria:
-            raise ResourceNotFoundError(f"Categoría con id {cmd.categoria_id} no encontrada.")
-
-        # Verificar permisos
-        if cmd.vendedor_status != "APPROVED":
-            raise PermissionError("Solo usuarios APPROVED pueden publicar.")
-
-        # Construir producto usando Builder (validaciones de dominio)
-        builder = (
-            ProductoBuilder(max_images=self.max_images)
-            .vendedor(vendedor)
-            .categoria(categoria)
-            .nombre(cmd.nombre)
-            .descripcion(cmd.descripcion)
-            .precio_cop(cmd.precio_cop)
-        )
-
-        for url in cmd.imagenes[:self.max_images]:
-            builder.add_imagen(url)
-
-        producto = builder.build()
-
-        # Persistir
-        self.producto_repo.add(producto)
-
-        # Notificar (side effect)
-        notifier = NotifierFactory.create()
-        notifier.notify_listing_created(vendedor.telefono, producto.nombre)
-
-        return producto
-    
-    def listar_productos(self) -> List[Producto]:
-        """Lista todos los productos."""
-        return self.producto_repo.list_all()
-
-
-class ServicioService:
-    """
-    Servicio para publicación de servicios.
-    Responsabilidad: Orquestar el flujo de publicación de servicios.
-    """
-
-    def __init__(
-        self,
-        servicio_repo: InMemoryServicioRepository,
-        usuario_repo: InMemoryUsuarioRepository,
-        categoria_repo: InMemoryCategoriaRepository
-    ):
-        self.servicio_repo = servicio_repo
-        self.usuario_repo = usuario_repo
-        self.categoria_repo = categoria_repo
-
-    def publicar_servicio(self, cmd: PublicarServicioCommand) -> Servicio:
-        """
-        Publica un servicio en el marketplace.
-        
-        Raises:
-            ResourceNotFoundError: Si el proveedor o categoría no existen.
-            PermissionError: Si el proveedor no tiene permisos.
-            ValidationError: Si los datos del servicio son inválidos.
-        """
-        # Buscar proveedor
-        proveedor = self.usuario_repo.get(cmd.proveedor_id)
-        if not proveedor:
-            raise ResourceNotFoundError(f"Proveedor con id {cmd.proveedor_id} no encontrado.")
-
-        # Buscar categoría
-        categoria = self.categoria_repo.get(cmd.categoria_id)
-        if not categoria:
-            raise ResourceNotFoundError(f"Categoría con id {cmd.categoria_id} no encontrada.")
-
-        # Verificar permisos
-        if cmd.proveedor_status != "APPROVED":
-            raise PermissionError("Solo usuarios APPROVED pueden publicar servicios.")
-
-        # Crear servicio (validaciones en __post_init__)
-        import uuid
-        servicio = Servicio(
-            id=str(uuid.uuid4()),
-            nombre=cmd.nombre,
-            descripcion=cmd.descripcion,
-            precio=cmd.precio_cop,
-            proveedor=proveedor,
-            categoria=categoria,
-            disponible=True
-        )
-
-        # Persistir
-        self.servicio_repo.add(servicio)
-
-        # Notificar (side effect)
-        notifier = NotifierFactory.create()
-        notifier.notify_listing_created(proveedor.telefono, servicio.nombre)
-
-        return servicio
-
-    def listar_servicios(self) -> List[Servicio]:
-        """Lista todos los servicios."""
-        return self.servicio_repo.list_all()
-
-
-class ConsultaService:
-    """
-    Servicio para gestión de consultas (interés de contacto).
-    Responsabilidad: Registrar la intención de contacto entre comprador y vendedor.
-    """
-
-    def __init__(
-        self,
-        consulta_repo: InMemoryConsultaRepository,
-        usuario_repo: InMemoryUsuarioRepository,
-        producto_repo: InMemoryProductoRepository,
-        servicio_repo: InMemoryServicioRepository
-    ):
-        self.consulta_repo = consulta_repo
-        self.usuario_repo = usuario_repo
-        self.producto_repo = producto_repo
-        self.servicio_repo = servicio_repo
-
-    def registrar_consulta(self, cmd: RegistrarConsultaCommand) -> Consulta:
-        """Registra una nueva consulta."""
-        comprador = self.usuario_repo.get(cmd.comprador_id)
-        if not comprador:
-            raise ResourceNotFoundError(f"Comprador no encontrado: {cmd.comprador_id}")
-
-        item = None
-        if cmd.item_type == 'producto':
-            item = self.producto_repo.get(cmd.item_id)
-        elif cmd.item_type == 'servicio':
-            item = self.servicio_repo.get(cmd.item_id)
-        
-        if not item:
-            raise ResourceNotFoundError(f"Item ({cmd.item_type}) no encontrado: {cmd.item_id}")
-
-        import uuid
-        consulta = Consulta(
-            id=str(uuid.uuid4())[:8],
-            comprador=comprador,
-            item=item,
-            mensaje=cmd.mensaje
-        )
-        
-        self.consulta_repo.add(consulta)
-        return consulta
-
-    def listar_consultas_vendedor(self, vendedor_id: str) -> List[Consulta]:
-        """Lista consultas recibidas por un vendedor/proveedor."""
-        todas = self.consulta_repo.list_all()
-        return [c for c in todas if c.item.vendedor.id == vendedor_id or 
-                (hasattr(c.item, 'proveedor') and c.item.proveedor.id == vendedor_id)]
-
-    def listar_consultas_comprador(self, comprador_id: str) -> List[Consulta]:
-        """Lista consultas realizadas por un comprador."""
-        todas = self.consulta_repo.list_all()
-        return [c for c in todas if c.comprador.id == comprador_id]
-
+"""Service Layer - Orquestación de lógica de negocio siguiendo SOLID."""
+
+import logging
+import threading
+import uuid
+from contextlib import nullcontext
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..domain.exceptions import (
+    DomainError,
+    PermissionError,
+    ResourceAlreadyExistsError,  # Re-exportada: las vistas la importan desde aquí
+    ValidationError,
+)
+from ..domain.usuario import Usuario
+from ..domain.unidad_residencial import UnidadResidencial
+from ..domain.categoria import Categoria
+from ..domain.producto import Producto, descontar_stock
+from ..domain.servicio import Servicio
+from ..domain.consulta import Consulta, EstadoConsulta
+from ..domain.reserva import ColaVencimientos, EstadoReserva, Reserva
+from ..domain.builders import ProductoBuilder
+from ..domain.facetas import Facetas
+from ..infrastructure.asincrono import en_hilo
+from ..infrastructure.avisos import AvisosAsincronos
+from ..infrastructure.concurrencia import LocksPorClave
+from ..infrastructure.factories import NotifierFactory
+from ..infrastructure.importadores import FilaImportacion, en_lotes
+from ..infrastructure.notifier import Notifier
+from ..infrastructure.outbox import EventoOutbox
+from ..infrastructure.paginacion import Pagina
+from ..infrastructure.versiones import VersionesColecciones
+from ..infrastructure.repositories import (
+    InMemoryUsuarioRepository,
+    InMemoryUnidadResidencialRepository,
+    InMemoryCategoriaRepository,
+    InMemoryProductoRepository,
+    InMemoryServicioRepository,
+    InMemoryConsultaRepository,
+    InMemoryReservaRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# Commands (DTOs para entrada de servicios)
+# ============================================================================
+
+@dataclass(frozen=True)
+class CrearUsuarioCommand:
+    """Comando para crear un usuario."""
+    id: str
+    nombre: str
+    email: str
+    apartamento: Optional[str] = None
+    telefono: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class CrearUnidadResidencialCommand:
+    """Comando para crear una unidad residencial."""
+    id: str
+    nombre: str
+    direccion: str
+
+
+@dataclass(frozen=True)
+class CrearCategoriaCommand:
+    """Comando para crear una categoría."""
+    id: str
+    nombre: str
+    descripcion: str
+
+
+@dataclass(frozen=True)
+class PublicarProductoCommand:
+    """Comando para publicar un producto."""
+    vendedor_id: str
+    vendedor_status: str
+    nombre: str
+    descripcion: str
+    precio_cop: int
+    categoria_id: str
+    imagenes: List[str]
+
+
+@dataclass(frozen=True)
+class PublicarServicioCommand:
+    """Comando para publicar un servicio."""
+    proveedor_id: str
+    proveedor_status: str
+    nombre: str
+    descripcion: str
+    precio_cop: int
+    categoria_id: str
+
+
+@dataclass(frozen=True)
+class RegistrarConsultaCommand:
+    """Comando para registrar interés en un producto o servicio."""
+    comprador_id: str
+    item_id: str
+    item_type: str  # 'producto' o 'servicio'
+    mensaje: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ExportarCommand:
+    """Comando con los filtros de una exportación (todos opcionales)."""
+    unidad_id: Optional[str] = None
+    categoria_id: Optional[str] = None
+    desde: Optional[datetime] = None  # Incluido
+    hasta: Optional[datetime] = None  # Excluido
+
+
+# ============================================================================
+# Resultados de operaciones por lotes
+# ============================================================================
+
+@dataclass(frozen=True)
+class ErrorLote:
+    """Error de un elemento de un lote, identificado por su posición."""
+    indice: int
+    error: str
+
+
+@dataclass
+class ResultadoLote:
+    """Elementos creados y errores por elemento de una operación por lotes."""
+    creados: List = field(default_factory=list)
+    errores: List[ErrorLote] = field(default_factory=list)
+
+
+@dataclass
+class ResultadoImportacion:
+    """
+    Resumen de una importación en streaming. Solo se conservan contadores y
+    hasta `max_rechazados` filas rechazadas (ErrorLote.indice = línea del archivo).
+    """
+    importados: int = 0
+    total_rechazados: int = 0
+    rechazados: List[ErrorLote] = field(default_factory=list)
+    max_rechazados: int = 1000
+
+    def rechazar(self, linea: int, error: str) -> None:
+        self.total_rechazados += 1
+        if len(self.rechazados) < self.max_rechazados:
+            self.rechazados.append(ErrorLote(linea, error))
+
+
+# ============================================================================
+# Excepciones de Aplicación
+# ============================================================================
+
+class ResourceNotFoundError(DomainError):
+    """Excepción cuando no se encuentra un recurso."""
+    pass
+
+
+# ============================================================================
+# Services (SRP: Cada servicio tiene una única responsabilidad)
+# ============================================================================
+
+_LOTE_LISTADO = 500
+
+
+def _listar(repo, cursor: Optional[str], limite: Optional[int], **filtros) -> Pagina:
+    """
+    Sin `limite` retorna toda la colección (filtrada) en una sola página; con
+    `limite` el repositorio entrega solo la página pedida.
+    Los filtros vacíos (None o False) no se envían al repositorio.
+    """
+    filtros = {k: v for k, v in filtros.items() if v is not None and v is not False}
+    if limite is not None:
+        return repo.list_page(cursor, limite, **filtros)
+    if not filtros:
+        return Pagina(repo.list_all())
+
+    items = []
+    while True:
+        pagina = repo.list_page(cursor, _LOTE_LISTADO, **filtros)
+        items.extend(pagina.items)
+        cursor = pagina.siguiente_cursor
+        if cursor is None:
+            return Pagina(items)
+
+
+def _ajustar_stock(producto_repo, producto_id: str, calcular: Callable[[int], int]) -> Producto:
+    """
+    Lee el stock, calcula el nuevo con `calcular` y lo fija con
+    compare-and-set; si otra escritura lo cambió entretanto, reintenta.
+
+    Raises:
+        ResourceNotFoundError: Si el producto no existe.
+        ValidationError: Si `calcular` rechaza el stock actual.
+    """
+    while True:
+        producto = producto_repo.get(producto_id)
+        if not producto:
+            raise ResourceNotFoundError(f"Producto no encontrado: {producto_id}")
+        esperado = producto.stock
+        if producto_repo.comparar_y_fijar_stock(producto_id, esperado, calcular(esperado)):
+            return producto_repo.get(producto_id)
+
+
+# Campos que una fila importada puede traer como número (NDJSON): se pasan a texto
+_CAMPOS_NUMERICOS_IMPORTACION = frozenset({"id", "telefono"})
+
+
+def _texto_importado(datos: dict, campo: str) -> Optional[str]:
+    """
+    Valor de `campo` como texto. Solo se aceptan textos, y enteros en id y
+    teléfono; un objeto, una lista o un booleano de NDJSON no se convierten.
+
+    Raises:
+        ValidationError: Si el valor tiene otro tipo.
+    """
+    valor = datos.get(campo)
+    if valor is None or isinstance(valor, str):
+        return valor
+    if (campo in _CAMPOS_NUMERICOS_IMPORTACION and isinstance(valor, int)
+            and not isinstance(valor, bool)):
+        return str(valor)
+    if campo in _CAMPOS_NUMERICOS_IMPORTACION:
+        raise ValidationError(f"El campo {campo} debe ser texto o un número entero.")
+    raise ValidationError(f"El campo {campo} debe ser texto.")
+
+
+class UsuarioService:
+    """
+    Servicio para gestión de usuarios.
+    Responsabilidad: Orquestar operaciones del ciclo de vida de usuarios.
+    """
+
+    def __init__(self, usuario_repo: InMemoryUsuarioRepository):
+        self.usuario_repo = usuario_repo
+
+    def crear_usuario(self, cmd: CrearUsuarioCommand) -> Usuario:
+        """
+        Crea un nuevo usuario.
+        
+        Raises:
+            ResourceAlreadyExistsError: Si el usuario ya existe o su email o
+                teléfono pertenecen a otro usuario (lo verifica el repositorio).
+        """
+        # Verificar duplicados
+        if self.usuario_repo.get(cmd.id):
+            raise ResourceAlreadyExistsError(f"Usuario con id {cmd.id} ya existe.")
+
+        # Crear entidad
+        usuario = Usuario(
+            id=cmd.id,
+            nombre=cmd.nombre,
+            email=cmd.email,
+            apartamento=cmd.apartamento,
+            telefono=cmd.telefono
+        )
+
+        # Persistir
+        self.usuario_repo.add(usuario)
+
+        return usuario
+
+    def importar_usuarios(
+        self, filas: Iterable[FilaImportacion], tamano_lote: int = 500
+    ) -> ResultadoImportacion:
+        """
+        Importa residentes desde un iterable de filas (ver infrastructure.importadores).
+
+        Las filas se consumen en lotes de `tamano_lote`: cada lote se valida,
+        se depura de ids, emails y teléfonos ya registrados con una búsqueda en
+        el repositorio por cada uno (no una por fila) y se escribe con un único
+        add_many. La memoria usada no depende del total de filas. Si otro
+        escritor gana un email o teléfono del lote entretanto, ese lote se
+        guarda fila por fila y solo las que chocan quedan rechazadas.
+        """
+        campos = [f.name for f in fields(CrearUsuarioCommand)]
+        resultado = ResultadoImportacion()
+
+        for lote in en_lotes(filas, tamano_lote):
+            candidatos = []
+            for fila in lote:
+                if fila.error:
+                    resultado.rechazar(fila.linea, fila.error)
+                    continue
+                try:
+                    datos = {c: _texto_importado(fila.datos, c) for c in campos}
+                    candidatos.append((fila.linea, Usuario(**datos)))
+                except DomainError as e:
+                    resultado.rechazar(fila.linea, str(e))
+
+            existentes = self.usuario_repo.get_many(u.id for _, u in candidatos)
+            por_email = self.usuario_repo.get_many_by_email(u.email for _, u in candidatos)
+            por_telefono = self.usuario_repo.get_many_by_telefono(
+                u.telefono for _, u in candidatos if u.telefono is not None
+            )
+            nuevos, contactos = {}, set()
+            for linea, usuario in candidatos:
+                if usuario.id in existentes or usuario.id in nuevos:
+                    resultado.rechazar(linea, f"Usuario con id {usuario.id} ya existe.")
+                elif usuario.email in contactos or usuario.email in por_email:
+                    resultado.rechazar(linea, f"Ya existe un usuario con el email {usuario.email}.")
+                elif usuario.telefono is not None and (
+                    usuario.telefono in contactos or usuario.telefono in por_telefono
+                ):
+                    resultado.rechazar(
+                        linea, f"Ya existe un usuario con el teléfono {usuario.telefono}."
+                    )
+                else:
+                    nuevos[usuario.id] = (linea, usuario)
+                    contactos.add(usuario.email)
+                    if usuario.telefono is not None:
+                        contactos.add(usuario.telefono)
+
+            if nuevos:
+                try:
+                    self.usuario_repo.add_many(u for _, u in nuevos.values())
+                    resultado.importados += len(nuevos)
+                except ResourceAlreadyExistsError:
+                    # Otro escritor registró un email o teléfono del lote entre la
+                    # búsqueda y la escritura; add_many no guardó nada. Se guarda
+                    # de a uno para rechazar solo las filas que chocan.
+                    for linea, usuario in nuevos.values():
+                        try:
+                            self.usuario_repo.add(usuario)
+                            resultado.importados += 1
+                        except ResourceAlreadyExistsError as e:
+                            resultado.rechazar(linea, str(e))
+
+        resultado.rechazados.sort(key=lambda r: r.indice)
+        return resultado
+
+    def obtener_por_email(self, email: str) -> Usuario:
+        """
+        Busca un usuario por email (p. ej. para iniciar sesión), sin distinguir mayúsculas.
+
+        Raises:
+            ResourceNotFoundError: Si no hay usuario con ese email.
+        """
+        usuario = self.usuario_repo.get_by_email(email)
+        if not usuario:
+            raise ResourceNotFoundError(f"No hay usuario con el email {email}.")
+        return usuario
+
+    def obtener_por_telefono(self, telefono: str) -> Usuario:
+        """
+        Busca un usuario por teléfono (p. ej. para enrutar notificaciones).
+
+        Raises:
+            ResourceNotFoundError: Si no hay usuario con ese teléfono.
+        """
+        usuario = self.usuario_repo.get_by_telefono(telefono)
+        if not usuario:
+            raise ResourceNotFoundError(f"No hay usuario con el teléfono {telefono}.")
+        return usuario
+
+    def obtener_varios(self, ids: Iterable[str]) -> Dict[str, Usuario]:
+        """Busca varios usuarios en una sola lectura; los inexistentes no aparecen."""
+        return self.usuario_repo.get_many(ids)
+
+    def listar_usuarios(
+        self, cursor: Optional[str] = None, limite: Optional[int] = None
+    ) -> Pagina[Usuario]:
+        """Lista usuarios; con `limite` retorna una sola página desde `cursor`."""
+        return _listar(self.usuario_repo, cursor, limite)
+
+
+class UnidadResidencialService:
+    """
+    Servicio para gestión de unidades residenciales.
+    Responsabilidad: Orquestar operaciones del ciclo de vida de unidades.
+    """
+
+    def __init__(self, unidad_repo: InMemoryUnidadResidencialRepository):
+        self.unidad_repo = unidad_repo
+
+    def crear_unidad(self, cmd: CrearUnidadResidencialCommand) -> UnidadResidencial:
+        """
+        Crea una nueva unidad residencial.
+        
+        Raises:
+            ResourceAlreadyExistsError: Si la unidad ya existe.
+        """
+        if self.unidad_repo.get(cmd.id):
+            raise ResourceAlreadyExistsError(f"Unidad con id {cmd.id} ya existe.")
+
+        unidad = UnidadResidencial(
+            id=cmd.id,
+            nombre=cmd.nombre,
+            direccion=cmd.direccion
+        )
+
+        self.unidad_repo.add(unidad)
+
+        return unidad
+
+    def listar_unidades(
+        self, cursor: Optional[str] = None, limite: Optional[int] = None
+    ) -> Pagina[UnidadResidencial]:
+        """Lista unidades residenciales; con `limite` retorna una sola página."""
+        return _listar(self.unidad_repo, cursor, limite)
+
+
+class CategoriaService:
+    """
+    Servicio para gestión de categorías.
+    Responsabilidad: Orquestar operaciones del ciclo de vida de categorías.
+    """
+
+    def __init__(
+        self,
+        categoria_repo: InMemoryCategoriaRepository,
+        versiones: Optional[VersionesColecciones] = None
+    ):
+        self.categoria_repo = categoria_repo
+        self.versiones = versiones or VersionesColecciones()
+
+    def crear_categoria(self, cmd: CrearCategoriaCommand) -> Categoria:
+        """
+        Crea una nueva categoría.
+        
+        Raises:
+            ResourceAlreadyExistsError: Si la categoría ya existe.
+        """
+        if self.categoria_repo.get(cmd.id):
+            raise ResourceAlreadyExistsError(f"Categoría con id {cmd.id} ya existe.")
+
+        categoria = Categoria(
+            id=cmd.id,
+            nombre=cmd.nombre,
+            descripcion=cmd.descripcion
+        )
+
+        self.categoria_repo.add(categoria)
+        self.versiones.incrementar("categorias")
+
+        return categoria
+
+    def obtener_varias(self, ids: Iterable[str]) -> Dict[str, Categoria]:
+        """Busca varias categorías en una sola lectura; las inexistentes no aparecen."""
+        return self.categoria_repo.get_many(ids)
+
+    def listar_categorias(
+        self, cursor: Optional[str] = None, limite: Optional[int] = None
+    ) -> Pagina[Categoria]:
+        """Lista categorías; con `limite` retorna una sola página desde `cursor`."""
+        return _listar(self.categoria_repo, cursor, limite)
+
+
+class PublicacionService:
+    """
+    Servicio para publicación de productos.
+    Responsabilidad: Orquestar el flujo de publicación de productos.
+    """
+
+    def __init__(
+        self,
+        producto_repo: InMemoryProductoRepository,
+        usuario_repo: InMemoryUsuarioRepository,
+        categoria_repo: InMemoryCategoriaRepository,
+        max_images: int = 4,
+        notifier: Optional[Notifier] = None,
+        outbox_repo=None,
+        unidad_de_trabajo: Optional[Callable[[], ContextManager]] = None,
+        versiones: Optional[VersionesColecciones] = None
+    ):
+        self.producto_repo = producto_repo
+        self.usuario_repo = usuario_repo
+        self.categoria_repo = categoria_repo
+        self.max_images = max_images
+        self.notifier = notifier or NotifierFactory.create()
+        # Con outbox la notificación se registra junto al producto y la entrega un OutboxRelay
+        self.outbox_repo = outbox_repo
+        self.unidad_de_trabajo = unidad_de_trabajo or nullcontext
+        self.versiones = versiones or VersionesColecciones()
+
+    def publicar_producto(self, cmd: PublicarProductoCommand) -> Producto:
+        """
+        Publica un producto en el marketplace.
+        
+        Raises:
+            ResourceNotFoundError: Si el vendedor o categoría no existen.
+            PermissionError: Si el vendedor no tiene permisos.
+            ValidationError: Si los datos del producto son inválidos.
+        """
+        producto = self._construir_producto(
+            cmd,
+            self.usuario_repo.get(cmd.vendedor_id),
+            self.categoria_repo.get(cmd.categoria_id)
+        )
+        self._guardar([producto])
+        return producto
+
+    def publicar_productos_batch(self, cmds: List[PublicarProductoCommand]) -> ResultadoLote:
+        """
+        Publica varios productos en una sola pasada.
+
+        Cada vendedor y categoría se busca una sola vez, los productos válidos se
+        guardan con una única escritura y los inválidos se reportan por posición
+        sin detener el resto del lote.
+        """
+        vendedores = self.usuario_repo.get_many({c.vendedor_id for c in cmds})
+        categorias = self.categoria_repo.get_many({c.categoria_id for c in cmds})
+
+        resultado = ResultadoLote()
+        for indice, cmd in enumerate(cmds):
+            try:
+                producto = self._construir_producto(
+                    cmd, vendedores.get(cmd.vendedor_id), categorias.get(cmd.categoria_id)
+                )
+            except DomainError as e:
+                resultado.errores.append(ErrorLote(indice, str(e)))
+            else:
+                resultado.creados.append(producto)
+
+        if resultado.creados:
+            self._guardar(resultado.creados)
+        return resultado
+
+    def _construir_producto(
+        self,
+        cmd: PublicarProductoCommand,
+        vendedor: Optional[Usuario],
+        categoria: Optional[Categoria]
+    ) -> Producto:
+        """Valida existencia, permisos y datos del producto, y lo construye."""
+        # Verificar vendedor
+        if not vendedor:
+            raise ResourceNotFoundError(f"Vendedor con id {cmd.vendedor_id} no encontrado.")
+
+        # Verificar categoría
+        if not categoria:
+            raise ResourceNotFoundError(f"Categoría con id {cmd.categoria_id} no encontrada.")
+
+        # Verificar permisos
+        if cmd.vendedor_status != "APPROVED":
+            raise PermissionError("Solo usuarios APPROVED pueden publicar.")
+
+        # Construir producto usando Builder (validaciones de dominio)
+        builder = (
+            ProductoBuilder(max_images=self.max_images)
+            .vendedor(vendedor)
+            .categoria(categoria)
+            .nombre(cmd.nombre)
+            .descripcion(cmd.descripcion)
+            .precio_cop(cmd.precio_cop)
+        )
+
+        for url in cmd.imagenes[:self.max_images]:
+            builder.add_imagen(url)
+
+        return builder.build()
+
+    async def apublicar_producto(self, cmd: PublicarProductoCommand) -> Producto:
+        """
+        publicar_producto para llamadores asíncronos: las lecturas usan las
+        variantes `a*` de los repositorios, la unidad de trabajo corre entera
+        en un hilo del pool de E/S y el aviso sale por `anotify_batch`.
+        """
+        producto = self._construir_producto(
+            cmd,
+            await self.usuario_repo.aget(cmd.vendedor_id),
+            await self.categoria_repo.aget(cmd.categoria_id)
+        )
+        avisos = await en_hilo(self._persistir, [producto])
+        if avisos:
+            await self.notifier.anotify_batch(avisos)
+        return producto
+
+    def _guardar(self, productos: List[Producto]) -> None:
+        """Persiste los productos y envía sus notificaciones (si no van por el outbox)."""
+        avisos = self._persistir(productos)
+
+        # Notificar (side effect; sin outbox el envío es directo)
+        if avisos:
+            self.notifier.notify_batch(avisos)
+
+    def _persistir(self, productos: List[Producto]) -> List[Tuple[str, str]]:
+        """
+        Guarda los productos (y sus eventos, con outbox) en una unidad de
+        trabajo. Retorna los avisos que quedan por enviar: ninguno con outbox.
+        """
+        avisos = [(p.vendedor.telefono, p.nombre) for p in productos]
+
+        # Persistir (productos y eventos en la misma unidad de trabajo)
+        with self.unidad_de_trabajo():
+            self.producto_repo.add_many(productos)
+            if self.outbox_repo is not None:
+                self.outbox_repo.add_many(
+                    EventoOutbox.publicacion_creada(telefono, nombre) for telefono, nombre in avisos
+                )
+        self.versiones.incrementar("productos")
+        return [] if self.outbox_repo is not None else avisos
+    
+    def reducir_stock(self, producto_id: str, cantidad: int) -> Producto:
+        """
+        Descuenta stock de un producto con compare-and-set en el repositorio:
+        si otra petición cambió el stock entre la lectura y la escritura, se
+        vuelve a leer y se reintenta, así dos compras simultáneas nunca
+        descuentan sobre el mismo valor. El repositorio actualiza la
+        disponibilidad en su índice de precios.
+
+        Raises:
+            ResourceNotFoundError: Si el producto no existe.
+            ValidationError: Si no hay stock suficiente.
+        """
+        producto = _ajustar_stock(
+            self.producto_repo, producto_id, lambda stock: descontar_stock(stock, cantidad)
+        )
+        self.versiones.incrementar("productos")
+        return producto
+
+    def listar_productos(
+        self,
+        cursor: Optional[str] = None,
+        limite: Optional[int] = None,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        orden: Optional[str] = None,
+        solo_disponibles: bool = False,
+    ) -> Pagina[Producto]:
+        """
+        Lista productos; con `limite` retorna una sola página desde `cursor`.
+        Con categoría, rango de precio u `orden` ("precio" / "-precio") el
+        listado sale ordenado por precio desde el índice de precios.
+        """
+        return _listar(
+            self.producto_repo, cursor, limite,
+            categoria_id=categoria_id, precio_min=precio_min, precio_max=precio_max,
+            orden=orden, solo_disponibles=solo_disponibles,
+        )
+
+    def facetas_productos(
+        self,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        solo_disponibles: bool = False,
+    ) -> Facetas:
+        """Conteos por categoría, rango de precio y disponibilidad de los productos filtrados."""
+        return self.producto_repo.facetas(categoria_id, precio_min, precio_max, solo_disponibles)
+
+
+class ServicioService:
+    """
+    Servicio para publicación de servicios.
+    Responsabilidad: Orquestar el flujo de publicación de servicios.
+    """
+
+    def __init__(
+        self,
+        servicio_repo: InMemoryServicioRepository,
+        usuario_repo: InMemoryUsuarioRepository,
+        categoria_repo: InMemoryCategoriaRepository,
+        notifier: Optional[Notifier] = None,
+        outbox_repo=None,
+        unidad_de_trabajo: Optional[Callable[[], ContextManager]] = None,
+        versiones: Optional[VersionesColecciones] = None
+    ):
+        self.servicio_repo = servicio_repo
+        self.usuario_repo = usuario_repo
+        self.categoria_repo = categoria_repo
+        self.notifier = notifier or NotifierFactory.create()
+        self.outbox_repo = outbox_repo
+        self.unidad_de_trabajo = unidad_de_trabajo or nullcontext
+        self.versiones = versiones or VersionesColecciones()
+
+    def publicar_servicio(self, cmd: PublicarServicioCommand) -> Servicio:
+        """
+        Publica un servicio en el marketplace.
+        
+        Raises:
+            ResourceNotFoundError: Si el proveedor o categoría no existen.
+            PermissionError: Si el proveedor no tiene permisos.
+            ValidationError: Si los datos del servicio son inválidos.
+        """
+        servicio = self._construir_servicio(
+            cmd,
+            self.usuario_repo.get(cmd.proveedor_id),
+            self.categoria_repo.get(cmd.categoria_id)
+        )
+        self._guardar([servicio])
+        return servicio
+
+    def publicar_servicios_batch(self, cmds: List[PublicarServicioCommand]) -> ResultadoLote:
+        """
+        Publica varios servicios en una sola pasada.
+
+        Cada proveedor y categoría se busca una sola vez, los servicios válidos se
+        guardan con una única escritura y los inválidos se reportan por posición.
+        """
+        proveedores = self.usuario_repo.get_many({c.proveedor_id for c in cmds})
+        categorias = self.categoria_repo.get_many({c.categoria_id for c in cmds})
+
+        resultado = ResultadoLote()
+        for indice, cmd in enumerate(cmds):
+            try:
+                servicio = self._construir_servicio(
+                    cmd, proveedores.get(cmd.proveedor_id), categorias.get(cmd.categoria_id)
+                )
+            except DomainError as e:
+                resultado.errores.append(ErrorLote(indice, str(e)))
+            else:
+                resultado.creados.append(servicio)
+
+        if resultado.creados:
+            self._guardar(resultado.creados)
+        return resultado
+
+    def _construir_servicio(
+        self,
+        cmd: PublicarServicioCommand,
+        proveedor: Optional[Usuario],
+        categoria: Optional[Categoria]
+    ) -> Servicio:
+        """Valida existencia, permisos y datos del servicio, y lo construye."""
+        # Verificar proveedor
+        if not proveedor:
+            raise ResourceNotFoundError(f"Proveedor con id {cmd.proveedor_id} no encontrado.")
+
+        # Verificar categoría
+        if not categoria:
+            raise ResourceNotFoundError(f"Categoría con id {cmd.categoria_id} no encontrada.")
+
+        # Verificar permisos
+        if cmd.proveedor_status != "APPROVED":
+            raise PermissionError("Solo usuarios APPROVED pueden publicar servicios.")
+
+        # Crear servicio (validaciones en __post_init__)
+        return Servicio(
+            id=str(uuid.uuid4()),
+            nombre=cmd.nombre,
+            descripcion=cmd.descripcion,
+            precio=cmd.precio_cop,
+            proveedor=proveedor,
+            categoria=categoria,
+            disponible=True
+        )
+
+    async def apublicar_servicio(self, cmd: PublicarServicioCommand) -> Servicio:
+        """publicar_servicio para llamadores asíncronos (ver PublicacionService.apublicar_producto)."""
+        servicio = self._construir_servicio(
+            cmd,
+            await self.usuario_repo.aget(cmd.proveedor_id),
+            await self.categoria_repo.aget(cmd.categoria_id)
+        )
+        avisos = await en_hilo(self._persistir, [servicio])
+        if avisos:
+            await self.notifier.anotify_batch(avisos)
+        return servicio
+
+    def _guardar(self, servicios: List[Servicio]) -> None:
+        """Persiste los servicios y envía sus notificaciones (si no van por el outbox)."""
+        avisos = self._persistir(servicios)
+
+        # Notificar (side effect; sin outbox el envío es directo)
+        if avisos:
+            self.notifier.notify_batch(avisos)
+
+    def _persistir(self, servicios: List[Servicio]) -> List[Tuple[str, str]]:
+        """Guarda servicios y eventos; retorna los avisos por enviar (ninguno con outbox)."""
+        avisos = [(s.proveedor.telefono, s.nombre) for s in servicios]
+
+        # Persistir (servicios y eventos en la misma unidad de trabajo)
+        with self.unidad_de_trabajo():
+            self.servicio_repo.add_many(servicios)
+            if self.outbox_repo is not None:
+                self.outbox_repo.add_many(
+                    EventoOutbox.publicacion_creada(telefono, nombre) for telefono, nombre in avisos
+                )
+        self.versiones.incrementar("servicios")
+        return [] if self.outbox_repo is not None else avisos
+
+    def cambiar_disponibilidad(self, servicio_id: str, disponible: bool) -> Servicio:
+        """
+        Marca un servicio como disponible o no disponible; el repositorio lo
+        cambia y lo reindexa en una sola escritura.
+
+        Raises:
+            ResourceNotFoundError: Si el servicio no existe.
+        """
+        with self.unidad_de_trabajo():
+            servicio = self.servicio_repo.fijar_disponibilidad(servicio_id, disponible)
+        if not servicio:
+            raise ResourceNotFoundError(f"Servicio no encontrado: {servicio_id}")
+        self.versiones.incrementar("servicios")
+        return servicio
+
+    def listar_servicios(
+        self,
+        cursor: Optional[str] = None,
+        limite: Optional[int] = None,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        orden: Optional[str] = None,
+        solo_disponibles: bool = False,
+    ) -> Pagina[Servicio]:
+        """
+        Lista servicios; con `limite` retorna una sola página desde `cursor`.
+        Con categoría, rango de precio u `orden` ("precio" / "-precio") el
+        listado sale ordenado por precio desde el índice de precios.
+        """
+        return _listar(
+            self.servicio_repo, cursor, limite,
+            categoria_id=categoria_id, precio_min=precio_min, precio_max=precio_max,
+            orden=orden, solo_disponibles=solo_disponibles,
+        )
+
+    def facetas_servicios(
+        self,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        solo_disponibles: bool = False,
+    ) -> Facetas:
+        """Conteos por categoría, rango de precio y disponibilidad de los servicios filtrados."""
+        return self.servicio_repo.facetas(categoria_id, precio_min, precio_max, solo_disponibles)
+
+
+class ReservaService:
+    """
+    Servicio de reservas de stock.
+    Responsabilidad: Apartar stock para una consulta y devolverlo si la
+    reserva se libera o vence sin confirmarse.
+
+    Cada transición es atómica: el stock se mueve con compare-and-set y el
+    estado de la reserva también, así un producto muy pedido nunca se
+    sobrevende y una reserva no se confirma y vence a la vez. Los
+    vencimientos van en un montículo (ColaVencimientos): `liberar_vencidas`
+    solo toca las reservas vencidas, sin recorrer las vigentes.
+
+    Una consulta tiene a lo sumo una reserva activa: `reservar` se serializa
+    por consulta dentro del proceso y, entre procesos, el repositorio rechaza
+    la segunda (índice único en SQLite).
+    """
+
+    def __init__(
+        self,
+        reserva_repo: InMemoryReservaRepository,
+        producto_repo: InMemoryProductoRepository,
+        duracion: timedelta = timedelta(minutes=30),
+        reloj: Callable[[], datetime] = datetime.now,
+        unidad_de_trabajo: Optional[Callable[[], ContextManager]] = None,
+        versiones: Optional[VersionesColecciones] = None
+    ):
+        self.reserva_repo = reserva_repo
+        self.producto_repo = producto_repo
+        self.duracion = duracion
+        self.reloj = reloj
+        self.unidad_de_trabajo = unidad_de_trabajo or nullcontext
+        self.versiones = versiones or VersionesColecciones()
+        self._vencimientos = ColaVencimientos()
+        self._lock = threading.Lock()  # Protege el montículo
+        self._locks_consulta = LocksPorClave()  # Un `reservar` a la vez por consulta
+        self._parar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        for reserva in reserva_repo.list_activas():
+            self._vencimientos.agregar(reserva.id, reserva.vence)
+
+    def iniciar(self, intervalo: float = 30.0) -> "ReservaService":
+        """Libera las reservas vencidas cada `intervalo` segundos en segundo plano (idempotente)."""
+        if self._hilo is None:
+            self._parar.clear()
+            self._hilo = threading.Thread(
+                target=self._ciclo, args=(intervalo,), name="reservas-vencimiento", daemon=True
+            )
+            self._hilo.start()
+        return self
+
+    def detener(self, timeout: float = 5.0) -> None:
+        """Detiene el hilo de vencimientos."""
+        if self._hilo is not None:
+            self._parar.set()
+            self._hilo.join(timeout)
+            self._hilo = None
+
+    def _ciclo(self, intervalo: float) -> None:
+        while not self._parar.wait(intervalo):
+            try:
+                self.liberar_vencidas()
+            except Exception:
+                # Las reservas que no se pudieron vencer siguen en el montículo
+                # y se reintentan en la próxima vuelta.
+                logger.exception("Falló la liberación de reservas vencidas; se reintenta en %.1f s", intervalo)
+
+    def reservar(self, consulta: Consulta, cantidad: int = 1) -> Reserva:
+        """
+        Aparta `cantidad` unidades del producto de la consulta hasta
+        `ahora + duracion`. Si la consulta ya tiene una reserva activa, la retorna.
+
+        Raises:
+            ValidationError: Si el item no es un producto o no hay stock suficiente.
+            ResourceNotFoundError: Si el producto ya no existe.
+        """
+        if not isinstance(consulta.item, Producto):
+            raise ValidationError("Solo se puede reservar stock de productos.")
+        self.liberar_vencidas()
+        with self._locks_consulta.para(consulta.id):
+            existente = self.reserva_repo.get_activa_por_consulta(consulta.id)
+            if existente:
+                return existente
+
+            reserva = Reserva(
+                id=str(uuid.uuid4()),
+                consulta_id=consulta.id,
+                producto_id=consulta.item.id,
+                cantidad=cantidad,
+                vence=self.reloj() + self.duracion,
+            )
+            try:
+                with self.unidad_de_trabajo():
+                    _ajustar_stock(
+                        self.producto_repo, reserva.producto_id,
+                        lambda stock: descontar_stock(stock, cantidad),
+                    )
+                    self.reserva_repo.add(reserva)
+            except ResourceAlreadyExistsError:
+                # Solo con SQLite y sin una unidad de trabajo externa (dentro de una,
+                # BEGIN IMMEDIATE ya excluye a los otros procesos): otro proceso reservó
+                # entretanto (índice único) y la transacción revirtió el descuento de
+                # stock. El repositorio en memoria no rechaza reservas; dentro del
+                # proceso `reservar` ya va serializado.
+                existente = self.reserva_repo.get_activa_por_consulta(consulta.id)
+                if existente:
+                    return existente
+                raise
+        self.versiones.incrementar("productos")
+        with self._lock:
+            self._vencimientos.agregar(reserva.id, reserva.vence)
+        return reserva
+
+    def confirmar(self, reserva_id: str) -> Reserva:
+        """
+        Concreta la venta: el stock apartado ya no vuelve.
+
+        Raises:
+            ResourceNotFoundError: Si la reserva no existe.
+            ValidationError: Si la reserva ya no está activa (p. ej. venció).
+        """
+        reserva = self.reserva_repo.get(reserva_id)
+        if reserva and reserva.vencida(self.reloj()):
+            try:
+                self._terminar(reserva_id, EstadoReserva.VENCIDA, devolver=True)
+            except ValidationError:
+                pass  # Otro hilo ya la venció o liberó
+            raise ValidationError(f"La reserva {reserva_id} venció.")
+        return self._terminar(reserva_id, EstadoReserva.CONFIRMADA, devolver=False)
+
+    def liberar(self, reserva_id: str) -> Reserva:
+        """
+        Cancela la reserva y devuelve el stock.
+
+        Raises:
+            ResourceNotFoundError: Si la reserva no existe.
+            ValidationError: Si la reserva ya no está activa.
+        """
+        return self._terminar(reserva_id, EstadoReserva.LIBERADA, devolver=True)
+
+    def liberar_vencidas(self) -> int:
+        """Devuelve el stock de las reservas vencidas. Retorna cuántas venció."""
+        ahora = self.reloj()
+        with self._lock:
+            if self._vencimientos.proximo() is None or self._vencimientos.proximo() > ahora:
+                return 0
+            ids = self._vencimientos.vencidos(ahora)
+        vencidas = 0
+        for i, reserva_id in enumerate(ids):
+            try:
+                reserva = self.reserva_repo.get(reserva_id)
+                if reserva is None or not reserva.vencida(ahora):
+                    continue  # Confirmada o liberada antes de vencer (borrado perezoso)
+                self._terminar(reserva_id, EstadoReserva.VENCIDA, devolver=True)
+                vencidas += 1
+            except ValidationError:
+                pass  # Otro hilo la confirmó o liberó entretanto
+            except Exception:
+                # Las que faltan vuelven al montículo para el próximo intento
+                with self._lock:
+                    for pendiente in ids[i:]:
+                        self._vencimientos.agregar(pendiente, ahora)
+                raise
+        return vencidas
+
+    def _terminar(self, reserva_id: str, estado: EstadoReserva, devolver: bool) -> Reserva:
+        reserva = self.reserva_repo.get(reserva_id)
+        if not reserva:
+            raise ResourceNotFoundError(f"Reserva no encontrada: {reserva_id}")
+        with self.unidad_de_trabajo():
+            if not self.reserva_repo.comparar_y_fijar_estado(
+                reserva_id, EstadoReserva.ACTIVA, estado
+            ):
+                actual = self.reserva_repo.get(reserva_id)
+                raise ValidationError(
+                    f"La reserva {reserva_id} ya no está activa: {actual.estado.value}."
+                )
+            if devolver:
+                _ajustar_stock(
+                    self.producto_repo, reserva.producto_id,
+                    lambda stock: stock + reserva.cantidad,
+                )
+        if devolver:
+            self.versiones.incrementar("productos")
+        return self.reserva_repo.get(reserva_id)
+
+
+class ConsultaService:
+    """
+    Servicio para gestión de consultas (interés de contacto).
+    Responsabilidad: Registrar la intención de contacto entre comprador y vendedor.
+    Con un ReservaService, pasar una consulta de producto a CONTACTADO aparta
+    el stock mientras comprador y vendedor conversan. Cada consulta registrada
+    se avisa en `avisos` con el id del vendedor: es lo que despierta a los
+    clientes del buzón que esperan en `aesperar_consultas`.
+
+    Cada transición (el estado de la consulta, su reserva y el stock) corre
+    en una sola unidad de trabajo y el estado se fija con compare-and-set:
+    con SQLite, dos procesos que contactan y cierran la misma consulta no
+    dejan una consulta cerrada con su reserva activa.
+    """
+
+    def __init__(
+        self,
+        consulta_repo: InMemoryConsultaRepository,
+        usuario_repo: InMemoryUsuarioRepository,
+        producto_repo: InMemoryProductoRepository,
+        servicio_repo: InMemoryServicioRepository,
+        reserva_service: Optional[ReservaService] = None,
+        avisos: Optional[AvisosAsincronos] = None,
+        unidad_de_trabajo: Optional[Callable[[], ContextManager]] = None
+    ):
+        self.consulta_repo = consulta_repo
+        self.usuario_repo = usuario_repo
+        self.producto_repo = producto_repo
+        self.servicio_repo = servicio_repo
+        self.reserva_service = reserva_service
+        self.avisos = avisos or AvisosAsincronos()
+        self.unidad_de_trabajo = unidad_de_trabajo or nullcontext
+        self._locks_consulta = LocksPorClave()  # Una transición a la vez por consulta
+
+    def _obtener(self, consulta_id: str) -> Consulta:
+        consulta = self.consulta_repo.get(consulta_id)
+        if not consulta:
+            raise ResourceNotFoundError(f"Consulta no encontrada: {consulta_id}")
+        return consulta
+
+    def marcar_contactado(self, consulta_id: str) -> Consulta:
+        """
+        Marca la consulta como contactada y, si es de un producto, reserva una unidad.
+        Repetirlo no reserva de nuevo: si la consulta ya está contactada y su
+        reserva sigue activa, la retorna tal cual.
+
+        Raises:
+            ResourceNotFoundError: Si la consulta no existe.
+            ValidationError: Si la consulta está cerrada o no hay stock para
+                reservar (la consulta no cambia).
+        """
+        self._liberar_vencidas()
+        with self._locks_consulta.para(consulta_id), self.unidad_de_trabajo():
+            consulta = self._obtener(consulta_id)
+            leido = consulta.estado  # En memoria `consulta` es la entidad compartida
+            consulta.verificar_abierta()
+            if self.reserva_service and isinstance(consulta.item, Producto):
+                self.reserva_service.reservar(consulta)  # Retorna la activa si ya hay una
+            if leido is EstadoConsulta.CONTACTADO:
+                return consulta
+            self._fijar_estado(consulta, leido, EstadoConsulta.CONTACTADO)
+        return consulta
+
+    def cerrar_consulta(self, consulta_id: str, concretada: bool = False) -> Consulta:
+        """
+        Cierra la consulta (si ya está cerrada, la retorna tal cual). Su
+        reserva activa (si hay) se libera, o se confirma cuando la venta se
+        concretó. Una venta de producto siempre descuenta stock: si la reserva
+        venció (o nunca hubo), se vuelve a apartar el stock antes de confirmarla.
+
+        Raises:
+            ResourceNotFoundError: Si la consulta no existe.
+            ValidationError: Si la venta se concretó pero ya no hay stock para
+                ella (la consulta sigue abierta).
+        """
+        self._liberar_vencidas()
+        with self._locks_consulta.para(consulta_id), self.unidad_de_trabajo():
+            consulta = self._obtener(consulta_id)
+            leido = consulta.estado  # En memoria `consulta` es la entidad compartida
+            if leido is EstadoConsulta.CERRADA:
+                return consulta
+            if self.reserva_service and isinstance(consulta.item, Producto):
+                if concretada:
+                    self._confirmar_venta(consulta)
+                else:
+                    self._liberar_reserva(consulta)
+            self._fijar_estado(consulta, leido, EstadoConsulta.CERRADA)
+        return consulta
+
+    def _liberar_vencidas(self) -> None:
+        """
+        Vence las reservas pendientes antes de abrir la unidad de trabajo:
+        si esta se revierte, lo ya vencido (y su stock devuelto) no se deshace.
+        """
+        if self.reserva_service:
+            self.reserva_service.liberar_vencidas()
+
+    def _fijar_estado(
+        self, consulta: Consulta, leido: EstadoConsulta, nuevo: EstadoConsulta
+    ) -> None:
+        """
+        Pasa la consulta del estado `leido` a `nuevo` con compare-and-set.
+
+        Raises:
+            ValidationError: Si otra escritura cambió el estado entretanto
+                (con SQLite la unidad de trabajo revierte la reserva y el stock).
+        """
+        if not self.consulta_repo.comparar_y_fijar_estado(consulta.id, leido, nuevo):
+            raise ValidationError(f"La consulta {consulta.id} cambió de estado; intente de nuevo.")
+        consulta.estado = nuevo
+
+    def _confirmar_venta(self, consulta: Consulta) -> None:
+        reservas = self.reserva_service
+        reserva = reservas.reserva_repo.get_activa_por_consulta(consulta.id)
+        if reserva:
+            try:
+                reservas.confirmar(reserva.id)
+                return
+            except ValidationError:
+                if reservas.reserva_repo.get(reserva.id).estado is EstadoReserva.CONFIRMADA:
+                    return  # Otro proceso cerró la venta
+                # Venció justo antes: el stock ya volvió y hay que apartarlo de nuevo
+        reservas.confirmar(reservas.reservar(consulta).id)
+
+    def _liberar_reserva(self, consulta: Consulta) -> None:
+        reservas = self.reserva_service
+        reserva = reservas.reserva_repo.get_activa_por_consulta(consulta.id)
+        if reserva:
+            try:
+                reservas.liberar(reserva.id)
+            except ValidationError:
+                pass  # Venció justo antes: el stock ya volvió
+
+    def registrar_consulta(self, cmd: RegistrarConsultaCommand) -> Consulta:
+        """Registra una nueva consulta."""
+        comprador = self.usuario_repo.get(cmd.comprador_id)
+        item = None
+        if cmd.item_type == 'producto':
+            item = self.producto_repo.get(cmd.item_id)
+        elif cmd.item_type == 'servicio':
+            item = self.servicio_repo.get(cmd.item_id)
+
+        consulta = self._nueva_consulta(cmd, comprador, item)
+        self.consulta_repo.add(consulta)
+        self.avisos.publicar(consulta.vendedor.id)
+        return consulta
+
+    async def aregistrar_consulta(self, cmd: RegistrarConsultaCommand) -> Consulta:
+        """registrar_consulta para llamadores asíncronos."""
+        comprador = await self.usuario_repo.aget(cmd.comprador_id)
+        item = None
+        if cmd.item_type == 'producto':
+            item = await self.producto_repo.aget(cmd.item_id)
+        elif cmd.item_type == 'servicio':
+            item = await self.servicio_repo.aget(cmd.item_id)
+
+        consulta = self._nueva_consulta(cmd, comprador, item)
+        await self.consulta_repo.aadd(consulta)
+        self.avisos.publicar(consulta.vendedor.id)
+        return consulta
+
+    def _nueva_consulta(
+        self, cmd: RegistrarConsultaCommand, comprador: Optional[Usuario], item
+    ) -> Consulta:
+        """Valida que comprador e item existan y construye la consulta."""
+        if not comprador:
+            raise ResourceNotFoundError(f"Comprador no encontrado: {cmd.comprador_id}")
+        if not item:
+            raise ResourceNotFoundError(f"Item ({cmd.item_type}) no encontrado: {cmd.item_id}")
+
+        return Consulta(
+            id=str(uuid.uuid4())[:8],
+            comprador=comprador,
+            item=item,
+            mensaje=cmd.mensaje
+        )
+
+    async def aesperar_consultas(
+        self,
+        vendedor_id: str,
+        cursor: Optional[str] = None,
+        limite: int = 50,
+        timeout: float = 25.0
+    ) -> Pagina[Consulta]:
+        """
+        Buzón con long polling: las consultas recibidas después de `cursor`;
+        si no hay, espera hasta `timeout` segundos a que llegue alguna. La
+        espera no ocupa un hilo. El cursor de la página siempre está: es el
+        que el cliente manda en el siguiente pedido.
+
+        Raises:
+            ValidationError: Si el cursor es inválido.
+        """
+        with self.avisos.suscripcion(vendedor_id) as suscripcion:
+            pagina = await self.consulta_repo.alist_nuevas(vendedor_id, cursor, limite)
+            if pagina.items or not await suscripcion.esperar(timeout):
+                return pagina
+        return await self.consulta_repo.alist_nuevas(vendedor_id, cursor, limite)
+
+    def listar_consultas_vendedor(
+        self, vendedor_id: str, cursor: Optional[str] = None, limite: Optional[int] = None
+    ) -> Pagina[Consulta]:
+        """Lista consultas recibidas por un vendedor/proveedor."""
+        if limite is None:
+            return Pagina(self.consulta_repo.list_by_vendedor(vendedor_id))
+        return self.consulta_repo.list_page(cursor, limite, vendedor_id=vendedor_id)
+
+    def listar_consultas_comprador(
+        self, comprador_id: str, cursor: Optional[str] = None, limite: Optional[int] = None
+    ) -> Pagina[Consulta]:
+        """Lista consultas realizadas por un comprador."""
+        if limite is None:
+            return Pagina(self.consulta_repo.list_by_comprador(comprador_id))
+        return self.consulta_repo.list_page(cursor, limite, comprador_id=comprador_id)
+
+
+class ExportacionService:
+    """
+    Servicio de exportación masiva (p. ej. para la contabilidad de una unidad).
+    Responsabilidad: Traducir los filtros a los recorridos por lotes de los
+    repositorios. Retorna iteradores perezosos: quien los consume (la vista,
+    que escribe NDJSON) nunca tiene la colección completa en memoria.
+
+    Filtrar por unidad deja lo publicado por sus residentes: productos y
+    servicios que venden y consultas que recibieron.
+    """
+
+    def __init__(
+        self,
+        producto_repo: InMemoryProductoRepository,
+        servicio_repo: InMemoryServicioRepository,
+        consulta_repo: InMemoryConsultaRepository,
+        unidad_repo: InMemoryUnidadResidencialRepository,
+        lote: int = 1000
+    ):
+        self.producto_repo = producto_repo
+        self.servicio_repo = servicio_repo
+        self.consulta_repo = consulta_repo
+        self.unidad_repo = unidad_repo
+        self.lote = lote
+
+    def _residentes(self, cmd: ExportarCommand) -> Optional[List[str]]:
+        """Ids de los residentes de la unidad pedida (None si no se filtra por unidad)."""
+        if cmd.desde is not None and cmd.hasta is not None and cmd.desde >= cmd.hasta:
+            raise ValidationError("La fecha 'desde' debe ser anterior a 'hasta'.")
+        if cmd.unidad_id is None:
+            return None
+        unidad = self.unidad_repo.get(cmd.unidad_id)
+        if not unidad:
+            raise ResourceNotFoundError(f"Unidad residencial no encontrada: {cmd.unidad_id}")
+        return list(unidad.residentes.ids())
+
+    def exportar_productos(self, cmd: ExportarCommand) -> Iterator[Producto]:
+        """
+        Raises:
+            ResourceNotFoundError: Si la unidad no existe.
+            ValidationError: Si el rango de fechas es inválido.
+        """
+        return self.producto_repo.iterar(
+            self._residentes(cmd), cmd.categoria_id, cmd.desde, cmd.hasta, lote=self.lote
+        )
+
+    def exportar_servicios(self, cmd: ExportarCommand) -> Iterator[Servicio]:
+        """
+        Raises:
+            ResourceNotFoundError: Si la unidad no existe.
+            ValidationError: Si se filtra por fecha (los servicios no tienen).
+        """
+        if cmd.desde is not None or cmd.hasta is not None:
+            raise ValidationError("Los servicios no tienen fecha: no se pueden filtrar por desde/hasta.")
+        return self.servicio_repo.iterar(self._residentes(cmd), cmd.categoria_id, lote=self.lote)
+
+    def exportar_consultas(self, cmd: ExportarCommand) -> Iterator[Consulta]:
+        """
+        Raises:
+            ResourceNotFoundError: Si la unidad no existe.
+            ValidationError: Si el rango de fechas es inválido.
+        """
+        return self.consulta_repo.iterar(
+            self._residentes(cmd), cmd.categoria_id, cmd.desde, cmd.hasta, lote=self.lote
+        )
+
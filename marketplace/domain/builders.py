@@ -1,10 +1,11 @@
 import uuid
-from decimal import Decimal
 from dataclasses import replace
 from .exceptions import ValidationError
 from .producto import Producto
 from .usuario import Usuario
 from .categoria import Categoria
+from .dinero import Dinero
+from .validadores import construir_confiable
 
 class ProductoBuilder:
     """
@@ -72,16 +73,18 @@ class ProductoBuilder:
         if self._precio_cop is None or not (1_000 <= self._precio_cop <= 50_000_000):
             raise ValidationError("Precio COP debe estar entre 1.000 y 50.000.000.")
 
-        # Convertir precio a Decimal
-        precio_decimal = Decimal(str(self._precio_cop))
+        if len(self._imagenes) > 10:
+            raise ValidationError(f"Máximo 10 imágenes permitidas. Recibido: {len(self._imagenes)}")
 
-        # Crear producto (las validaciones de la entidad se ejecutarán en __post_init__)
-        return Producto(
+        # Las reglas de arriba son más estrictas que las de la entidad y los
+        # textos ya vienen sin espacios: no hace falta repetir __post_init__
+        return construir_confiable(
+            Producto,
             id=str(uuid.uuid4()),
             nombre=self._nombre,
             descripcion=self._descripcion,
-            precio=precio_decimal,  # Usar Decimal
+            precio=Dinero(self._precio_cop),
             vendedor=self._vendedor,
             categoria=self._categoria,
-            imagenes=list(self._imagenes),
+            imagenes=tuple(self._imagenes),
         )
@@ -0,0 +1,73 @@
+"""Índice invertido para la búsqueda de texto del marketplace."""
+
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Set
+
+
+class IndiceInvertido:
+    """
+    Índice invertido término -> documentos.
+
+    Cada documento recibe un número secuencial al indexarse y las listas de
+    publicación (postings) guardan esos números en orden creciente, por lo que
+    los resultados conservan el orden de publicación.
+    Los términos de la consulta se tratan como prefijos: "lap" encuentra "laptop".
+    Documentos y consultas deben pasar por el mismo analizador (ver texto.analizar).
+    """
+
+    def __init__(self):
+        self._documentos: List[object] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._vocabulario: List[str] = []  # Ordenado, para resolver prefijos
+
+    def agregar(self, documento: object, terminos: Iterable[str]) -> None:
+        """Indexa un documento con sus términos."""
+        numero = len(self._documentos)
+        self._documentos.append(documento)
+        for termino in set(terminos):
+            posting = self._postings.get(termino)
+            if posting is None:
+                self._postings[termino] = [numero]
+                insort(self._vocabulario, termino)
+            else:
+                posting.append(numero)
+
+    def _documentos_con_prefijo(self, prefijo: str) -> Set[int]:
+        """Une las listas de publicación de los términos que empiezan por el prefijo."""
+        encontrados: Set[int] = set()
+        i = bisect_left(self._vocabulario, prefijo)
+        while i < len(self._vocabulario) and self._vocabulario[i].startswith(prefijo):
+            encontrados.update(self._postings[self._vocabulario[i]])
+            i += 1
+        return encontrados
+
+    def buscar(self, terminos: Iterable[str]) -> List[object]:
+        """
+        Retorna los documentos que contienen todos los términos (intersección).
+
+        Sin términos (p. ej. una consulta hecha solo de stopwords) no hay
+        coincidencias: se retorna una lista vacía.
+        """
+        terminos = list(dict.fromkeys(terminos))
+        if not terminos:
+            return []
+
+        conjuntos = []
+        for termino in terminos:
+            conjunto = self._documentos_con_prefijo(termino)
+            if not conjunto:
+                return []
+            conjuntos.append(conjunto)
+
+        # Intersectar empezando por la lista más corta
+        conjuntos.sort(key=len)
+        resultado = conjuntos[0]
+        for conjunto in conjuntos[1:]:
+            resultado = resultado & conjunto
+            if not resultado:
+                return []
+
+        return [self._documentos[n] for n in sorted(resultado)]
+
+    def __len__(self) -> int:
+        return len(self._documentos)
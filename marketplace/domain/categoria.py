@@ -1,12 +1,13 @@
 """Categoría para clasificar productos y servicios con validaciones."""
 
+import sys
 from dataclasses import dataclass
 from typing import Optional
 
-from .exceptions import ValidationError
+from .validadores import validar_id, validar_texto, validar_texto_opcional
 
 
-@dataclass
+@dataclass(slots=True)
 class Categoria:
     """
     Clasificación de productos y servicios en el marketplace.
@@ -14,6 +15,8 @@ class Categoria:
     Validaciones de negocio:
     - Nombre: 3-50 caracteres, no vacío
     - Descripción: máximo 200 caracteres (opcional)
+
+    Id y nombre se internan: hay pocas categorías y se repiten en cada item.
     """
 
     id: str
@@ -22,29 +25,18 @@ class Categoria:
 
     def __post_init__(self):
         """Validar invariantes de negocio."""
-        # Validar ID
-        if not self.id or not self.id.strip():
-            raise ValidationError("El ID de la categoría no puede estar vacío.")
-
-        # Validar nombre
-        if not self.nombre or not self.nombre.strip():
-            raise ValidationError("El nombre de la categoría no puede estar vacío.")
-        
-        nombre_limpio = self.nombre.strip()
-        if len(nombre_limpio) < 3:
-            raise ValidationError("El nombre de la categoría debe tener al menos 3 caracteres.")
-        if len(nombre_limpio) > 50:
-            raise ValidationError("El nombre de la categoría no puede exceder 50 caracteres.")
-        
-        self.nombre = nombre_limpio
-
-        # Validar descripción (opcional)
-        if self.descripcion is not None:
-            desc_limpia = self.descripcion.strip()
-            if len(desc_limpia) > 200:
-                raise ValidationError("La descripción no puede exceder 200 caracteres.")
-            
-            self.descripcion = desc_limpia if desc_limpia else None
+        self.id = sys.intern(validar_id(self.id, "El ID de la categoría no puede estar vacío."))
+        self.nombre = sys.intern(validar_texto(
+            self.nombre, 3, 50,
+            vacio="El nombre de la categoría no puede estar vacío.",
+            corto="El nombre de la categoría debe tener al menos 3 caracteres.",
+            largo="El nombre de la categoría no puede exceder 50 caracteres.",
+        ))
+        self.descripcion = validar_texto_opcional(
+            self.descripcion, 200,
+            largo="La descripción no puede exceder 200 caracteres.",
+            vacio_a_none=True,
+        )
 
     def __str__(self) -> str:
         return self.nombre
@@ -0,0 +1,87 @@
+"""Colección indexada por id para los agregados del dominio."""
+
+from typing import Callable, Dict, Generic, Hashable, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class ColeccionIndexada(Generic[T]):
+    """
+    Elementos únicos por id, en orden de inserción, con índices secundarios.
+
+    Reemplaza a las listas de los agregados donde se preguntaba `x in lista`
+    (un recorrido que compara dataclasses completas): pertenencia, alta y
+    búsqueda por id son O(1), y cada índice secundario (p. ej. email o
+    apartamento) agrupa los elementos por el valor de una función. Los
+    valores None no se indexan. Los índices reflejan los valores al momento
+    del alta: para cambiar un campo indexado hay que quitar y volver a agregar.
+    """
+
+    __slots__ = ("_elementos", "_funciones", "_indices")
+
+    def __init__(
+        self,
+        elementos: Iterable[T] = (),
+        indices: Optional[Dict[str, Callable[[T], Optional[Hashable]]]] = None,
+    ):
+        self._elementos: Dict[str, T] = {}
+        self._funciones = dict(indices or {})
+        self._indices: Dict[str, Dict[Hashable, List[T]]] = {nombre: {} for nombre in self._funciones}
+        for elemento in elementos:
+            self.agregar(elemento)
+
+    def agregar(self, elemento: T) -> bool:
+        """Agrega el elemento si su id no está; retorna False si ya estaba."""
+        if elemento.id in self._elementos:
+            return False
+        self._elementos[elemento.id] = elemento
+        for nombre, funcion in self._funciones.items():
+            valor = funcion(elemento)
+            if valor is not None:
+                self._indices[nombre].setdefault(valor, []).append(elemento)
+        return True
+
+    def quitar(self, id: str) -> Optional[T]:
+        """Saca el elemento con ese id (None si no estaba)."""
+        elemento = self._elementos.pop(id, None)
+        if elemento is None:
+            return None
+        for nombre, funcion in self._funciones.items():
+            valor = funcion(elemento)
+            grupo = self._indices[nombre].get(valor)
+            if grupo is not None:
+                grupo.remove(elemento)
+                if not grupo:
+                    del self._indices[nombre][valor]
+        return elemento
+
+    def get(self, id: str) -> Optional[T]:
+        return self._elementos.get(id)
+
+    def buscar(self, indice: str, valor: Hashable) -> List[T]:
+        """Elementos cuyo valor en el índice `indice` es `valor`, en orden de alta."""
+        return list(self._indices[indice].get(valor, ()))
+
+    def ids(self) -> Iterable[str]:
+        return self._elementos.keys()
+
+    def __contains__(self, elemento: object) -> bool:
+        """Pertenencia por id; acepta el elemento o directamente su id."""
+        id = elemento if isinstance(elemento, str) else getattr(elemento, "id", None)
+        return id in self._elementos
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._elementos.values())
+
+    def __len__(self) -> int:
+        return len(self._elementos)
+
+    def __eq__(self, otra: object) -> bool:
+        if isinstance(otra, ColeccionIndexada):
+            return list(self) == list(otra)
+        if isinstance(otra, list):
+            return list(self) == otra
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ColeccionIndexada({list(self._elementos.values())!r})"
@@ -9,6 +9,7 @@ from .usuario import Usuario
 from .producto import Producto
 from .servicio import Servicio
 from .exceptions import ValidationError
+from .validadores import validar_id
 
 
 class EstadoConsulta(Enum):
@@ -19,11 +20,12 @@ class EstadoConsulta(Enum):
     CERRADA = "cerrada"          # El ciclo de contacto terminó
 
 
-@dataclass
+@dataclass(slots=True)
 class Consulta:
     """
     Registro de interés de un comprador en un producto o servicio.
     No implica transacción, solo facilita la conexión.
+    Comprador e item son referencias a las entidades compartidas, no copias.
     """
 
     id: str
@@ -35,17 +37,32 @@ class Consulta:
 
     def __post_init__(self):
         """Validar invariantes de negocio."""
-        if not self.id or not self.id.strip():
-            raise ValidationError("El ID de la consulta no puede estar vacío.")
-        
+        validar_id(self.id, "El ID de la consulta no puede estar vacío.")
+
         if not self.comprador:
             raise ValidationError("La consulta debe tener un comprador.")
             
         if not self.item:
             raise ValidationError("La consulta debe referirse a un producto o servicio.")
 
+    @property
+    def vendedor(self) -> Usuario:
+        """Usuario que publicó el item: vendedor del producto o proveedor del servicio."""
+        if isinstance(self.item, Producto):
+            return self.item.vendedor
+        return self.item.proveedor
+
+    def verificar_abierta(self) -> None:
+        """
+        Raises:
+            ValidationError: Si la consulta ya está cerrada.
+        """
+        if self.estado is EstadoConsulta.CERRADA:
+            raise ValidationError(f"La consulta {self.id} ya está cerrada.")
+
     def marcar_contactado(self) -> None:
-        """Marca la consulta como contactada."""
+        """Marca la consulta como contactada; una consulta cerrada no se reabre."""
+        self.verificar_abierta()
         self.estado = EstadoConsulta.CONTACTADO
 
     def cerrar(self) -> None:
@@ -0,0 +1,98 @@
+"""
+Dinero: montos en pesos colombianos (COP) respaldados por un entero.
+
+El peso no tiene fracción en la práctica, así que un monto es un número entero
+de pesos: comparar, ordenar y sumar precios son operaciones de enteros, y el
+valor pasa sin conversiones a SQLite, JSON, NumPy y los serializers.
+"""
+
+import math
+from decimal import Decimal, InvalidOperation
+from typing import Any, Optional, Tuple
+
+from .exceptions import ValidationError
+
+
+class Dinero(int):
+    """
+    Monto en COP. Es un `int` (sin `__dict__` por instancia), así que sirve
+    donde se espere un entero; sumas, restas y productos por un entero
+    retornan Dinero. `str()` da el número y `formato()` el texto para mostrar.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, valor: Any = 0) -> "Dinero":
+        """
+        Convierte enteros, Decimal, flotantes o texto a pesos enteros.
+
+        Raises:
+            ValidationError: Si el valor no es numérico o tiene fracción de peso.
+        """
+        if type(valor) is int or type(valor) is cls:
+            return int.__new__(cls, valor)
+        if isinstance(valor, bool):
+            raise ValidationError("El monto debe ser un número.")
+        if isinstance(valor, int):
+            return int.__new__(cls, valor)
+        if isinstance(valor, (Decimal, float, str)):
+            try:
+                exacto = Decimal(str(valor).strip())
+            except InvalidOperation:
+                raise ValidationError(f"Monto inválido: {valor}")
+            if not exacto.is_finite() or exacto != exacto.to_integral_value():
+                raise ValidationError(f"El monto debe ser un número entero de pesos. Recibido: {valor}")
+            return int.__new__(cls, int(exacto))
+        raise ValidationError("El monto debe ser un número.")
+
+    def __add__(self, otro):
+        resultado = int.__add__(self, otro)
+        return resultado if resultado is NotImplemented else Dinero(resultado)
+
+    __radd__ = __add__
+
+    def __sub__(self, otro):
+        resultado = int.__sub__(self, otro)
+        return resultado if resultado is NotImplemented else Dinero(resultado)
+
+    def __rsub__(self, otro):
+        resultado = int.__rsub__(self, otro)
+        return resultado if resultado is NotImplemented else Dinero(resultado)
+
+    def __mul__(self, otro):
+        if not isinstance(otro, int) or isinstance(otro, (bool, Dinero)):
+            return NotImplemented  # Solo monto por cantidad
+        return Dinero(int.__mul__(self, otro))
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "Dinero":
+        return Dinero(int.__neg__(self))
+
+    def __abs__(self) -> "Dinero":
+        return Dinero(int.__abs__(self))
+
+    def __repr__(self) -> str:
+        return f"Dinero({int(self)})"
+
+    def __str__(self) -> str:
+        return str(int(self))  # str(), f-strings y %s muestran el monto, como un int
+
+    def formato(self) -> str:
+        """Texto para mostrar, con puntos de miles: $2.500.000."""
+        signo = "-" if self < 0 else ""
+        return f"{signo}${abs(int(self)):,}".replace(",", ".")
+
+
+def limites_enteros(
+    minimo: Optional[Any], maximo: Optional[Any]
+) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Redondea hacia adentro los límites de un filtro de precio (p. ej. Decimal
+    con centavos del query string): el mínimo hacia arriba y el máximo hacia
+    abajo, así el rango en pesos enteros selecciona los mismos precios.
+    """
+    return (
+        None if minimo is None else math.ceil(minimo),
+        None if maximo is None else math.floor(maximo),
+    )
@@ -6,3 +6,7 @@ class ValidationError(DomainError):
 
 class PermissionError(DomainError):
     pass
+
+class ResourceAlreadyExistsError(DomainError):
+    """Excepción cuando se intenta crear un recurso que ya existe."""
+    pass
@@ -0,0 +1,149 @@
+"""Facetas del catálogo: conteos por categoría, rango de precio y disponibilidad."""
+
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .dinero import Dinero
+
+# Límites (COP) de los rangos de precio: [0, 50.000), [50.000, 200.000), ...
+LIMITES_PRECIO: Tuple[int, ...] = (50_000, 200_000, 1_000_000)
+
+DISPONIBILIDAD = (("disponible", "Disponible"), ("no_disponible", "No disponible"))
+
+
+def _miles(valor: int) -> str:
+    return f"{valor:,}".replace(",", ".")
+
+
+def _rangos_precio(limites: Tuple[int, ...]) -> List[Tuple[str, str]]:
+    """(valor, etiqueta) de cada rango, en orden de precio."""
+    bordes = (0,) + limites
+    rangos = [
+        (f"{desde}-{hasta}", f"${_miles(desde)} - ${_miles(hasta)}")
+        for desde, hasta in zip(bordes, limites)
+    ]
+    rangos.append((f"{bordes[-1]}-", f"${_miles(bordes[-1])} o más"))
+    return rangos
+
+
+RANGOS_PRECIO = _rangos_precio(LIMITES_PRECIO)
+
+
+def rango_precio(precio: Dinero) -> int:
+    """Posición en RANGOS_PRECIO del rango al que pertenece el precio."""
+    return bisect_right(LIMITES_PRECIO, precio)
+
+
+@dataclass(frozen=True)
+class ConteoFaceta:
+    """Un valor de faceta con su etiqueta para mostrar y cuántos items lo tienen."""
+    valor: str
+    etiqueta: str
+    cantidad: int
+
+
+@dataclass(frozen=True)
+class Facetas:
+    """Conteos de un conjunto de resultados, listos para mostrar."""
+    categorias: List[ConteoFaceta] = field(default_factory=list)
+    precios: List[ConteoFaceta] = field(default_factory=list)
+    disponibilidad: List[ConteoFaceta] = field(default_factory=list)
+
+    @classmethod
+    def desde_conteos(
+        cls,
+        categorias: Dict[Optional[str], int],
+        nombres: Dict[Optional[str], str],
+        precios: Dict[int, int],
+        disponibles: Dict[bool, int],
+    ) -> "Facetas":
+        """
+        Arma las facetas a partir de conteos crudos: categoría (id) -> cantidad,
+        posición de rango -> cantidad y disponible -> cantidad. Se omiten los ceros.
+        """
+        return cls(
+            categorias=sorted(
+                (
+                    ConteoFaceta(id or "", nombres.get(id, "Sin categoría"), cantidad)
+                    for id, cantidad in categorias.items() if cantidad
+                ),
+                key=lambda c: (-c.cantidad, c.etiqueta),
+            ),
+            precios=[
+                ConteoFaceta(valor, etiqueta, precios[i])
+                for i, (valor, etiqueta) in enumerate(RANGOS_PRECIO) if precios.get(i)
+            ],
+            disponibilidad=[
+                ConteoFaceta(valor, etiqueta, disponibles[estado])
+                for estado, (valor, etiqueta) in zip((True, False), DISPONIBILIDAD)
+                if disponibles.get(estado)
+            ],
+        )
+
+
+class MotorFacetas:
+    """
+    Facetas mantenidas de forma incremental.
+
+    Cada item guarda sus claves de faceta (categoría, rango de precio,
+    disponibilidad) al indexarse, y los totales del catálogo se ajustan en cada
+    alta o cambio: los del catálogo completo salen de los contadores sin
+    recorrer nada, y los de un conjunto de resultados cuestan una búsqueda por
+    item del conjunto (O(k)), nunca una pasada por el catálogo.
+    """
+
+    def __init__(self):
+        self._claves: Dict[str, Tuple[Optional[str], int, bool]] = {}
+        self._nombres: Dict[Optional[str], str] = {}
+        self._categorias: Counter = Counter()
+        self._precios: Counter = Counter()
+        self._disponibles: Counter = Counter()
+
+    def agregar(
+        self,
+        id: str,
+        categoria_id: Optional[str],
+        categoria_nombre: Optional[str],
+        precio: Dinero,
+        disponible: bool,
+    ) -> None:
+        """Registra un item; si ya estaba, actualiza sus claves (p. ej. sin stock)."""
+        self.quitar(id)
+        claves = (categoria_id, rango_precio(precio), disponible)
+        self._claves[id] = claves
+        if categoria_nombre is not None:
+            self._nombres[categoria_id] = categoria_nombre
+        self._sumar(claves, 1)
+
+    def quitar(self, id: str) -> None:
+        """Saca un item de los conteos (no hace nada si no estaba)."""
+        claves = self._claves.pop(id, None)
+        if claves is not None:
+            self._sumar(claves, -1)
+
+    def _sumar(self, claves: Tuple[Optional[str], int, bool], delta: int) -> None:
+        categoria_id, rango, disponible = claves
+        self._categorias[categoria_id] += delta
+        self._precios[rango] += delta
+        self._disponibles[disponible] += delta
+
+    def totales(self) -> Facetas:
+        """Facetas del catálogo completo, desde los contadores."""
+        return Facetas.desde_conteos(
+            self._categorias, self._nombres, self._precios, self._disponibles
+        )
+
+    def contar(self, ids: Iterable[str]) -> Facetas:
+        """Facetas de un conjunto de resultados (ids ya indexados)."""
+        categorias, precios, disponibles = Counter(), Counter(), Counter()
+        for id in ids:
+            categoria_id, rango, disponible = self._claves[id]
+            categorias[categoria_id] += 1
+            precios[rango] += 1
+            disponibles[disponible] += 1
+        return Facetas.desde_conteos(categorias, self._nombres, precios, disponibles)
+
+    def __len__(self) -> int:
+        return len(self._claves)
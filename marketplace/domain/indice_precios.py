@@ -0,0 +1,120 @@
+"""Índice de precios por categoría para filtros de rango y orden por precio."""
+
+from bisect import bisect_left, bisect_right, insort
+from decimal import Decimal
+from heapq import merge
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+
+from .dinero import Dinero, limites_enteros
+from .exceptions import ValidationError
+
+# (precio en pesos, número del documento): el número desempata precios iguales
+Posicion = Tuple[int, int]
+
+ORDENES_PRECIO = {"precio": False, "-precio": True}  # orden -> descendente
+
+_TODAS = object()  # Grupo que reúne todas las categorías
+
+
+def es_descendente(orden: Optional[str]) -> bool:
+    """
+    Traduce `orden` ("precio" o "-precio") a la dirección del recorrido.
+
+    Raises:
+        ValidationError: Si el orden no es uno de ORDENES_PRECIO.
+    """
+    if orden is None:
+        return False
+    if orden not in ORDENES_PRECIO:
+        raise ValidationError(f"Orden inválido: {orden}. Use 'precio' o '-precio'.")
+    return ORDENES_PRECIO[orden]
+
+
+class IndicePrecios:
+    """
+    Listas ordenadas por (precio, número), agrupadas por categoría y disponibilidad.
+
+    Cada documento vive en dos listas: la de su categoría y la de todas las
+    categorías, separadas según esté disponible o no. Un rango de precios se
+    ubica con búsqueda binaria en cada lista y las listas se recorren en orden
+    con heapq.merge, así una página de k resultados cuesta O(log n + k).
+    Las posiciones son pares de enteros: comparar y ordenar no toca Decimal.
+    El número de un documento se asigna la primera vez que se indexa y no
+    cambia al reindexarlo, por eso (precio, número) sirve de cursor estable.
+    """
+
+    def __init__(self):
+        self._listas: Dict[Tuple[Hashable, bool], List[Posicion]] = {}
+        self._documentos: Dict[int, object] = {}
+        self._numeros: Dict[str, int] = {}
+        self._ubicacion: Dict[str, Tuple[Posicion, Hashable, bool]] = {}
+
+    def agregar(
+        self,
+        id: str,
+        documento: object,
+        precio: Dinero,
+        categoria_id: Optional[str],
+        disponible: bool,
+    ) -> None:
+        """Indexa un documento; si ya estaba, lo reubica (precio, categoría o disponibilidad)."""
+        self.quitar(id)
+        numero = self._numeros.setdefault(id, len(self._numeros))
+        posicion = (int(precio), numero)
+        self._documentos[numero] = documento
+        for grupo in (categoria_id, _TODAS):
+            insort(self._listas.setdefault((grupo, disponible), []), posicion)
+        self._ubicacion[id] = (posicion, categoria_id, disponible)
+
+    def quitar(self, id: str) -> None:
+        """Saca un documento del índice (no hace nada si no estaba)."""
+        ubicacion = self._ubicacion.pop(id, None)
+        if ubicacion is None:
+            return
+        posicion, categoria_id, disponible = ubicacion
+        for grupo in (categoria_id, _TODAS):
+            lista = self._listas[(grupo, disponible)]
+            del lista[bisect_left(lista, posicion)]
+        del self._documentos[posicion[1]]
+
+    def rango(
+        self,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        solo_disponibles: bool = False,
+        descendente: bool = False,
+        despues_de: Optional[Posicion] = None,
+    ) -> Iterator[Tuple[Posicion, object]]:
+        """
+        Recorre en orden de precio los documentos del rango [precio_min, precio_max].
+
+        `categoria_id` None no filtra por categoría. `despues_de` es la posición
+        del último documento ya entregado (cursor): el recorrido sigue desde ahí.
+        Los límites con fracción de peso se redondean hacia adentro.
+        El iterador es perezoso; se debe consumir antes de modificar el índice.
+        """
+        precio_min, precio_max = limites_enteros(precio_min, precio_max)
+        grupo = _TODAS if categoria_id is None else categoria_id
+        estados = (True,) if solo_disponibles else (True, False)
+        recorridos = []
+        for disponible in estados:
+            lista = self._listas.get((grupo, disponible))
+            if not lista:
+                continue
+            inicio = 0 if precio_min is None else bisect_left(lista, (precio_min,))
+            fin = len(lista) if precio_max is None else bisect_left(lista, (precio_max + 1,))
+            if despues_de is not None:
+                if descendente:
+                    fin = min(fin, bisect_left(lista, despues_de))
+                else:
+                    inicio = max(inicio, bisect_right(lista, despues_de))
+            if inicio < fin:
+                indices = range(fin - 1, inicio - 1, -1) if descendente else range(inicio, fin)
+                recorridos.append(map(lista.__getitem__, indices))
+
+        for posicion in merge(*recorridos, reverse=descendente):
+            yield posicion, self._documentos[posicion[1]]
+
+    def __len__(self) -> int:
+        return len(self._ubicacion)
@@ -1,7 +1,9 @@
 """Marketplace - espacio de intercambio en una unidad residencial."""
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+from decimal import Decimal
+from itertools import islice
+from typing import Iterable, List, Optional, TypeVar
 
 from .unidad_residencial import UnidadResidencial
 from .usuario import Usuario
@@ -9,6 +11,41 @@ from .producto import Producto
 from .servicio import Servicio
 from .categoria import Categoria
 from .consulta import Consulta
+from .busqueda import IndiceInvertido
+from .colecciones import ColeccionIndexada
+from .dinero import limites_enteros
+from .indice_precios import IndicePrecios, es_descendente
+from .facetas import Facetas, MotorFacetas
+from .texto import analizar
+
+T = TypeVar("T")
+
+
+def _categoria_id(item) -> Optional[str]:
+    return item.categoria.id if item.categoria else None
+
+
+def _categoria_nombre(item) -> Optional[str]:
+    return item.categoria.nombre if item.categoria else None
+
+
+def _filtrar_precio(
+    items: Iterable[T],
+    precio_min: Optional[Decimal],
+    precio_max: Optional[Decimal],
+    orden: Optional[str],
+) -> List[T]:
+    """Filtra por rango de precio y ordena por precio un conjunto ya reducido."""
+    descendente = es_descendente(orden)
+    precio_min, precio_max = limites_enteros(precio_min, precio_max)
+    resultados = [
+        i for i in items
+        if (precio_min is None or i.precio >= precio_min)
+        and (precio_max is None or i.precio <= precio_max)
+    ]
+    if orden:
+        resultados.sort(key=lambda i: i.precio, reverse=descendente)
+    return resultados
 
 
 @dataclass
@@ -20,53 +57,194 @@ class Marketplace:
     unidad_residencial: UnidadResidencial
     productos: List[Producto] = field(default_factory=list)
     servicios: List[Servicio] = field(default_factory=list)
-    categorias: List[Categoria] = field(default_factory=list)
+    categorias: ColeccionIndexada[Categoria] = field(default_factory=ColeccionIndexada)
     consultas: List[Consulta] = field(default_factory=list)
+    _indice_productos: IndiceInvertido = field(
+        default_factory=IndiceInvertido, init=False, repr=False, compare=False
+    )
+    _indice_servicios: IndiceInvertido = field(
+        default_factory=IndiceInvertido, init=False, repr=False, compare=False
+    )
+    _precios_productos: IndicePrecios = field(
+        default_factory=IndicePrecios, init=False, repr=False, compare=False
+    )
+    _precios_servicios: IndicePrecios = field(
+        default_factory=IndicePrecios, init=False, repr=False, compare=False
+    )
+    _facetas_productos: MotorFacetas = field(
+        default_factory=MotorFacetas, init=False, repr=False, compare=False
+    )
+    _facetas_servicios: MotorFacetas = field(
+        default_factory=MotorFacetas, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        """Indexar los productos y servicios recibidos al construir el marketplace."""
+        if not isinstance(self.categorias, ColeccionIndexada):
+            self.categorias = ColeccionIndexada(self.categorias)
+        for producto in self.productos:
+            self._indice_productos.agregar(producto, producto.terminos)
+            self._reindexar_producto(producto)
+        for servicio in self.servicios:
+            self._indice_servicios.agregar(servicio, servicio.terminos)
+            self._reindexar_servicio(servicio)
+
+    def _reindexar_producto(self, producto: Producto) -> None:
+        """Actualiza índice de precios y facetas tras publicar o cambiar el stock."""
+        categoria_id, disponible = _categoria_id(producto), producto.hay_stock()
+        self._precios_productos.agregar(
+            producto.id, producto, producto.precio, categoria_id, disponible
+        )
+        self._facetas_productos.agregar(
+            producto.id, categoria_id, _categoria_nombre(producto), producto.precio, disponible
+        )
+
+    def _reindexar_servicio(self, servicio: Servicio) -> None:
+        """Actualiza índice de precios y facetas tras publicar o cambiar la disponibilidad."""
+        categoria_id, disponible = _categoria_id(servicio), servicio.disponible
+        self._precios_servicios.agregar(
+            servicio.id, servicio, servicio.precio, categoria_id, disponible
+        )
+        self._facetas_servicios.agregar(
+            servicio.id, categoria_id, _categoria_nombre(servicio), servicio.precio, disponible
+        )
 
     def registrar_categoria(self, categoria: Categoria) -> None:
-        """Registra una categoría en el marketplace."""
-        if categoria not in self.categorias:
-            self.categorias.append(categoria)
+        """Registra una categoría en el marketplace (una sola vez por id)."""
+        self.categorias.agregar(categoria)
+
+    def categoria(self, categoria_id: str) -> Optional[Categoria]:
+        """Categoría registrada por id (None si no existe)."""
+        return self.categorias.get(categoria_id)
 
     def publicar_producto(self, producto: Producto) -> None:
-        """Publica un producto en el marketplace."""
+        """Publica un producto en el marketplace y lo indexa para búsqueda."""
         self.productos.append(producto)
+        self._indice_productos.agregar(producto, producto.terminos)
+        self._reindexar_producto(producto)
 
     def publicar_servicio(self, servicio: Servicio) -> None:
-        """Publica un servicio en el marketplace."""
+        """Publica un servicio en el marketplace y lo indexa para búsqueda."""
         self.servicios.append(servicio)
+        self._indice_servicios.agregar(servicio, servicio.terminos)
+        self._reindexar_servicio(servicio)
+
+    def reducir_stock(self, producto: Producto, cantidad: int) -> None:
+        """Reduce el stock de un producto publicado y actualiza su disponibilidad en el índice."""
+        producto.reducir_stock(cantidad)
+        self._reindexar_producto(producto)
+
+    def cambiar_disponibilidad(self, servicio: Servicio, disponible: bool) -> None:
+        """Marca un servicio publicado como disponible o no disponible."""
+        if disponible:
+            servicio.marcar_disponible()
+        else:
+            servicio.marcar_no_disponible()
+        self._reindexar_servicio(servicio)
 
     def registrar_consulta(self, consulta: Consulta) -> None:
         """Registra una consulta en el marketplace."""
         self.consultas.append(consulta)
 
     def buscar_productos(
-        self, categoria: Optional[Categoria] = None, texto: Optional[str] = None
+        self,
+        categoria: Optional[Categoria] = None,
+        texto: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        orden: Optional[str] = None,
+        solo_con_stock: bool = False,
+        limite: Optional[int] = None,
     ) -> List[Producto]:
-        """Busca productos por categoría o texto."""
-        resultados = self.productos.copy()
+        """
+        Busca productos por categoría, texto o rango de precio.
+
+        El texto se resuelve con el índice invertido: cada palabra de la consulta
+        debe aparecer (como prefijo de algún término) en el nombre o la descripción.
+        Tildes, mayúsculas y plurales no afectan la coincidencia; un texto hecho
+        solo de stopwords ("el", "de la") no encuentra nada.
+        Sin texto, el rango de precio y `orden` ("precio" o "-precio") se
+        resuelven con el índice de precios por categoría sin recorrer el catálogo.
+        """
+        if not texto and (precio_min is not None or precio_max is not None or orden):
+            return self._por_precio(
+                self._precios_productos, categoria, precio_min, precio_max, orden,
+                solo_con_stock, limite,
+            )
+
+        if texto:
+            resultados = self._indice_productos.buscar(analizar(texto))
+        else:
+            resultados = self.productos.copy()
         if categoria:
             resultados = [p for p in resultados if p.categoria == categoria]
-        if texto:
-            texto_lower = texto.lower()
-            resultados = [
-                p
-                for p in resultados
-                if texto_lower in (p.nombre or "").lower()
-                or texto_lower in (p.descripcion or "").lower()
-            ]
-        return resultados
+        if solo_con_stock:
+            resultados = [p for p in resultados if p.hay_stock()]
+        resultados = _filtrar_precio(resultados, precio_min, precio_max, orden)
+        return resultados if limite is None else resultados[:limite]
 
     def buscar_servicios(
-        self, categoria: Optional[Categoria] = None, solo_disponibles: bool = True
+        self,
+        categoria: Optional[Categoria] = None,
+        solo_disponibles: bool = True,
+        texto: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        orden: Optional[str] = None,
+        limite: Optional[int] = None,
     ) -> List[Servicio]:
-        """Busca servicios por categoría y disponibilidad."""
-        resultados = self.servicios.copy()
+        """Busca servicios por categoría, disponibilidad, texto o rango de precio."""
+        if not texto and (precio_min is not None or precio_max is not None or orden):
+            return self._por_precio(
+                self._precios_servicios, categoria, precio_min, precio_max, orden,
+                solo_disponibles, limite,
+            )
+
+        if texto:
+            resultados = self._indice_servicios.buscar(analizar(texto))
+        else:
+            resultados = self.servicios.copy()
         if categoria:
             resultados = [s for s in resultados if s.categoria == categoria]
         if solo_disponibles:
             resultados = [s for s in resultados if s.disponible]
-        return resultados
+        resultados = _filtrar_precio(resultados, precio_min, precio_max, orden)
+        return resultados if limite is None else resultados[:limite]
+
+    def facetas_productos(self, resultados: Optional[Iterable[Producto]] = None) -> Facetas:
+        """
+        Conteos por categoría, rango de precio y disponibilidad de un resultado
+        de búsqueda, o de todo el catálogo si no se pasa `resultados`.
+        """
+        if resultados is None:
+            return self._facetas_productos.totales()
+        return self._facetas_productos.contar(p.id for p in resultados)
+
+    def facetas_servicios(self, resultados: Optional[Iterable[Servicio]] = None) -> Facetas:
+        """Como facetas_productos, para servicios."""
+        if resultados is None:
+            return self._facetas_servicios.totales()
+        return self._facetas_servicios.contar(s.id for s in resultados)
+
+    @staticmethod
+    def _por_precio(
+        indice: IndicePrecios,
+        categoria: Optional[Categoria],
+        precio_min: Optional[Decimal],
+        precio_max: Optional[Decimal],
+        orden: Optional[str],
+        solo_disponibles: bool,
+        limite: Optional[int],
+    ) -> list:
+        """Consulta el índice de precios y toma solo los primeros `limite` resultados."""
+        recorrido = indice.rango(
+            categoria_id=categoria.id if categoria else None,
+            precio_min=precio_min,
+            precio_max=precio_max,
+            solo_disponibles=solo_disponibles,
+            descendente=es_descendente(orden),
+        )
+        return [item for _, item in islice(recorrido, limite)]
 
     def __str__(self) -> str:
         return f"Marketplace '{self.nombre}' - {len(self.productos)} productos, {len(self.servicios)} servicios"
@@ -1,87 +1,83 @@
 """Producto - artículo físico en venta con validaciones de negocio."""
 
 from dataclasses import dataclass, field
-from decimal import Decimal
-from typing import Optional, List
+from datetime import datetime
+from typing import Optional, Tuple
 
 from .usuario import Usuario
 from .categoria import Categoria
+from .dinero import Dinero
 from .exceptions import ValidationError
+from .texto import analizar
+from .validadores import (
+    validar_id, validar_precio, validar_stock, validar_texto, validar_texto_opcional,
+)
 
 
-@dataclass
+@dataclass(slots=True)
 class Producto:
     """
     Artículo físico que se puede vender en el marketplace.
     
     Validaciones de negocio:
     - Nombre: 5-100 caracteres
-    - Precio: > 0, tipo Decimal para precisión monetaria
+    - Precio: > 0, en pesos enteros (Dinero)
     - Stock: >= 0
     - Descripción: 10-500 caracteres (opcional)
-    - Imágenes: máximo 10 URLs
+    - Imágenes: máximo 10 URLs (se guardan como tupla)
+
+    `terminos` guarda nombre y descripción ya analizados (sin tildes, stopwords
+    ni plurales) para que la búsqueda no normalice el texto en cada consulta.
+    Se calcula la primera vez que se pide, así las entidades rehidratadas que
+    nunca pasan por el índice de búsqueda no pagan el análisis.
+
+    La clase usa `slots=True` (sin `__dict__` por instancia): con cientos de
+    miles de publicaciones en memoria el ahorro por objeto es lo que más pesa.
     """
 
     id: str
     nombre: str
-    precio: Decimal
+    precio: Dinero
     vendedor: Usuario
     descripcion: Optional[str] = None
     stock: int = 1
     categoria: Optional[Categoria] = None
-    imagenes: List[str] = field(default_factory=list)
+    imagenes: Tuple[str, ...] = ()
+    fecha_publicacion: datetime = field(default_factory=datetime.now)
+    _terminos: Optional[Tuple[str, ...]] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         """Validar invariantes de negocio."""
-        # Validar ID
-        if not self.id or not self.id.strip():
-            raise ValidationError("El ID del producto no puede estar vacío.")
-
-        # Validar nombre
-        if not self.nombre or not self.nombre.strip():
-            raise ValidationError("El nombre del producto no puede estar vacío.")
-        
-        nombre_limpio = self.nombre.strip()
-        if len(nombre_limpio) < 5:
-            raise ValidationError("El nombre del producto debe tener al menos 5 caracteres.")
-        if len(nombre_limpio) > 100:
-            raise ValidationError("El nombre del producto no puede exceder 100 caracteres.")
-        
-        self.nombre = nombre_limpio
-
-        # Validar precio (convertir a Decimal si es necesario)
-        if isinstance(self.precio, (int, float)):
-            self.precio = Decimal(str(self.precio))
-        
-        if not isinstance(self.precio, Decimal):
-            raise ValidationError("El precio debe ser un número Decimal.")
-        
-        if self.precio <= 0:
-            raise ValidationError(f"El precio debe ser mayor a 0. Recibido: {self.precio}")
-
-        # Validar stock
-        if not isinstance(self.stock, int):
-            raise ValidationError("El stock debe ser un número entero.")
-        
-        if self.stock < 0:
-            raise ValidationError(f"El stock no puede ser negativo. Recibido: {self.stock}")
-
-        # Validar descripción (opcional)
-        if self.descripcion is not None:
-            desc_limpia = self.descripcion.strip()
-            if len(desc_limpia) < 10:
-                raise ValidationError("La descripción debe tener al menos 10 caracteres.")
-            if len(desc_limpia) > 500:
-                raise ValidationError("La descripción no puede exceder 500 caracteres.")
-            
-            self.descripcion = desc_limpia
+        validar_id(self.id, "El ID del producto no puede estar vacío.")
+        self.nombre = validar_texto(
+            self.nombre, 5, 100,
+            vacio="El nombre del producto no puede estar vacío.",
+            corto="El nombre del producto debe tener al menos 5 caracteres.",
+            largo="El nombre del producto no puede exceder 100 caracteres.",
+        )
+        self.precio = validar_precio(self.precio)
+        self.stock = validar_stock(self.stock)
+        self.descripcion = validar_texto_opcional(
+            self.descripcion, 500,
+            largo="La descripción no puede exceder 500 caracteres.",
+            minimo=10,
+            corto="La descripción debe tener al menos 10 caracteres.",
+        )
 
         # Validar imágenes
+        self.imagenes = tuple(self.imagenes)
         if len(self.imagenes) > 10:
             raise ValidationError(f"Máximo 10 imágenes permitidas. Recibido: {len(self.imagenes)}")
 
+    @property
+    def terminos(self) -> Tuple[str, ...]:
+        """Nombre y descripción analizados para el índice de búsqueda."""
+        if self._terminos is None:
+            self._terminos = tuple(analizar(self.nombre) + analizar(self.descripcion))
+        return self._terminos
+
     def __str__(self) -> str:
-        return f"{self.nombre} - ${self.precio:,.2f}"
+        return f"{self.nombre} - {self.precio.formato()}"
 
     def hay_stock(self) -> bool:
         """Verifica si hay disponibilidad."""
@@ -94,12 +90,23 @@ class Producto:
         Raises:
             ValidationError: Si no hay suficiente stock.
         """
-        if cantidad <= 0:
-            raise ValidationError("La cantidad debe ser mayor a 0.")
-        
-        if self.stock < cantidad:
-            raise ValidationError(
-                f"Stock insuficiente. Disponible: {self.stock}, Solicitado: {cantidad}"
-            )
-        
-        self.stock -= cantidad
+        self.stock = descontar_stock(self.stock, cantidad)
+
+
+def descontar_stock(stock: int, cantidad: int) -> int:
+    """
+    Stock que queda al descontar `cantidad` de `stock`, sin tocar ninguna
+    entidad: sirve para calcular el valor nuevo de un compare-and-set.
+
+    Raises:
+        ValidationError: Si la cantidad no es positiva o no hay suficiente stock.
+    """
+    if cantidad <= 0:
+        raise ValidationError("La cantidad debe ser mayor a 0.")
+
+    if stock < cantidad:
+        raise ValidationError(
+            f"Stock insuficiente. Disponible: {stock}, Solicitado: {cantidad}"
+        )
+
+    return stock - cantidad
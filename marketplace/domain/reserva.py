@@ -0,0 +1,84 @@
+"""Reserva - stock apartado para un comprador mientras avanza una consulta."""
+
+import heapq
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional, Tuple
+
+from .exceptions import ValidationError
+from .validadores import validar_id
+
+
+class EstadoReserva(Enum):
+    """Estados posibles de una reserva."""
+
+    ACTIVA = "activa"            # El stock está apartado hasta `vence`
+    CONFIRMADA = "confirmada"    # La venta se concretó: el stock no vuelve
+    LIBERADA = "liberada"        # Se canceló antes de vencer: el stock volvió
+    VENCIDA = "vencida"          # Venció sin confirmarse: el stock volvió
+
+
+@dataclass(slots=True)
+class Reserva:
+    """
+    Apartado de `cantidad` unidades de un producto para una consulta.
+
+    Reservar descuenta el stock en el momento (así dos compradores nunca
+    apartan la misma unidad); confirmar lo deja descontado y liberar o
+    vencer lo devuelve. Solo una reserva ACTIVA cambia de estado.
+    """
+
+    id: str
+    consulta_id: str
+    producto_id: str
+    cantidad: int
+    vence: datetime
+    estado: EstadoReserva = EstadoReserva.ACTIVA
+
+    def __post_init__(self):
+        """Validar invariantes de negocio."""
+        validar_id(self.id, "El ID de la reserva no puede estar vacío.")
+        if not isinstance(self.cantidad, int) or self.cantidad <= 0:
+            raise ValidationError("La cantidad reservada debe ser un entero mayor a 0.")
+
+    @property
+    def activa(self) -> bool:
+        return self.estado is EstadoReserva.ACTIVA
+
+    def vencida(self, ahora: datetime) -> bool:
+        return self.activa and self.vence <= ahora
+
+    def __str__(self) -> str:
+        return f"Reserva #{self.id} - {self.cantidad} x {self.producto_id} [{self.estado.value}]"
+
+
+class ColaVencimientos:
+    """
+    Montículo (heap) de vencimientos: (vence, id) ordenados por fecha.
+
+    Agregar cuesta O(log n) y sacar lo vencido O(k log n) para k vencidos, sin
+    recorrer las reservas vigentes. Las reservas confirmadas o liberadas no se
+    sacan del montículo (borrado perezoso): al vencer su turno se descartan
+    porque ya no están activas.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, str]] = []
+
+    def agregar(self, id: str, vence: datetime) -> None:
+        heapq.heappush(self._heap, (vence, id))
+
+    def vencidos(self, ahora: datetime) -> List[str]:
+        """Saca y retorna los ids cuyo vencimiento es anterior o igual a `ahora`."""
+        ids = []
+        while self._heap and self._heap[0][0] <= ahora:
+            ids.append(heapq.heappop(self._heap)[1])
+        return ids
+
+    def proximo(self) -> Optional[datetime]:
+        """Fecha del próximo vencimiento (None si no hay)."""
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -1,74 +1,67 @@
 """Servicio ofrecido por residentes con validaciones de negocio."""
 
-from dataclasses import dataclass
-from decimal import Decimal
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
 
 from .usuario import Usuario
 from .categoria import Categoria
-from .exceptions import ValidationError
+from .dinero import Dinero
+from .texto import analizar
+from .validadores import validar_id, validar_precio, validar_texto, validar_texto_opcional
 
 
-@dataclass
+@dataclass(slots=True)
 class Servicio:
     """
     Servicio que un residente ofrece a otros en el marketplace.
     
     Validaciones de negocio:
     - Nombre: 5-100 caracteres
-    - Precio: > 0, tipo Decimal para precisión monetaria
+    - Precio: > 0, en pesos enteros (Dinero)
     - Descripción: 10-500 caracteres (opcional)
+
+    `terminos` guarda nombre y descripción ya analizados (sin tildes, stopwords
+    ni plurales) para que la búsqueda no normalice el texto en cada consulta.
+    Se calcula la primera vez que se pide, así las entidades rehidratadas que
+    nunca pasan por el índice de búsqueda no pagan el análisis.
     """
 
     id: str
     nombre: str
-    precio: Decimal
+    precio: Dinero
     proveedor: Usuario
     descripcion: Optional[str] = None
     disponible: bool = True
     categoria: Optional[Categoria] = None
+    _terminos: Optional[Tuple[str, ...]] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         """Validar invariantes de negocio."""
-        # Validar ID
-        if not self.id or not self.id.strip():
-            raise ValidationError("El ID del servicio no puede estar vacío.")
-
-        # Validar nombre
-        if not self.nombre or not self.nombre.strip():
-            raise ValidationError("El nombre del servicio no puede estar vacío.")
-        
-        nombre_limpio = self.nombre.strip()
-        if len(nombre_limpio) < 5:
-            raise ValidationError("El nombre del servicio debe tener al menos 5 caracteres.")
-        if len(nombre_limpio) > 100:
-            raise ValidationError("El nombre del servicio no puede exceder 100 caracteres.")
-        
-        self.nombre = nombre_limpio
-
-        # Validar precio (convertir a Decimal si es necesario)
-        if isinstance(self.precio, (int, float)):
-            self.precio = Decimal(str(self.precio))
-        
-        if not isinstance(self.precio, Decimal):
-            raise ValidationError("El precio debe ser un número Decimal.")
-        
-        if self.precio <= 0:
-            raise ValidationError(f"El precio debe ser mayor a 0. Recibido: {self.precio}")
+        validar_id(self.id, "El ID del servicio no puede estar vacío.")
+        self.nombre = validar_texto(
+            self.nombre, 5, 100,
+            vacio="El nombre del servicio no puede estar vacío.",
+            corto="El nombre del servicio debe tener al menos 5 caracteres.",
+            largo="El nombre del servicio no puede exceder 100 caracteres.",
+        )
+        self.precio = validar_precio(self.precio)
+        self.descripcion = validar_texto_opcional(
+            self.descripcion, 500,
+            largo="La descripción no puede exceder 500 caracteres.",
+            minimo=10,
+            corto="La descripción debe tener al menos 10 caracteres.",
+        )
 
-        # Validar descripción (opcional)
-        if self.descripcion is not None:
-            desc_limpia = self.descripcion.strip()
-            if len(desc_limpia) < 10:
-                raise ValidationError("La descripción debe tener al menos 10 caracteres.")
-            if len(desc_limpia) > 500:
-                raise ValidationError("La descripción no puede exceder 500 caracteres.")
-            
-            self.descripcion = desc_limpia
+    @property
+    def terminos(self) -> Tuple[str, ...]:
+        """Nombre y descripción analizados para el índice de búsqueda."""
+        if self._terminos is None:
+            self._terminos = tuple(analizar(self.nombre) + analizar(self.descripcion))
+        return self._terminos
 
     def __str__(self) -> str:
         estado = "Disponible" if self.disponible else "No disponible"
-        return f"{self.nombre} - ${self.precio:,.2f} [{estado}]"
+        return f"{self.nombre} - {self.precio.formato()} [{estado}]"
 
     def marcar_no_disponible(self) -> None:
         """Marca el servicio como no disponible."""
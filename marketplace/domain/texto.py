@@ -0,0 +1,68 @@
+"""Análisis de texto en español: normalización, stopwords y stemming ligero."""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+_TOKEN_RE = re.compile(r"\w+")
+
+STOPWORDS_ES = frozenset({
+    "a", "al", "ante", "con", "de", "del", "desde", "e", "el", "en", "entre",
+    "es", "esta", "este", "estos", "hasta", "la", "las", "le", "lo", "los",
+    "mas", "me", "mi", "muy", "no", "o", "para", "pero", "por", "que", "se",
+    "sin", "sobre", "su", "sus", "tu", "u", "un", "una", "unas", "unos", "y", "ya",
+})
+
+# Consonantes tras las que el plural español agrega "es" (motor -> motores).
+# Tras ellas la "e" final del singular que queda al quitar la "s" se descarta
+# también, así singular y plural comparten raíz aunque el singular ya termine
+# en "e" (masaje/masajes -> masaj, flor/flores -> flor). Solo cuentan precedidas
+# de vocal: tras un grupo consonántico (mueble, nombre, calle, grande) la "e"
+# es parte de la raíz.
+_PLURAL_ES = frozenset("rlndj")
+_VOCALES = frozenset("aeiou")
+
+
+def normalizar(texto: Optional[str]) -> str:
+    """Aplica NFKD, elimina tildes/diacríticos y pasa a minúsculas (casefold)."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return sin_tildes.casefold()
+
+
+def stem(termino: str) -> str:
+    """
+    Stemming ligero: reduce plurales regulares a singular (sillas -> silla).
+
+    >>> [stem(t) for t in ("flores", "camiones", "paredes", "sillas")]
+    ['flor', 'camion', 'pared', 'silla']
+    >>> [stem(t) for t in ("flor", "flores", "reloj", "relojes")]
+    ['flor', 'flor', 'reloj', 'reloj']
+    >>> [stem(t) for t in ("masaje", "masajes", "viaje", "viajes")]
+    ['masaj', 'masaj', 'viaj', 'viaj']
+    >>> [stem(t) for t in ("muebles", "nombres", "calles", "grandes")]
+    ['mueble', 'nombre', 'calle', 'grande']
+    >>> stem("muebles") == stem("mueble")
+    True
+    """
+    if len(termino) > 3 and termino.endswith("s") and not termino.endswith("ss"):
+        termino = termino[:-1]
+    if (
+        len(termino) > 3 and termino.endswith("e")
+        and termino[-2] in _PLURAL_ES and termino[-3] in _VOCALES
+    ):
+        termino = termino[:-1]
+    return termino
+
+
+def analizar(texto: Optional[str]) -> List[str]:
+    """
+    Convierte un texto en términos de búsqueda.
+
+    "Las ELECTRÓNICAS" y "electronica" producen el mismo término: "electronica".
+    """
+    return [
+        stem(token)
+        for token in _TOKEN_RE.findall(normalizar(texto))
+        if token not in STOPWORDS_ES
+    ]
@@ -1,10 +1,20 @@
 """Unidad Residencial con validaciones de negocio."""
 
 from dataclasses import dataclass, field
-from typing import Optional, List
+from typing import Iterable, List, Optional
 
+from .colecciones import ColeccionIndexada
 from .usuario import Usuario
 from .exceptions import ValidationError
+from .validadores import validar_id, validar_texto
+
+
+def nuevos_residentes(usuarios: Iterable[Usuario] = ()) -> ColeccionIndexada[Usuario]:
+    """Colección de residentes indexada por email y apartamento."""
+    return ColeccionIndexada(
+        usuarios,
+        indices={"email": lambda u: u.email, "apartamento": lambda u: u.apartamento},
+    )
 
 
 @dataclass
@@ -15,43 +25,34 @@ class UnidadResidencial:
     Validaciones de negocio:
     - Nombre: 3-100 caracteres, no vacío
     - Dirección: 10-200 caracteres, no vacía
+
+    Los residentes viven en una ColeccionIndexada (por id, email y
+    apartamento), así registrar miles de residentes sigue siendo lineal.
     """
 
     id: str
     nombre: str
     direccion: str
-    residentes: List[Usuario] = field(default_factory=list)
+    residentes: ColeccionIndexada[Usuario] = field(default_factory=nuevos_residentes)
     marketplace: Optional["Marketplace"] = None
 
     def __post_init__(self):
         """Validar invariantes de negocio."""
-        # Validar ID
-        if not self.id or not self.id.strip():
-            raise ValidationError("El ID de la unidad residencial no puede estar vacío.")
-
-        # Validar nombre
-        if not self.nombre or not self.nombre.strip():
-            raise ValidationError("El nombre de la unidad residencial no puede estar vacío.")
-        
-        nombre_limpio = self.nombre.strip()
-        if len(nombre_limpio) < 3:
-            raise ValidationError("El nombre debe tener al menos 3 caracteres.")
-        if len(nombre_limpio) > 100:
-            raise ValidationError("El nombre no puede exceder 100 caracteres.")
-        
-        self.nombre = nombre_limpio
-
-        # Validar dirección
-        if not self.direccion or not self.direccion.strip():
-            raise ValidationError("La dirección no puede estar vacía.")
-        
-        dir_limpia = self.direccion.strip()
-        if len(dir_limpia) < 10:
-            raise ValidationError("La dirección debe tener al menos 10 caracteres.")
-        if len(dir_limpia) > 200:
-            raise ValidationError("La dirección no puede exceder 200 caracteres.")
-        
-        self.direccion = dir_limpia
+        validar_id(self.id, "El ID de la unidad residencial no puede estar vacío.")
+        self.nombre = validar_texto(
+            self.nombre, 3, 100,
+            vacio="El nombre de la unidad residencial no puede estar vacío.",
+            corto="El nombre debe tener al menos 3 caracteres.",
+            largo="El nombre no puede exceder 100 caracteres.",
+        )
+        self.direccion = validar_texto(
+            self.direccion, 10, 200,
+            vacio="La dirección no puede estar vacía.",
+            corto="La dirección debe tener al menos 10 caracteres.",
+            largo="La dirección no puede exceder 200 caracteres.",
+        )
+        if not isinstance(self.residentes, ColeccionIndexada):
+            self.residentes = nuevos_residentes(self.residentes)
 
     def crear_marketplace(self, nombre: str) -> "Marketplace":
         """Crea el marketplace asociado a esta unidad."""
@@ -67,10 +68,21 @@ class UnidadResidencial:
         Raises:
             ValidationError: Si el usuario ya está registrado.
         """
-        if usuario in self.residentes:
+        if not self.residentes.agregar(usuario):
             raise ValidationError(f"El usuario {usuario.nombre} ya está registrado en esta unidad.")
-        
-        self.residentes.append(usuario)
+
+    def residente(self, usuario_id: str) -> Optional[Usuario]:
+        """Residente por id (None si no vive en la unidad)."""
+        return self.residentes.get(usuario_id)
+
+    def residente_por_email(self, email: str) -> Optional[Usuario]:
+        """Residente por email, sin distinguir mayúsculas (None si no hay)."""
+        encontrados = self.residentes.buscar("email", email.strip().lower())
+        return encontrados[0] if encontrados else None
+
+    def residentes_de_apartamento(self, apartamento: str) -> List[Usuario]:
+        """Residentes registrados en un apartamento, en orden de registro."""
+        return self.residentes.buscar("apartamento", apartamento.strip())
 
     def __str__(self) -> str:
         return f"{self.nombre} - {len(self.residentes)} residentes"
@@ -0,0 +1,167 @@
+"""
+Validadores compartidos por las entidades del dominio.
+
+Cada validador revisa y normaliza un campo en una sola pasada (un solo strip,
+una sola medición) y lanza ValidationError con el mensaje que recibe, así cada
+entidad conserva sus mensajes. Los patrones se compilan una vez al importar.
+
+`construir_confiable` es el camino sin validación para datos que ya pasaron
+por estas reglas: filas leídas del almacén o entidades armadas por un builder
+que aplica reglas más estrictas que las de la entidad.
+"""
+
+import re
+from dataclasses import MISSING, fields
+from typing import Any, Callable, Dict, Optional, Type, TypeVar
+
+from .dinero import Dinero
+from .exceptions import ValidationError
+
+T = TypeVar("T")
+
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_NO_DIGITOS_RE = re.compile(r'\D')
+
+
+def validar_id(valor: str, vacio: str) -> str:
+    """El id no puede estar vacío ni ser solo espacios; se conserva tal cual."""
+    if not valor or valor.isspace():
+        raise ValidationError(vacio)
+    return valor
+
+
+def validar_texto(valor: str, minimo: int, maximo: int, vacio: str, corto: str, largo: str) -> str:
+    """Texto requerido: sin espacios en los extremos y con largo entre minimo y maximo."""
+    limpio = valor.strip() if valor else ""
+    if not limpio:
+        raise ValidationError(vacio)
+    largo_actual = len(limpio)
+    if largo_actual < minimo:
+        raise ValidationError(corto)
+    if largo_actual > maximo:
+        raise ValidationError(largo)
+    return limpio
+
+
+def validar_texto_opcional(
+    valor: Optional[str],
+    maximo: int,
+    largo: str,
+    minimo: int = 0,
+    corto: str = "",
+    vacio_a_none: bool = False,
+) -> Optional[str]:
+    """
+    Texto opcional: None pasa sin cambios. Con `vacio_a_none` un texto en
+    blanco se guarda como None; si no, cuenta para el mínimo.
+    """
+    if valor is None:
+        return None
+    limpio = valor.strip()
+    if not limpio and vacio_a_none:
+        return None
+    largo_actual = len(limpio)
+    if largo_actual < minimo:
+        raise ValidationError(corto)
+    if largo_actual > maximo:
+        raise ValidationError(largo)
+    return limpio
+
+
+def validar_email(valor: str) -> str:
+    """Email con formato válido, normalizado a minúsculas."""
+    limpio = valor.strip() if valor else ""
+    if not limpio:
+        raise ValidationError("El email no puede estar vacío.")
+    if not _EMAIL_RE.match(limpio):
+        raise ValidationError(f"Email inválido: {valor}")
+    return normalizar_email(limpio)
+
+
+def validar_telefono(valor: Optional[str]) -> Optional[str]:
+    """Teléfono opcional de 10 dígitos; se guardan solo los dígitos."""
+    if valor is None:
+        return None
+    digitos = normalizar_telefono(valor)
+    if len(digitos) != 10:
+        raise ValidationError(
+            f"El teléfono debe tener exactamente 10 dígitos. Recibido: {valor.strip()}"
+        )
+    return digitos
+
+
+def normalizar_email(valor: str) -> str:
+    """Forma con la que se guarda y se busca un email (sin validar el formato)."""
+    return valor.strip().lower()
+
+
+def normalizar_telefono(valor: str) -> str:
+    """Forma con la que se guarda y se busca un teléfono: solo los dígitos."""
+    return _NO_DIGITOS_RE.sub('', valor)
+
+
+def validar_precio(valor: Any) -> Dinero:
+    """Precio positivo en pesos enteros; enteros, Decimal y flotantes se convierten a Dinero."""
+    precio = Dinero(valor)
+    if precio <= 0:
+        raise ValidationError(f"El precio debe ser mayor a 0. Recibido: {precio}")
+    return precio
+
+
+def validar_stock(valor: Any) -> int:
+    """Stock entero y no negativo."""
+    if not isinstance(valor, int):
+        raise ValidationError("El stock debe ser un número entero.")
+    if valor < 0:
+        raise ValidationError(f"El stock no puede ser negativo. Recibido: {valor}")
+    return valor
+
+
+def _generar_constructor(cls: type) -> Callable[..., Any]:
+    """
+    Genera (como hace dataclasses con `__init__`) una función que crea la
+    instancia con `object.__new__` y asigna cada campo sin validar. Los campos
+    con `default_factory` usan un centinela para llamar la fábrica solo si se
+    omiten; los que no tienen default son obligatorios.
+    """
+    entorno: Dict[str, Any] = {"_nuevo": object.__new__, "_cls": cls, "_FALTA": _FALTA}
+    parametros, asignaciones = [], []
+    for f in fields(cls):
+        if f.default is not MISSING:
+            entorno[f"_d_{f.name}"] = f.default
+            parametros.append(f"{f.name}=_d_{f.name}")
+        elif f.default_factory is not MISSING:
+            entorno[f"_f_{f.name}"] = f.default_factory
+            parametros.append(f"{f.name}=_FALTA")
+            asignaciones.append(f"    if {f.name} is _FALTA: {f.name} = _f_{f.name}()")
+        else:
+            parametros.append(f.name)
+        asignaciones.append(f"    e.{f.name} = {f.name}")
+    # Los obligatorios primero: todos los argumentos llegan por nombre
+    parametros.sort(key=lambda p: "=" in p)
+    codigo = "def _construir(*, {}):\n    e = _nuevo(_cls)\n{}\n    return e".format(
+        ", ".join(parametros), "\n".join(asignaciones)
+    )
+    exec(codigo, entorno)
+    return entorno["_construir"]
+
+
+_FALTA = object()
+_CONSTRUCTORES: Dict[type, Callable[..., Any]] = {}
+
+
+def construir_confiable(cls: Type[T], **valores: Any) -> T:
+    """
+    Instancia una entidad sin ejecutar `__init__` ni `__post_init__`.
+
+    Solo para datos ya validados y normalizados: los campos omitidos toman su
+    valor por defecto. No repite validaciones ni normalizaciones, por eso
+    cargar un catálogo persistido no paga la validación completa por fila.
+
+    Raises:
+        TypeError: Si falta un campo sin valor por defecto o sobra uno desconocido.
+    """
+    constructor = _CONSTRUCTORES.get(cls)
+    if constructor is None:
+        constructor = _CONSTRUCTORES[cls] = _generar_constructor(cls)
+    return constructor(**valores)
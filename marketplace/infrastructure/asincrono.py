@@ -0,0 +1,66 @@
+"""
+Camino asíncrono sobre repositorios y servicios síncronos.
+
+Las vistas asíncronas corren en el event loop: una espera (long polling) no
+ocupa un hilo. Lo que sí bloquea (SQLite, un notifier que hace E/S) corre en
+un pool acotado de hilos compartido por todo el proceso, así la cantidad de
+hilos (y de conexiones SQLite, que son por hilo) no crece con los pedidos.
+
+Los repositorios en memoria no hacen E/S: sus lecturas `a*` corren en el
+loop y toman el lock de lectores-escritor (de threading) ahí mismo, así que
+esperan, bloqueando el loop, a lo sumo lo que dure una escritura en curso. Las
+escrituras `a*` siempre van al pool: esperar a los lectores, reindexar y
+notificar a los observadores no ocurre en el loop.
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, TypeVar
+
+R = TypeVar("R")
+
+_EJECUTOR = ThreadPoolExecutor(thread_name_prefix="marketplace-es")
+
+
+async def en_hilo(funcion: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Corre `funcion` en el pool de E/S (con las contextvars del llamador) y espera su resultado."""
+    loop = asyncio.get_running_loop()
+    contexto = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _EJECUTOR, functools.partial(contexto.run, funcion, *args, **kwargs)
+    )
+
+
+class RepositorioAsincrono:
+    """
+    Variantes asíncronas (`aget`, `aget_many`, `aadd`, `aadd_many`,
+    `alist_page`) de las operaciones de un repositorio.
+
+    Con `_bloqueante` (el valor por defecto) cada operación corre en el pool
+    de E/S; los repositorios en memoria lo apagan y sus lecturas corren en el
+    loop. Las escrituras corren en el pool siempre.
+    """
+
+    _bloqueante = True
+
+    async def _acorrer(self, funcion: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        if self._bloqueante:
+            return await en_hilo(funcion, *args, **kwargs)
+        return funcion(*args, **kwargs)
+
+    async def aget(self, id: str) -> Optional[Any]:
+        return await self._acorrer(self.get, id)
+
+    async def aget_many(self, ids: Iterable[str]) -> Dict[str, Any]:
+        return await self._acorrer(self.get_many, list(ids))
+
+    async def aadd(self, entidad: Any) -> None:
+        await en_hilo(self.add, entidad)
+
+    async def aadd_many(self, entidades: Iterable[Any]) -> None:
+        await en_hilo(self.add_many, list(entidades))
+
+    async def alist_page(self, cursor: Optional[str] = None, limit: int = 50, **filtros: Any):
+        return await self._acorrer(self.list_page, cursor, limit, **filtros)
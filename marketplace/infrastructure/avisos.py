@@ -0,0 +1,78 @@
+"""
+Avisos en proceso para esperas asíncronas (long polling).
+
+Un cliente del buzón espera consultas nuevas sin ocupar un hilo: se suscribe
+a una clave (el id del vendedor) y espera un asyncio.Event. Quien registra
+una consulta publica la clave desde cualquier hilo y el aviso llega al loop
+de cada suscriptor con `call_soon_threadsafe`.
+
+Los avisos viven en el proceso, como las versiones de colecciones: con varios
+procesos, un suscriptor se entera de lo publicado por otro solo al vencer su
+espera y volver a consultar.
+"""
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set
+
+
+class Suscripcion:
+    """Espera de un suscriptor; se crea dentro del loop que va a esperar."""
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._evento = asyncio.Event()
+
+    def _avisar(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._evento.set)
+        except RuntimeError:
+            pass  # El loop del suscriptor ya se cerró
+
+    async def esperar(self, timeout: float) -> bool:
+        """True si llegó un aviso (desde la suscripción), False si venció `timeout`."""
+        try:
+            await asyncio.wait_for(self._evento.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+class AvisosAsincronos:
+    """
+    Registro de suscripciones por clave, seguro entre hilos.
+
+    Para no perder avisos, el suscriptor se suscribe antes de consultar el
+    repositorio: lo que se publique entre la consulta y la espera ya queda
+    marcado en su evento.
+    """
+
+    def __init__(self):
+        self._suscripciones: Dict[str, Set[Suscripcion]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def suscripcion(self, clave: str) -> Iterator[Suscripcion]:
+        suscripcion = Suscripcion()
+        with self._lock:
+            self._suscripciones.setdefault(clave, set()).add(suscripcion)
+        try:
+            yield suscripcion
+        finally:
+            with self._lock:
+                suscriptores = self._suscripciones.get(clave)
+                suscriptores.discard(suscripcion)
+                if not suscriptores:
+                    del self._suscripciones[clave]
+
+    def publicar(self, clave: str) -> None:
+        """Despierta a los suscriptores de `clave`; no bloquea ni falla si no hay ninguno."""
+        with self._lock:
+            suscriptores = list(self._suscripciones.get(clave, ()))
+        for suscripcion in suscriptores:
+            suscripcion._avisar()
+
+    def suscriptores(self, clave: str) -> int:
+        with self._lock:
+            return len(self._suscripciones.get(clave, ()))
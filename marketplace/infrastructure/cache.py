@@ -0,0 +1,249 @@
+"""
+Caché de lectura (read-through) delante de cualquier repositorio.
+
+Publicar busca vendedor y categoría, y registrar una consulta busca comprador
+e item: con SQLite esas lecturas por id dominan el costo. RepositorioCacheado
+envuelve un repositorio sin que los servicios lo noten: `get`/`get_many` pasan
+por un LRU acotado (con vencimiento opcional) y las escrituras invalidan las
+claves que tocan. El resto de los métodos se delega tal cual. Las variantes
+asíncronas también pasan por la caché: un acierto no salta al pool de E/S.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Métodos que cambian una entidad identificada por su primer argumento
+_ESCRITURAS_POR_ID = frozenset({
+    "comparar_y_fijar_stock", "comparar_y_fijar_estado", "fijar_disponibilidad",
+})
+
+
+@dataclass(frozen=True)
+class EstadisticasCache:
+    """Contadores de una caché desde su creación."""
+
+    aciertos: int
+    fallos: int
+    tamano: int
+
+    @property
+    def tasa_aciertos(self) -> float:
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else 0.0
+
+
+class RepositorioCacheado(Generic[T]):
+    """
+    Repositorio con caché LRU de hasta `tamano` entidades por id.
+
+    Con `ttl` (segundos) una entrada vence aunque nadie la invalide: es la cota
+    de desactualización para lo que cambia por fuera de este proceso o de este
+    repositorio (p. ej. el vendedor embebido en un producto cacheado).
+
+    Las escrituras (`add`, `add_many`, los compare-and-set y lo que notifiquen
+    los observadores del repositorio envuelto) sacan sus claves de la caché; no
+    la llenan, porque la transacción podría revertirse. Una lectura que empezó
+    antes de una escritura no guarda su resultado (contador de generación), así
+    que un valor viejo no vuelve a entrar después de invalidado.
+    """
+
+    def __init__(
+        self,
+        repo: Any,
+        tamano: int = 1024,
+        ttl: Optional[float] = None,
+        reloj: Callable[[], float] = time.monotonic,
+    ):
+        self.repo = repo
+        self.tamano = tamano
+        self.ttl = ttl
+        self.reloj = reloj
+        self._entradas: "OrderedDict[str, Tuple[T, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._aciertos = 0
+        self._fallos = 0
+        self._local = threading.local()  # Ids escritos dentro de una transacción
+        if hasattr(repo, "suscribir"):
+            repo.suscribir(lambda entidad: self.invalidar((entidad.id,)))
+
+    # ------------------------------------------------------------------
+    # Lecturas
+    # ------------------------------------------------------------------
+
+    def get(self, id: str) -> Optional[T]:
+        with self._lock:
+            entidad = self._buscar(id)
+            generacion = self._generacion
+        if entidad is not None:
+            return entidad
+        entidad = self.repo.get(id)
+        if entidad is not None:
+            self._llenar({id: entidad}, generacion)
+        return entidad
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, T]:
+        """Sirve de la caché lo que haya y pide el resto en una sola llamada."""
+        encontradas, faltantes, generacion = self._separar(ids)
+        if faltantes:
+            leidas = self.repo.get_many(faltantes)
+            self._llenar(leidas, generacion)
+            encontradas.update(leidas)
+        return encontradas
+
+    async def aget(self, id: str) -> Optional[T]:
+        with self._lock:
+            entidad = self._buscar(id)
+            generacion = self._generacion
+        if entidad is not None:
+            return entidad
+        entidad = await self.repo.aget(id)
+        if entidad is not None:
+            self._llenar({id: entidad}, generacion)
+        return entidad
+
+    async def aget_many(self, ids: Iterable[str]) -> Dict[str, T]:
+        encontradas, faltantes, generacion = self._separar(ids)
+        if faltantes:
+            leidas = await self.repo.aget_many(faltantes)
+            self._llenar(leidas, generacion)
+            encontradas.update(leidas)
+        return encontradas
+
+    def _separar(self, ids: Iterable[str]) -> Tuple[Dict[str, T], List[str], int]:
+        """Lo que está en caché, los ids que faltan y la generación de la lectura."""
+        encontradas: Dict[str, T] = {}
+        faltantes: List[str] = []
+        with self._lock:
+            for id in ids:
+                entidad = self._buscar(id)
+                if entidad is None:
+                    faltantes.append(id)
+                else:
+                    encontradas[id] = entidad
+            return encontradas, faltantes, self._generacion
+
+    def _buscar(self, id: str) -> Optional[T]:
+        """Entrada vigente o None; cuenta acierto/fallo. Corre con el lock tomado."""
+        entrada = self._entradas.get(id)
+        if entrada is not None and (self.ttl is None or entrada[1] > self.reloj()):
+            self._entradas.move_to_end(id)
+            self._aciertos += 1
+            return entrada[0]
+        if entrada is not None:
+            del self._entradas[id]
+        self._fallos += 1
+        return None
+
+    def _llenar(self, entidades: Dict[str, T], generacion: int) -> None:
+        vence = self.reloj() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            if generacion != self._generacion:
+                return  # Hubo escrituras mientras se leía: lo leído puede ser viejo
+            for id, entidad in entidades.items():
+                self._entradas[id] = (entidad, vence)
+                self._entradas.move_to_end(id)
+            while len(self._entradas) > self.tamano:
+                self._entradas.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Escrituras
+    # ------------------------------------------------------------------
+
+    def add(self, entidad: T):
+        self.add_many((entidad,))
+
+    def add_many(self, entidades: Iterable[T]):
+        entidades = list(entidades)
+        ids = [e.id for e in entidades]
+        self.invalidar(ids)
+        try:
+            self.repo.add_many(entidades)
+        finally:
+            self.invalidar(ids)
+
+    async def aadd(self, entidad: T):
+        await self.aadd_many((entidad,))
+
+    async def aadd_many(self, entidades: Iterable[T]):
+        entidades = list(entidades)
+        ids = [e.id for e in entidades]
+        self.invalidar(ids)
+        try:
+            await self.repo.aadd_many(entidades)
+        finally:
+            self.invalidar(ids)
+
+    def invalidar(self, ids: Optional[Iterable[str]] = None) -> None:
+        """Saca esos ids de la caché (todos si no se indican)."""
+        ids = None if ids is None else list(ids)
+        with self._lock:
+            self._generacion += 1
+            if ids is None:
+                self._entradas.clear()
+            else:
+                for id in ids:
+                    self._entradas.pop(id, None)
+        escritos = getattr(self._local, "escritos", None)
+        if escritos is not None:
+            if ids is None:
+                escritos.add(None)
+            else:
+                escritos.update(ids)
+
+    @contextmanager
+    def _registrar_escrituras(self):
+        """Junta los ids escritos por este hilo y los invalida al terminar la transacción."""
+        if getattr(self._local, "escritos", None) is not None:
+            yield  # Transacción anidada: la externa invalida
+            return
+        self._local.escritos = escritos = set()
+        try:
+            yield
+        finally:
+            self._local.escritos = None
+            if escritos:
+                self.invalidar(None if None in escritos else escritos)
+
+    def estadisticas(self) -> EstadisticasCache:
+        with self._lock:
+            return EstadisticasCache(self._aciertos, self._fallos, len(self._entradas))
+
+    def __getattr__(self, nombre: str) -> Any:
+        atributo = getattr(self.repo, nombre)
+        if nombre not in _ESCRITURAS_POR_ID:
+            return atributo
+
+        def escribir(id: str, *args, **kwargs):
+            self.invalidar((id,))
+            try:
+                return atributo(id, *args, **kwargs)
+            finally:
+                self.invalidar((id,))
+        return escribir
+
+
+def transaccion_con_cache(
+    transaccion: Callable[[], ContextManager], caches: Iterable[RepositorioCacheado]
+) -> Callable[[], ContextManager]:
+    """
+    Envuelve la unidad de trabajo para que, al confirmarse o revertirse, las
+    cachés vuelvan a invalidar lo escrito en ella: un lector de otro hilo pudo
+    cachear el valor anterior mientras la transacción seguía abierta.
+    """
+    caches = list(caches)
+
+    @contextmanager
+    def unidad_de_trabajo():
+        with ExitStack() as pila:
+            for cache in caches:
+                pila.enter_context(cache._registrar_escrituras())
+            with transaccion():
+                yield
+    return unidad_de_trabajo
@@ -0,0 +1,282 @@
+"""
+Catálogo columnar de productos para reportes y filtros masivos.
+
+Guarda una fila por producto en arreglos NumPy (precio en COP enteros, stock,
+código de categoría y de vendedor, disponibilidad y fecha de publicación), así
+filtros, agrupaciones y agregados se resuelven vectorizados en vez de recorrer
+objetos Python. Se mantiene al día suscribiéndose al repositorio de productos.
+
+Es una biblioteca: ninguna vista ni servicio lo construye todavía (ver
+benchmarks/catalogo_columnar.py). La suscripción solo ve las escrituras del
+proceso, así que con SQLite y varios workers cada catálogo vería solo las suyas.
+
+NumPy es opcional: solo este módulo lo necesita (ver requirements.txt).
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependencia opcional
+    np = None
+
+from ..domain.exceptions import ValidationError
+from ..domain.producto import Producto
+
+_SIN_CATEGORIA = -1
+
+AGRUPACIONES = ("categoria", "vendedor")
+VALORES = ("precio", "stock")
+AGREGADOS = ("conteo", "suma", "promedio", "minimo", "maximo")
+
+
+class Codificador:
+    """Asigna a cada id (categoría o vendedor) un código entero estable."""
+
+    def __init__(self):
+        self._codigos: Dict[str, int] = {}
+        self.ids: List[str] = []
+
+    def codigo(self, id: str) -> int:
+        codigo = self._codigos.get(id)
+        if codigo is None:
+            codigo = self._codigos[id] = len(self.ids)
+            self.ids.append(id)
+        return codigo
+
+    def buscar(self, id: str) -> Optional[int]:
+        return self._codigos.get(id)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class CatalogoColumnar:
+    """
+    Vista columnar del catálogo de productos.
+
+    `aplicar` inserta o actualiza la fila de un producto (O(1) amortizado: los
+    arreglos duplican su capacidad al llenarse). Las consultas trabajan sobre
+    las primeras `len(self)` filas con operaciones vectorizadas:
+    `filtrar` retorna una máscara booleana, que `agrupar`, `total` e `ids_de`
+    aceptan para restringir el cálculo. Una máscara cubre las filas que había
+    al filtrar: las insertadas después no entran en ese cálculo.
+    """
+
+    def __init__(self, capacidad: int = 1024):
+        if np is None:
+            raise ImportError("CatalogoColumnar requiere numpy: pip install numpy")
+        self._lock = threading.RLock()
+        self._filas: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.categorias = Codificador()
+        self.vendedores = Codificador()
+        self._columnas = {
+            "precio": np.zeros(capacidad, dtype=np.int64),
+            "stock": np.zeros(capacidad, dtype=np.int64),
+            "categoria": np.full(capacidad, _SIN_CATEGORIA, dtype=np.int32),
+            "vendedor": np.zeros(capacidad, dtype=np.int32),
+            "disponible": np.zeros(capacidad, dtype=bool),
+            "publicado": np.zeros(capacidad, dtype=np.int64),  # Segundos desde epoch
+        }
+
+    @classmethod
+    def desde_repositorio(cls, producto_repo) -> "CatalogoColumnar":
+        """Carga los productos del repositorio y se suscribe a sus altas y cambios."""
+        catalogo = cls()
+        catalogo.cargar(producto_repo.list_all())
+        producto_repo.suscribir(catalogo.aplicar)
+        return catalogo
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+    # ------------------------------------------------------------------
+
+    def _valores(self, producto: Producto) -> tuple:
+        categoria = producto.categoria
+        return (
+            int(producto.precio),
+            producto.stock,
+            self.categorias.codigo(categoria.id) if categoria else _SIN_CATEGORIA,
+            self.vendedores.codigo(producto.vendedor.id),
+            producto.stock > 0,
+            int(producto.fecha_publicacion.timestamp()),
+        )
+
+    def _reservar(self, filas: int) -> None:
+        capacidad = len(self._columnas["precio"])
+        if filas <= capacidad:
+            return
+        while capacidad < filas:
+            capacidad *= 2
+        for nombre, columna in self._columnas.items():
+            nueva = np.full(capacidad, _SIN_CATEGORIA, dtype=columna.dtype) \
+                if nombre == "categoria" else np.zeros(capacidad, dtype=columna.dtype)
+            nueva[:len(self.ids)] = columna[:len(self.ids)]
+            self._columnas[nombre] = nueva
+
+    def aplicar(self, producto: Producto) -> None:
+        """Inserta o actualiza la fila del producto (observador del repositorio)."""
+        with self._lock:
+            fila = self._filas.get(producto.id)
+            if fila is None:
+                fila = len(self.ids)
+                self._reservar(fila + 1)
+                self._filas[producto.id] = fila
+                self.ids.append(producto.id)
+            for columna, valor in zip(self._columnas.values(), self._valores(producto)):
+                columna[fila] = valor
+
+    def cargar(self, productos: Iterable[Producto]) -> None:
+        """Carga masiva: los productos nuevos se escriben con una asignación por columna."""
+        with self._lock:
+            nuevos: Dict[str, tuple] = {}
+            for producto in productos:
+                if producto.id in self._filas:
+                    self.aplicar(producto)
+                else:
+                    nuevos[producto.id] = self._valores(producto)
+            if not nuevos:
+                return
+            inicio = len(self.ids)
+            self._reservar(inicio + len(nuevos))
+            for columna, valores in zip(self._columnas.values(), zip(*nuevos.values())):
+                columna[inicio:inicio + len(nuevos)] = valores
+            for fila, id in enumerate(nuevos, start=inicio):
+                self._filas[id] = fila
+            self.ids.extend(nuevos)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def columna(self, nombre: str) -> "np.ndarray":
+        """Copia de una columna (solo las filas ocupadas)."""
+        with self._lock:
+            return self._columnas[nombre][:len(self.ids)].copy()
+
+    def filtrar(
+        self,
+        categoria_id: Optional[str] = None,
+        vendedor_id: Optional[str] = None,
+        precio_min: Optional[int] = None,
+        precio_max: Optional[int] = None,
+        solo_disponibles: bool = False,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+    ) -> "np.ndarray":
+        """
+        Máscara booleana de las filas que cumplen todos los filtros dados.
+        Las fechas filtran la publicación en [desde, hasta).
+        """
+        with self._lock:
+            n = len(self.ids)
+            c = {nombre: columna[:n] for nombre, columna in self._columnas.items()}
+            mascara = np.ones(n, dtype=bool)
+            if categoria_id is not None:
+                codigo = self.categorias.buscar(categoria_id)
+                mascara &= c["categoria"] == (-2 if codigo is None else codigo)
+            if vendedor_id is not None:
+                codigo = self.vendedores.buscar(vendedor_id)
+                mascara &= c["vendedor"] == (-1 if codigo is None else codigo)
+            if precio_min is not None:
+                mascara &= c["precio"] >= precio_min
+            if precio_max is not None:
+                mascara &= c["precio"] <= precio_max
+            if solo_disponibles:
+                mascara &= c["disponible"]
+            if desde is not None:
+                mascara &= c["publicado"] >= int(desde.timestamp())
+            if hasta is not None:
+                mascara &= c["publicado"] < int(hasta.timestamp())
+            return mascara
+
+    def ids_de(self, mascara: "np.ndarray") -> List[str]:
+        """Ids de los productos seleccionados por una máscara de `filtrar`."""
+        with self._lock:
+            return [self.ids[i] for i in np.flatnonzero(mascara)]
+
+    def agrupar(
+        self,
+        por: str = "categoria",
+        valor: str = "precio",
+        agregado: str = "promedio",
+        mascara: Optional["np.ndarray"] = None,
+    ) -> Dict[Optional[str], float]:
+        """
+        Agrega `valor` por categoría o vendedor: {id: resultado}, solo grupos no vacíos.
+        Los productos sin categoría quedan bajo la clave None.
+
+        Raises:
+            ValidationError: Si la agrupación, el valor o el agregado no existen.
+        """
+        if por not in AGRUPACIONES or valor not in VALORES or agregado not in AGREGADOS:
+            raise ValidationError(
+                f"Agrupación inválida: por={por}, valor={valor}, agregado={agregado}."
+            )
+        with self._lock:
+            n = len(self.ids) if mascara is None else len(mascara)
+            codigos = self._columnas[por][:n]
+            valores = self._columnas[valor][:n]
+            claves = list(self.categorias.ids if por == "categoria" else self.vendedores.ids)
+        if mascara is not None:
+            codigos, valores = codigos[mascara], valores[mascara]
+        if por == "categoria":
+            codigos = codigos + 1  # El código -1 (sin categoría) pasa a la posición 0
+            claves = [None] + claves
+        grupos = len(claves)
+
+        conteos = np.bincount(codigos, minlength=grupos)
+        if agregado == "conteo":
+            resultado = conteos
+        elif agregado in ("suma", "promedio"):
+            resultado = np.bincount(codigos, weights=valores, minlength=grupos)
+            if agregado == "promedio":
+                resultado = np.divide(resultado, conteos, out=np.zeros(grupos), where=conteos > 0)
+            else:
+                resultado = resultado.astype(np.int64)
+        else:
+            extremo = np.minimum if agregado == "minimo" else np.maximum
+            orden = np.argsort(codigos, kind="stable")
+            ordenados = codigos[orden]
+            inicios = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]]) \
+                if len(ordenados) else np.array([], dtype=np.intp)
+            resultado = np.zeros(grupos, dtype=valores.dtype)
+            if len(inicios):
+                resultado[ordenados[inicios]] = extremo.reduceat(valores[orden], inicios)
+
+        return {claves[i]: resultado[i].item() for i in np.flatnonzero(conteos)}
+
+    def total(
+        self, valor: str = "stock", agregado: str = "suma", mascara: Optional["np.ndarray"] = None
+    ) -> float:
+        """Agregado de una columna sobre todo el catálogo (o las filas de la máscara)."""
+        if valor not in VALORES or agregado not in AGREGADOS:
+            raise ValidationError(f"Agregado inválido: valor={valor}, agregado={agregado}.")
+        with self._lock:
+            n = len(self.ids) if mascara is None else len(mascara)
+            valores = self._columnas[valor][:n]
+        if mascara is not None:
+            valores = valores[mascara]
+        if agregado == "conteo":
+            return int(len(valores))
+        if not len(valores):
+            return 0
+        funciones = {"suma": np.sum, "promedio": np.mean, "minimo": np.min, "maximo": np.max}
+        return funciones[agregado](valores).item()
+
+    # Reportes frecuentes del panel de administración
+
+    def precio_promedio_por_categoria(self) -> Dict[Optional[str], float]:
+        return self.agrupar("categoria", "precio", "promedio")
+
+    def stock_por_categoria(self) -> Dict[Optional[str], int]:
+        return self.agrupar("categoria", "stock", "suma")
+
+    def publicaciones_por_vendedor(self) -> Dict[str, int]:
+        return self.agrupar("vendedor", "precio", "conteo")
+
+    def __len__(self) -> int:
+        return len(self.ids)
@@ -0,0 +1,83 @@
+"""
+Primitivas de concurrencia para los repositorios en memoria.
+
+Los repositorios se comparten entre los hilos de un servidor WSGI/ASGI con
+varios workers por proceso: las lecturas (muchas) no deben esperarse entre sí
+y las escrituras (pocas) deben ser atómicas respecto de las lecturas.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Hashable, List
+
+
+class LockLectorEscritor:
+    """
+    Varios lectores a la vez o un solo escritor.
+
+    Da preferencia a los escritores: cuando uno espera, los lectores nuevos
+    aguardan a que termine, así un flujo constante de lecturas no lo deja sin
+    turno. El escritor puede volver a tomar el lock de escritura o leer dentro
+    de su propia escritura (reentrante para el hilo que escribe); un lector no
+    puede pasar a escritor.
+    """
+
+    def __init__(self):
+        self._condicion = threading.Condition(threading.Lock())
+        self._lectores = 0
+        self._escritores_esperando = 0
+        self._escritor = None  # Hilo que tiene el lock de escritura
+        self._profundidad = 0
+
+    @contextmanager
+    def lectura(self):
+        if self._escritor == threading.get_ident():
+            yield  # Lectura dentro de la propia escritura
+            return
+        with self._condicion:
+            while self._escritor is not None or self._escritores_esperando:
+                self._condicion.wait()
+            self._lectores += 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._lectores -= 1
+                if not self._lectores:
+                    self._condicion.notify_all()
+
+    @contextmanager
+    def escritura(self):
+        hilo = threading.get_ident()
+        with self._condicion:
+            if self._escritor != hilo:
+                self._escritores_esperando += 1
+                try:
+                    while self._escritor is not None or self._lectores:
+                        self._condicion.wait()
+                finally:
+                    self._escritores_esperando -= 1
+                self._escritor = hilo
+            self._profundidad += 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._profundidad -= 1
+                if not self._profundidad:
+                    self._escritor = None
+                    self._condicion.notify_all()
+
+
+class LocksPorClave:
+    """
+    Locks repartidos por clave (striping): operaciones sobre claves distintas
+    rara vez se bloquean entre sí y la memoria no crece con la cantidad de
+    claves. Dos claves pueden compartir lock, nunca al revés.
+    """
+
+    def __init__(self, cantidad: int = 64):
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(cantidad)]
+
+    def para(self, clave: Hashable) -> threading.Lock:
+        return self._locks[hash(clave) % len(self._locks)]
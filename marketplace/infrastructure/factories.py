@@ -1,6 +1,111 @@
+import secrets
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Optional
+
+from .cache import RepositorioCacheado, transaccion_con_cache
 from .notifier import ConsoleNotifier
+from .outbox import InMemoryOutboxRepository
+from .repositories import (
+    InMemoryUsuarioRepository,
+    InMemoryUnidadResidencialRepository,
+    InMemoryCategoriaRepository,
+    InMemoryProductoRepository,
+    InMemoryServicioRepository,
+    InMemoryConsultaRepository,
+    InMemoryReservaRepository,
+)
+from .sqlite_repositories import (
+    SQLiteDatabase,
+    SQLiteUsuarioRepository,
+    SQLiteUnidadResidencialRepository,
+    SQLiteCategoriaRepository,
+    SQLiteProductoRepository,
+    SQLiteServicioRepository,
+    SQLiteConsultaRepository,
+    SQLiteReservaRepository,
+    SQLiteOutboxRepository,
+    SQLiteVersionesColecciones,
+)
+from .versiones import VersionesColecciones
 
 class NotifierFactory:
     @staticmethod
     def create():
         return ConsoleNotifier()
+
+
+@dataclass(frozen=True)
+class Repositorios:
+    """
+    Conjunto de repositorios que comparten un mismo almacén.
+    `unidad_de_trabajo()` agrupa escrituras de varios repositorios en una
+    sola transacción (en memoria no hay nada que confirmar). `versiones`
+    valida las cachés de listados: con SQLite vive en la base y la comparten
+    todos los procesos.
+    """
+    usuarios: Any
+    unidades: Any
+    categorias: Any
+    productos: Any
+    servicios: Any
+    consultas: Any
+    reservas: Any
+    outbox: Any
+    unidad_de_trabajo: Callable[[], ContextManager]
+    versiones: Any
+
+
+class RepositoryFactory:
+    @staticmethod
+    def create(
+        ruta_sqlite: Optional[str] = None,
+        tamano_cache: int = 1024,
+        ttl_cache: Optional[float] = 60.0
+    ) -> Repositorios:
+        """
+        Repositorios SQLite si se indica un archivo; en memoria en otro caso.
+
+        Con SQLite, las lecturas por id de usuarios, categorías, productos y
+        servicios pasan por una caché LRU de `tamano_cache` entidades (0 la
+        desactiva); `ttl_cache` acota cuánto puede quedar desactualizada una
+        entidad relacionada (p. ej. el vendedor embebido en un producto).
+        """
+        if not ruta_sqlite:
+            return Repositorios(
+                usuarios=InMemoryUsuarioRepository(),
+                unidades=InMemoryUnidadResidencialRepository(),
+                categorias=InMemoryCategoriaRepository(),
+                productos=InMemoryProductoRepository(),
+                servicios=InMemoryServicioRepository(),
+                consultas=InMemoryConsultaRepository(),
+                reservas=InMemoryReservaRepository(),
+                outbox=InMemoryOutboxRepository(),
+                unidad_de_trabajo=nullcontext,
+                # Un `inicial` aleatorio: un ETag de antes de reiniciar no coincide por casualidad
+                versiones=VersionesColecciones(inicial=secrets.randbits(32)),
+            )
+
+        db = SQLiteDatabase(ruta_sqlite)
+        cacheados = {
+            "usuarios": SQLiteUsuarioRepository(db),
+            "categorias": SQLiteCategoriaRepository(db),
+            "productos": SQLiteProductoRepository(db),
+            "servicios": SQLiteServicioRepository(db),
+        }
+        unidad_de_trabajo = db.transaccion
+        if tamano_cache > 0:
+            cacheados = {
+                nombre: RepositorioCacheado(repo, tamano=tamano_cache, ttl=ttl_cache)
+                for nombre, repo in cacheados.items()
+            }
+            unidad_de_trabajo = transaccion_con_cache(db.transaccion, cacheados.values())
+        return Repositorios(
+            unidades=SQLiteUnidadResidencialRepository(db),
+            consultas=SQLiteConsultaRepository(db),
+            reservas=SQLiteReservaRepository(db),
+            outbox=SQLiteOutboxRepository(db),
+            unidad_de_trabajo=unidad_de_trabajo,
+            versiones=SQLiteVersionesColecciones(db),
+            **cacheados,
+        )
@@ -0,0 +1,111 @@
+"""
+Lectura incremental de archivos de importación (CSV y NDJSON).
+
+Los lectores son generadores: leen una fila a la vez del archivo abierto, así la
+memoria no depende del tamaño del archivo. Las filas que no se pueden leer se
+entregan con `error` para que el importador las reporte como rechazadas.
+"""
+
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, List, Optional, TextIO, TypeVar
+
+T = TypeVar("T")
+
+# Bytes que no son UTF-8 válido, tal como los deja `surrogateescape`
+_BYTES_INVALIDOS_RE = re.compile("[\udc80-\udcff]")
+_ERROR_CODIFICACION = "La línea no está codificada en UTF-8."
+
+
+@dataclass(frozen=True)
+class FilaImportacion:
+    """Fila leída de un archivo: número de línea y datos, o el error de lectura."""
+    linea: int
+    datos: Optional[dict] = None
+    error: Optional[str] = None
+
+
+def abrir_texto(binario: BinaryIO) -> TextIO:
+    """
+    Abre un archivo binario como stream de texto UTF-8 (con o sin BOM).
+
+    Un byte inválido no corta la lectura a mitad de la importación: queda
+    marcado y los lectores rechazan solo la fila que lo contiene.
+    """
+    return io.TextIOWrapper(binario, encoding="utf-8-sig", errors="surrogateescape", newline="")
+
+
+def _mal_codificado(*textos: Optional[str]) -> bool:
+    return any(isinstance(t, str) and _BYTES_INVALIDOS_RE.search(t) for t in textos)
+
+
+def _limpiar(datos: dict) -> dict:
+    """Quita espacios y convierte celdas vacías en None."""
+    limpios = {}
+    for clave, valor in datos.items():
+        if clave is None:
+            continue  # Celdas sobrantes de una fila CSV más larga que el encabezado
+        if isinstance(valor, str):
+            valor = valor.strip() or None
+        limpios[clave.strip()] = valor
+    return limpios
+
+
+def leer_csv(archivo: TextIO) -> Iterator[FilaImportacion]:
+    """
+    Lee un CSV con encabezado; la línea 1 es el encabezado.
+
+    Un registro que el módulo csv no puede leer (p. ej. un campo más largo que
+    csv.field_size_limit(), a veces por una comilla sin cerrar) se entrega con
+    `error` y la lectura sigue con el registro siguiente.
+    """
+    lector = csv.DictReader(archivo)
+    while True:
+        linea = lector.line_num + 1  # Primera línea del registro (line_num no avanza si falla)
+        try:
+            datos = next(lector)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield FilaImportacion(linea=linea, error=f"CSV inválido: {e}.")
+            continue
+        if _mal_codificado(*datos.values()):
+            yield FilaImportacion(linea=lector.line_num, error=_ERROR_CODIFICACION)
+            continue
+        yield FilaImportacion(linea=lector.line_num, datos=_limpiar(datos))
+
+
+def leer_ndjson(archivo: TextIO) -> Iterator[FilaImportacion]:
+    """Lee un objeto JSON por línea; las líneas vacías se ignoran."""
+    for linea, texto in enumerate(archivo, start=1):
+        if not texto.strip():
+            continue
+        if _mal_codificado(texto):
+            yield FilaImportacion(linea=linea, error=_ERROR_CODIFICACION)
+            continue
+        try:
+            datos = json.loads(texto)
+        except ValueError:
+            yield FilaImportacion(linea=linea, error="JSON inválido.")
+            continue
+        if not isinstance(datos, dict):
+            yield FilaImportacion(linea=linea, error="Cada línea debe ser un objeto JSON.")
+            continue
+        yield FilaImportacion(linea=linea, datos=_limpiar(datos))
+
+
+LECTORES = {"csv": leer_csv, "ndjson": leer_ndjson}
+
+
+def en_lotes(elementos: Iterable[T], tamano: int) -> Iterator[List[T]]:
+    """Agrupa un iterable en listas de hasta `tamano` elementos, sin materializarlo."""
+    iterador = iter(elementos)
+    while True:
+        lote = list(islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
@@ -1,10 +1,22 @@
 from abc import ABC, abstractmethod
+from typing import Iterable, Tuple
+
+from .asincrono import en_hilo
 
 class Notifier(ABC):
     @abstractmethod
     def notify_listing_created(self, phone, title):
         pass
 
+    def notify_batch(self, eventos: Iterable[Tuple[str, str]]):
+        """Envía un lote de (phone, title). Los backends con API de lotes pueden sobrescribirlo."""
+        for phone, title in eventos:
+            self.notify_listing_created(phone, title)
+
+    async def anotify_batch(self, eventos: Iterable[Tuple[str, str]]):
+        """notify_batch para llamadores asíncronos: el envío corre en el pool de E/S."""
+        await en_hilo(self.notify_batch, list(eventos))
+
 class ConsoleNotifier(Notifier):
     def notify_listing_created(self, phone, title):
         print(f"[NOTIFY] {phone} -> Publicación creada: {title}")
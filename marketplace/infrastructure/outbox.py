@@ -0,0 +1,249 @@
+"""
+Outbox transaccional para eventos de publicación.
+
+Los servicios guardan el evento en el outbox dentro de la misma unidad de trabajo
+que la entidad publicada; OutboxRelay lo entrega después al Notifier, en lotes.
+Un evento solo se borra del outbox cuando el notifier confirmó su entrega, así
+que la entrega es al-menos-una-vez aun si el proceso cae entre ambos pasos. Un
+evento que falla `max_intentos` veces queda apartado (sigue en el outbox,
+pero ya no se reintenta) para que no frene a los que vienen detrás.
+
+Con varios procesos (un relay por worker) cada relay reclama su lote por un
+tiempo acotado antes de entregarlo: los demás no lo toman mientras el
+reclamo esté vigente, y si el relay cae el reclamo vence y otro lo retoma.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .notifier import Notifier
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EventoOutbox:
+    """Evento pendiente de notificar."""
+
+    id: str
+    tipo: str
+    destino: Optional[str]  # Teléfono del vendedor/proveedor
+    titulo: str
+    creado: datetime = field(default_factory=datetime.now)
+    intentos: int = 0
+
+    @classmethod
+    def publicacion_creada(cls, destino: Optional[str], titulo: str) -> "EventoOutbox":
+        return cls(id=str(uuid.uuid4()), tipo="publicacion_creada", destino=destino, titulo=titulo)
+
+
+@dataclass(frozen=True)
+class EstadisticasRelay:
+    """Contadores de un relay desde su creación."""
+
+    entregados: int
+    fallidos: int  # Entregas fallidas (un evento cuenta una vez por intento)
+    apartados: int
+    lotes: int
+    segundos: float
+
+    @property
+    def entregados_por_segundo(self) -> float:
+        return self.entregados / self.segundos if self.segundos else 0.0
+
+
+class InMemoryOutboxRepository:
+    """
+    Outbox en memoria: los pendientes se conservan en orden de llegada.
+    Los hilos de las peticiones escriben mientras el relay lee: un lock
+    protege los diccionarios. Los entregados se descartan.
+    """
+
+    def __init__(self):
+        self.db: Dict[str, EventoOutbox] = {}
+        self._pendientes: Dict[str, EventoOutbox] = {}
+        self._reclamos: Dict[str, Tuple[Optional[str], float]] = {}  # id → (dueño, hasta)
+        self._lock = threading.Lock()
+
+    def add(self, evento: EventoOutbox):
+        self.add_many((evento,))
+
+    def add_many(self, eventos: Iterable[EventoOutbox]):
+        with self._lock:
+            for evento in eventos:
+                self.db[evento.id] = evento
+                self._pendientes[evento.id] = evento
+
+    def pendientes(self, limit: int = 100, max_intentos: Optional[int] = None) -> List[EventoOutbox]:
+        """Pendientes en orden de llegada; con `max_intentos`, sin los apartados."""
+        with self._lock:
+            eventos = self._pendientes.values()
+            if max_intentos is not None:
+                eventos = (e for e in eventos if e.intentos < max_intentos)
+            return list(islice(eventos, limit))
+
+    def reclamar(
+        self, dueno: str, limit: int = 100, max_intentos: Optional[int] = None, duracion: float = 60.0
+    ) -> List[EventoOutbox]:
+        """Reserva para `dueno`, por `duracion` segundos, hasta `limit` pendientes libres."""
+        ahora = time.time()
+        reclamados: List[EventoOutbox] = []
+        with self._lock:
+            for evento in self._pendientes.values():
+                if len(reclamados) == limit:
+                    break
+                if max_intentos is not None and evento.intentos >= max_intentos:
+                    continue
+                if self._reclamos.get(evento.id, (None, 0.0))[1] > ahora:
+                    continue
+                self._reclamos[evento.id] = (dueno, ahora + duracion)
+                reclamados.append(evento)
+        return reclamados
+
+    def marcar_entregados(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for id in ids:
+                self._pendientes.pop(id, None)
+                self._reclamos.pop(id, None)
+                self.db.pop(id, None)
+
+    def registrar_fallo(self, ids: Iterable[str], espera: float = 0.0) -> None:
+        """Suma un intento y libera el reclamo; el evento vuelve a estar libre en `espera` segundos."""
+        libre_desde = time.time() + espera
+        with self._lock:
+            for id in ids:
+                if id in self._pendientes:
+                    self._pendientes[id].intentos += 1
+                    self._reclamos[id] = (None, libre_desde)
+
+
+class OutboxRelay:
+    """
+    Drena el outbox hacia el notifier en lotes de `tamano_lote`.
+
+    `drenar()` procesa lo pendiente en el hilo actual; `iniciar()` lo repite cada
+    `intervalo` segundos en un hilo de fondo. Cada lote se reclama por
+    `duracion_reclamo` segundos, así dos relays (de distintos procesos) no
+    entregan los mismos eventos. Si un lote falla, sus eventos se reintentan
+    de a uno: los que vuelven a fallar quedan pendientes (con `intentos`
+    incrementado) y libres recién después de `espera_reintento * 2**intentos`
+    segundos; al llegar a `max_intentos` se apartan.
+
+    Reemplaza al despachador en segundo plano: `estadisticas()` da los
+    contadores de entrega y el throughput desde que se creó el relay.
+    """
+
+    def __init__(
+        self,
+        outbox_repo,
+        notifier: Notifier,
+        tamano_lote: int = 100,
+        intervalo: float = 1.0,
+        max_intentos: int = 5,
+        duracion_reclamo: float = 60.0,
+        espera_reintento: float = 1.0,
+    ):
+        self.outbox_repo = outbox_repo
+        self.notifier = notifier
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.max_intentos = max_intentos
+        self.duracion_reclamo = duracion_reclamo
+        self.espera_reintento = espera_reintento
+        self._dueno = uuid.uuid4().hex  # Identifica los reclamos de este relay
+        self._parar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()  # Un solo drenado a la vez por proceso
+        self._lock_contadores = threading.Lock()
+        self._entregados = self._fallidos = self._apartados = self._lotes = 0
+        self._inicio = time.monotonic()
+
+    def drenar(self) -> int:
+        """Entrega los eventos pendientes. Retorna cuántos se entregaron."""
+        entregados = 0
+        with self._lock:
+            while True:
+                lote = self.outbox_repo.reclamar(
+                    self._dueno, self.tamano_lote, self.max_intentos, self.duracion_reclamo
+                )
+                if not lote:
+                    break
+                enviados, fallidos = self._entregar(lote)
+                self.outbox_repo.marcar_entregados(e.id for e in enviados)
+                entregados += len(enviados)
+                with self._lock_contadores:
+                    self._lotes += 1
+                    self._entregados += len(enviados)
+                    self._fallidos += len(fallidos)
+                for evento in fallidos:
+                    self._registrar_fallo(evento)
+                if len(lote) < self.tamano_lote:
+                    break
+        return entregados
+
+    def _entregar(self, lote: List[EventoOutbox]) -> Tuple[List[EventoOutbox], List[EventoOutbox]]:
+        """Entrega el lote; si falla, reintenta de a un evento. Retorna (enviados, fallidos)."""
+        try:
+            self.notifier.notify_batch([(e.destino, e.titulo) for e in lote])
+            return lote, []
+        except Exception:
+            logger.warning("Falló la entrega de un lote de %d eventos; se reintenta de a uno", len(lote))
+        enviados, fallidos = [], []
+        for evento in lote:
+            try:
+                self.notifier.notify_batch([(evento.destino, evento.titulo)])
+            except Exception:
+                logger.exception("Falló la entrega del evento %s del outbox", evento.id)
+                fallidos.append(evento)
+            else:
+                enviados.append(evento)
+        return enviados, fallidos
+
+    def _registrar_fallo(self, evento: EventoOutbox) -> None:
+        intentos = evento.intentos + 1  # El repositorio en memoria actualiza este mismo objeto
+        self.outbox_repo.registrar_fallo((evento.id,), self.espera_reintento * 2 ** evento.intentos)
+        if intentos >= self.max_intentos:
+            with self._lock_contadores:
+                self._apartados += 1
+            logger.error(
+                "Evento %s del outbox apartado tras %d intentos (%s → %s)",
+                evento.id, self.max_intentos, evento.tipo, evento.destino,
+            )
+
+    def estadisticas(self) -> EstadisticasRelay:
+        with self._lock_contadores:
+            return EstadisticasRelay(
+                self._entregados, self._fallidos, self._apartados, self._lotes,
+                time.monotonic() - self._inicio,
+            )
+
+    def iniciar(self) -> "OutboxRelay":
+        """Arranca el drenado periódico en segundo plano (idempotente)."""
+        if self._hilo is None:
+            self._parar.clear()
+            self._hilo = threading.Thread(target=self._ciclo, name="outbox-relay", daemon=True)
+            self._hilo.start()
+        return self
+
+    def detener(self, timeout: float = 5.0) -> None:
+        """Detiene el hilo y hace un último drenado."""
+        if self._hilo is not None:
+            self._parar.set()
+            self._hilo.join(timeout)
+            self._hilo = None
+        self.drenar()
+
+    def _ciclo(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.drenar()
+            except Exception:
+                # Un error del repositorio (p. ej. "database is locked") no debe
+                # terminar el hilo: los eventos siguen en el outbox y se reintentan.
+                logger.exception("Falló el drenado del outbox; se reintenta en %.1f s", self.intervalo)
@@ -0,0 +1,76 @@
+"""Paginación por cursor (keyset) compartida por repositorios, servicios y vistas."""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Any, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+from ..domain.exceptions import ValidationError
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Pagina(Generic[T]):
+    """
+    Una página de resultados y el cursor opaco de la siguiente.
+    `siguiente_cursor` es None en la última página.
+    """
+    items: List[T] = field(default_factory=list)
+    siguiente_cursor: Optional[str] = None
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+def codificar_cursor(posicion: Any) -> str:
+    """Convierte la posición de la última fila entregada en un cursor opaco."""
+    crudo = json.dumps(posicion, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Any:
+    """
+    Recupera la posición codificada en un cursor.
+
+    Raises:
+        ValidationError: Si el cursor no fue generado por codificar_cursor.
+    """
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise ValidationError("Cursor de paginación inválido.")
+
+
+def decodificar_entero(cursor: Optional[str]) -> int:
+    """Posición entera (índice o seq) de un cursor; 0 si no hay cursor."""
+    if not cursor:
+        return 0
+    posicion = decodificar_cursor(cursor)
+    if not isinstance(posicion, int) or isinstance(posicion, bool) or posicion < 0:
+        raise ValidationError("Cursor de paginación inválido.")
+    return posicion
+
+
+def codificar_posicion_precio(precio: int, seq: int) -> str:
+    """Cursor de los listados ordenados por precio: (precio en pesos, seq) de la última fila."""
+    return codificar_cursor([int(precio), seq])
+
+
+def decodificar_posicion_precio(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Posición (precio, seq) de un cursor de listado por precio; None si no hay cursor."""
+    if not cursor:
+        return None
+    posicion = decodificar_cursor(cursor)
+    try:
+        precio, seq = posicion
+    except (TypeError, ValueError):
+        raise ValidationError("Cursor de paginación inválido.")
+    if not all(isinstance(v, int) and not isinstance(v, bool) for v in (precio, seq)):
+        raise ValidationError("Cursor de paginación inválido.")
+    return precio, seq
@@ -1,85 +1,538 @@
-from typing import Optional, List
-from ..domain.usuario import Usuario
-from ..domain.categoria import Categoria
-from ..domain.unidad_residencial import UnidadResidencial
-from ..domain.servicio import Servicio
-from ..domain.consulta import Consulta
-
-class InMemoryProductoRepository:
-    def __init__(self):
-        self.db = {}
-
-    def add(self, producto: Producto):
-        self.db[producto.id] = producto
-
-    def get(self, id: str) -> Optional[Producto]:
-        return self.db.get(id)
-
-    def list_all(self) -> List[Producto]:
-        return list(self.db.values())
-
-class InMemoryUsuarioRepository:
-    def __init__(self):
-        self.db = {}
-
-    def add(self, usuario: Usuario):
-        self.db[usuario.id] = usuario
-
-    def get(self, id: str) -> Optional[Usuario]:
-        return self.db.get(id)
-
-    def list_all(self) -> List[Usuario]:
-        return list(self.db.values())
-
-class InMemoryCategoriaRepository:
-    def __init__(self):
-        self.db = {}
-
-    def add(self, categoria: Categoria):
-        self.db[categoria.id] = categoria
-
-    def get(self, id: str) -> Optional[Categoria]:
-        return self.db.get(id)
-
-    def list_all(self) -> List[Categoria]:
-        return list(self.db.values())
-
-class InMemoryUnidadResidencialRepository:
-    def __init__(self):
-        self.db = {}
-
-    def add(self, unidad: UnidadResidencial):
-        self.db[unidad.id] = unidad
-
-    def get(self, id: str) -> Optional[UnidadResidencial]:
-        return self.db.get(id)
-    
-    def list_all(self) -> List[UnidadResidencial]:
-        return list(self.db.values())
-
-class InMemoryServicioRepository:
-    def __init__(self):
-        self.db = {}
-
-    def add(self, servicio: Servicio):
-        self.db[servicio.id] = servicio
-
-    def get(self, id: str) -> Optional[Servicio]:
-        return self.db.get(id)
-
-    def list_all(self) -> List[Servicio]:
-        return list(self.db.values())
-
-class InMemoryConsultaRepository:
-    def __init__(self):
-        self.db = {}
-
-    def add(self, consulta: Consulta):
-        self.db[consulta.id] = consulta
-
-    def get(self, id: str) -> Optional[Consulta]:
-        return self.db.get(id)
-
-    def list_all(self) -> List[Consulta]:
-        return list(self.db.values())
-
+from abc import ABC, abstractmethod
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Callable, Dict, Generic, Iterable, Iterator, Optional, List, Tuple, TypeVar
+from ..domain.exceptions import ResourceAlreadyExistsError
+from ..domain.usuario import Usuario
+from ..domain.categoria import Categoria
+from ..domain.producto import Producto
+from ..domain.unidad_residencial import UnidadResidencial
+from ..domain.servicio import Servicio
+from ..domain.consulta import Consulta, EstadoConsulta
+from ..domain.reserva import EstadoReserva, Reserva
+from ..domain.facetas import Facetas, MotorFacetas
+from ..domain.indice_precios import IndicePrecios, es_descendente
+from ..domain.validadores import normalizar_email, normalizar_telefono
+from .asincrono import RepositorioAsincrono
+from .concurrencia import LockLectorEscritor, LocksPorClave
+from .paginacion import (
+    Pagina,
+    codificar_cursor,
+    codificar_posicion_precio,
+    decodificar_entero,
+    decodificar_posicion_precio,
+)
+
+T = TypeVar("T")
+
+
+def _paginar_ids(ids: List[str], db: Dict[str, T], cursor: Optional[str], limit: int) -> Pagina[T]:
+    """Pagina una lista de ids en orden de inserción; el cursor es la posición siguiente."""
+    inicio = decodificar_entero(cursor)
+    fin = inicio + limit
+    siguiente = codificar_cursor(fin) if fin < len(ids) else None
+    return Pagina([db[i] for i in ids[inicio:fin]], siguiente)
+
+
+def _filtro_exportacion(
+    usuario_de: Callable[[T], str],
+    categoria_de: Callable[[T], Optional[Categoria]],
+    fecha_de: Optional[Callable[[T], datetime]],
+    usuario_ids: Optional[Iterable[str]],
+    categoria_id: Optional[str],
+    desde: Optional[datetime],
+    hasta: Optional[datetime],
+) -> Callable[[T], bool]:
+    """Predicado de los filtros de exportación; el rango de fechas es [desde, hasta)."""
+    usuarios = None if usuario_ids is None else set(usuario_ids)
+
+    def incluir(entidad: T) -> bool:
+        if usuarios is not None and usuario_de(entidad) not in usuarios:
+            return False
+        if categoria_id is not None:
+            categoria = categoria_de(entidad)
+            if categoria is None or categoria.id != categoria_id:
+                return False
+        if fecha_de is not None and (desde is not None or hasta is not None):
+            fecha = fecha_de(entidad)
+            if (desde is not None and fecha < desde) or (hasta is not None and fecha >= hasta):
+                return False
+        return True
+    return incluir
+
+
+class InMemoryRepository(RepositorioAsincrono, Generic[T]):
+    """
+    Repositorio en memoria indexado por id.
+    `_orden` registra los ids en orden de inserción para paginar por cursor
+    sin copiar toda la colección. Los observadores suscritos reciben cada
+    entidad guardada (alta o cambio), p. ej. para mantener vistas derivadas.
+
+    Es seguro entre hilos: las escrituras toman el lock de escritura y las
+    lecturas que recorren colecciones el de lectura, así ningún lector ve un
+    índice a medio actualizar y los lectores no se bloquean entre sí.
+    `list_all` copia una instantánea inmutable que solo se rehace después de
+    una escritura (copy-on-write). Las subclases extienden `_verificar` y
+    `_guardar`, que corren dentro de la escritura; los observadores se
+    notifican después de liberar el lock. Las lecturas `a*` corren en el
+    event loop y toman ahí el lock de lectura (de threading): pueden esperar
+    a una escritura en curso. Las escrituras `a*` corren en el pool de E/S.
+    """
+
+    _bloqueante = False
+
+    def __init__(self):
+        self.db: Dict[str, T] = {}
+        self._orden: List[str] = []
+        self._observadores: List[Callable[[T], None]] = []
+        self._lock = LockLectorEscritor()
+        self._instantanea: Optional[Tuple[T, ...]] = None
+
+    def suscribir(self, observador: Callable[[T], None]) -> None:
+        self._observadores.append(observador)
+
+    def _verificar(self, entidades: List[T]) -> None:
+        """Reglas sobre el lote completo antes de guardar nada (p. ej. unicidad)."""
+
+    def _guardar(self, entidad: T) -> None:
+        """Guarda una entidad y actualiza los índices; corre con el lock de escritura."""
+        if entidad.id not in self.db:
+            self._orden.append(entidad.id)
+        self.db[entidad.id] = entidad
+
+    def add(self, entidad: T):
+        self.add_many((entidad,))
+
+    def add_many(self, entidades: Iterable[T]):
+        """Guarda el lote de forma atómica: los lectores lo ven completo o no lo ven."""
+        entidades = list(entidades)
+        with self._lock.escritura():
+            self._escribir(entidades)
+        self._notificar(entidades)
+
+    def _escribir(self, entidades: List[T]) -> None:
+        """Verifica y guarda el lote; corre con el lock de escritura."""
+        self._verificar(entidades)
+        for entidad in entidades:
+            self._guardar(entidad)
+        self._instantanea = None
+
+    def _notificar(self, entidades: List[T]) -> None:
+        """Avisa a los observadores; corre después de liberar el lock."""
+        for entidad in entidades:
+            for observador in self._observadores:
+                observador(entidad)
+
+    def get(self, id: str) -> Optional[T]:
+        return self.db.get(id)
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, T]:
+        """Busca varios ids a la vez; los inexistentes no aparecen en el resultado."""
+        with self._lock.lectura():
+            return {id: self.db[id] for id in ids if id in self.db}
+
+    def list_all(self) -> List[T]:
+        instantanea = self._instantanea
+        if instantanea is None:
+            with self._lock.lectura():
+                instantanea = self._instantanea = tuple(self.db.values())
+        return list(instantanea)
+
+    def list_page(self, cursor: Optional[str] = None, limit: int = 50) -> Pagina[T]:
+        with self._lock.lectura():
+            return _paginar_ids(self._orden, self.db, cursor, limit)
+
+    def _recorrer(self, incluir: Callable[[T], bool], lote: int) -> Iterator[T]:
+        """
+        Recorre en orden de inserción tomando `lote` ids por vez bajo el lock
+        de lectura; entre lotes no retiene el lock, así un recorrido largo (una
+        exportación) no frena las escrituras. Ve lo agregado mientras avanza.
+        """
+        posicion = 0
+        while True:
+            with self._lock.lectura():
+                entidades = [self.db[id] for id in self._orden[posicion:posicion + lote]]
+            if not entidades:
+                return
+            posicion += len(entidades)
+            yield from filter(incluir, entidades)
+
+class InMemoryCatalogoRepository(InMemoryRepository[T], ABC):
+    """
+    Repositorio de items publicables (productos o servicios) con índice de
+    precios por categoría y facetas. Volver a guardar un item lo reindexa, así
+    los cambios de stock o disponibilidad se reflejan en listados y conteos.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._precios = IndicePrecios()
+        self._facetas = MotorFacetas()
+
+    @abstractmethod
+    def _disponible(self, entidad: T) -> bool:
+        """True si el item cuenta como disponible en el índice de precios y las facetas."""
+
+    def _guardar(self, entidad: T) -> None:
+        super()._guardar(entidad)
+        categoria = entidad.categoria
+        categoria_id = categoria.id if categoria else None
+        disponible = self._disponible(entidad)
+        self._precios.agregar(entidad.id, entidad, entidad.precio, categoria_id, disponible)
+        self._facetas.agregar(
+            entidad.id,
+            categoria_id,
+            categoria.nombre if categoria else None,
+            entidad.precio,
+            disponible,
+        )
+
+    def list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        orden: Optional[str] = None,
+        solo_disponibles: bool = False,
+    ) -> Pagina[T]:
+        """
+        Sin filtros pagina en orden de inserción. Con categoría, rango de precio,
+        `orden` o `solo_disponibles` recorre el índice de precios (ascendente si
+        no se indica orden) y el cursor es la posición (precio, seq) del último item.
+        """
+        if (categoria_id is None and precio_min is None and precio_max is None
+                and orden is None and not solo_disponibles):
+            return super().list_page(cursor, limit)
+
+        descendente, despues_de = es_descendente(orden), decodificar_posicion_precio(cursor)
+        with self._lock.lectura():  # El recorrido es perezoso: se consume bajo el lock
+            recorrido = self._precios.rango(
+                categoria_id=categoria_id,
+                precio_min=precio_min,
+                precio_max=precio_max,
+                solo_disponibles=solo_disponibles,
+                descendente=descendente,
+                despues_de=despues_de,
+            )
+            filas = list(islice(recorrido, limit + 1))
+        siguiente = codificar_posicion_precio(*filas[limit - 1][0]) if len(filas) > limit else None
+        return Pagina([item for _, item in filas[:limit]], siguiente)
+
+    def facetas(
+        self,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        solo_disponibles: bool = False,
+    ) -> Facetas:
+        """
+        Conteos por categoría, rango de precio y disponibilidad. Sin filtros
+        salen de los contadores; con filtros se cuentan solo los items del
+        rango, tomados del índice de precios.
+        """
+        with self._lock.lectura():
+            if (categoria_id is None and precio_min is None and precio_max is None
+                    and not solo_disponibles):
+                return self._facetas.totales()
+            recorrido = self._precios.rango(
+                categoria_id=categoria_id,
+                precio_min=precio_min,
+                precio_max=precio_max,
+                solo_disponibles=solo_disponibles,
+            )
+            return self._facetas.contar(item.id for _, item in recorrido)
+
+class InMemoryProductoRepository(InMemoryCatalogoRepository[Producto]):
+    def _disponible(self, producto: Producto) -> bool:
+        return producto.hay_stock()
+
+    def iterar(
+        self,
+        usuario_ids: Optional[Iterable[str]] = None,
+        categoria_id: Optional[str] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        lote: int = 1000,
+    ) -> Iterator[Producto]:
+        """Productos de esos vendedores, categoría y publicados en [desde, hasta), por lotes."""
+        return self._recorrer(
+            _filtro_exportacion(
+                lambda p: p.vendedor.id, lambda p: p.categoria, lambda p: p.fecha_publicacion,
+                usuario_ids, categoria_id, desde, hasta,
+            ),
+            lote,
+        )
+
+    def comparar_y_fijar_stock(self, producto_id: str, esperado: int, nuevo: int) -> bool:
+        """
+        Fija el stock en `nuevo` solo si todavía es `esperado` (compare-and-set).
+        Retorna False si otro hilo lo cambió antes (o el producto no existe):
+        quien llama vuelve a leer y reintenta. Comparar, fijar y reindexar la
+        disponibilidad ocurren bajo el lock de escritura, así ningún lector ve
+        el stock nuevo con el índice de precios o las facetas viejas; los
+        observadores se notifican después.
+        """
+        with self._lock.escritura():
+            producto = self.db.get(producto_id)
+            if producto is None or producto.stock != esperado:
+                return False
+            producto.stock = nuevo
+            self._escribir([producto])
+        self._notificar([producto])
+        return True
+
+class InMemoryUsuarioRepository(InMemoryRepository[Usuario]):
+    """
+    Usuarios con índices únicos por email y teléfono (normalizados por la
+    entidad): `get_by_email` y `get_by_telefono` son O(1). Guardar un usuario
+    cuyo email o teléfono pertenece a otro id lanza ResourceAlreadyExistsError;
+    la verificación y la escritura ocurren bajo el mismo lock de escritura, y
+    en `add_many` el lote se verifica completo antes de escribir nada.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._por_email: Dict[str, str] = {}
+        self._por_telefono: Dict[str, str] = {}
+
+    @staticmethod
+    def _duplicado(
+        indice: Dict[str, str], valor: Optional[str], id: str, reservados: Dict[str, str]
+    ) -> bool:
+        """True si `valor` ya pertenece a otro id (en el índice o antes en el mismo lote)."""
+        if valor is None:
+            return False
+        propietario = reservados.get(valor, indice.get(valor))
+        return propietario is not None and propietario != id
+
+    def _verificar(self, usuarios: List[Usuario]) -> None:
+        emails: Dict[str, str] = {}
+        telefonos: Dict[str, str] = {}
+        for usuario in usuarios:
+            if self._duplicado(self._por_email, usuario.email, usuario.id, emails):
+                raise ResourceAlreadyExistsError(f"Ya existe un usuario con el email {usuario.email}.")
+            if self._duplicado(self._por_telefono, usuario.telefono, usuario.id, telefonos):
+                raise ResourceAlreadyExistsError(
+                    f"Ya existe un usuario con el teléfono {usuario.telefono}."
+                )
+            emails[usuario.email] = usuario.id
+            if usuario.telefono is not None:
+                telefonos[usuario.telefono] = usuario.id
+
+    def _guardar(self, usuario: Usuario) -> None:
+        anterior = self.db.get(usuario.id)
+        if anterior is not None:
+            self._por_email.pop(anterior.email, None)
+            if anterior.telefono is not None:
+                self._por_telefono.pop(anterior.telefono, None)
+        self._por_email[usuario.email] = usuario.id
+        if usuario.telefono is not None:
+            self._por_telefono[usuario.telefono] = usuario.id
+        super()._guardar(usuario)
+
+    def get_by_email(self, email: str) -> Optional[Usuario]:
+        id = self._por_email.get(normalizar_email(email))
+        return None if id is None else self.db.get(id)
+
+    def get_by_telefono(self, telefono: str) -> Optional[Usuario]:
+        id = self._por_telefono.get(normalizar_telefono(telefono))
+        return None if id is None else self.db.get(id)
+
+    def get_many_by_email(self, emails: Iterable[str]) -> Dict[str, Usuario]:
+        """Busca varios emails a la vez: {email normalizado: usuario} de los registrados."""
+        return self._get_many_por(self._por_email, map(normalizar_email, emails))
+
+    def get_many_by_telefono(self, telefonos: Iterable[str]) -> Dict[str, Usuario]:
+        """Busca varios teléfonos a la vez: {teléfono normalizado: usuario} de los registrados."""
+        return self._get_many_por(self._por_telefono, map(normalizar_telefono, telefonos))
+
+    def _get_many_por(self, indice: Dict[str, str], claves: Iterable[str]) -> Dict[str, Usuario]:
+        with self._lock.lectura():
+            return {clave: self.db[indice[clave]] for clave in claves if clave in indice}
+
+class InMemoryCategoriaRepository(InMemoryRepository[Categoria]):
+    pass
+
+class InMemoryUnidadResidencialRepository(InMemoryRepository[UnidadResidencial]):
+    pass
+
+class InMemoryServicioRepository(InMemoryCatalogoRepository[Servicio]):
+    def _disponible(self, servicio: Servicio) -> bool:
+        return servicio.disponible
+
+    def iterar(
+        self,
+        usuario_ids: Optional[Iterable[str]] = None,
+        categoria_id: Optional[str] = None,
+        lote: int = 1000,
+    ) -> Iterator[Servicio]:
+        """Servicios de esos proveedores y categoría, por lotes (no tienen fecha)."""
+        return self._recorrer(
+            _filtro_exportacion(
+                lambda s: s.proveedor.id, lambda s: s.categoria, None,
+                usuario_ids, categoria_id, None, None,
+            ),
+            lote,
+        )
+
+    def fijar_disponibilidad(self, servicio_id: str, disponible: bool) -> Optional[Servicio]:
+        """
+        Marca el servicio como disponible o no y lo reindexa bajo el lock de
+        escritura (como comparar_y_fijar_stock). Retorna el servicio, o None
+        si no existe.
+        """
+        with self._lock.escritura():
+            servicio = self.db.get(servicio_id)
+            if servicio is None:
+                return None
+            servicio.disponible = disponible
+            self._escribir([servicio])
+        self._notificar([servicio])
+        return servicio
+
+class InMemoryConsultaRepository(InMemoryRepository[Consulta]):
+    """
+    Repositorio de consultas con índices hash por comprador, vendedor e item.
+    Los índices guardan ids en orden de registro; comprador, vendedor e item
+    no cambian durante la vida de una consulta. El estado cambia con
+    `comparar_y_fijar_estado`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._por_comprador: Dict[str, List[str]] = {}
+        self._por_vendedor: Dict[str, List[str]] = {}
+        self._por_item: Dict[str, List[str]] = {}
+
+    def _guardar(self, consulta: Consulta) -> None:
+        if consulta.id not in self.db:
+            self._por_comprador.setdefault(consulta.comprador.id, []).append(consulta.id)
+            self._por_vendedor.setdefault(consulta.vendedor.id, []).append(consulta.id)
+            self._por_item.setdefault(consulta.item.id, []).append(consulta.id)
+        super()._guardar(consulta)
+
+    def _listar_indice(self, indice: Dict[str, List[str]], clave: str) -> List[Consulta]:
+        with self._lock.lectura():
+            return [self.db[i] for i in indice.get(clave, ())]
+
+    def list_by_comprador(self, comprador_id: str) -> List[Consulta]:
+        return self._listar_indice(self._por_comprador, comprador_id)
+
+    def list_by_vendedor(self, vendedor_id: str) -> List[Consulta]:
+        """Consultas sobre items publicados por el usuario (vendedor o proveedor)."""
+        return self._listar_indice(self._por_vendedor, vendedor_id)
+
+    def list_by_item(self, item_id: str) -> List[Consulta]:
+        return self._listar_indice(self._por_item, item_id)
+
+    def list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        comprador_id: Optional[str] = None,
+        vendedor_id: Optional[str] = None,
+    ) -> Pagina[Consulta]:
+        """Página de consultas, opcionalmente restringida por comprador o vendedor."""
+        with self._lock.lectura():
+            if vendedor_id is not None:
+                ids = self._por_vendedor.get(vendedor_id, [])
+            elif comprador_id is not None:
+                ids = self._por_comprador.get(comprador_id, [])
+            else:
+                ids = self._orden
+            return _paginar_ids(ids, self.db, cursor, limit)
+
+    def comparar_y_fijar_estado(
+        self, consulta_id: str, esperado: EstadoConsulta, nuevo: EstadoConsulta
+    ) -> bool:
+        """Cambia el estado solo si todavía es `esperado` (compare-and-set)."""
+        with self._lock.escritura():
+            consulta = self.db.get(consulta_id)
+            if consulta is None or consulta.estado is not esperado:
+                return False
+            consulta.estado = nuevo
+            self._escribir([consulta])
+        self._notificar([consulta])
+        return True
+
+    def list_nuevas(
+        self, vendedor_id: str, cursor: Optional[str] = None, limit: int = 50
+    ) -> Pagina[Consulta]:
+        """
+        Consultas recibidas por el vendedor después de `cursor` (buzón).
+        A diferencia de `list_page` el cursor siguiente siempre está: sin
+        consultas nuevas es el mismo, para volver a preguntar desde ahí.
+        """
+        inicio = decodificar_entero(cursor)
+        with self._lock.lectura():
+            ids = self._por_vendedor.get(vendedor_id, [])[inicio:inicio + limit]
+            consultas = [self.db[i] for i in ids]
+        return Pagina(consultas, codificar_cursor(inicio + len(consultas)))
+
+    async def alist_nuevas(
+        self, vendedor_id: str, cursor: Optional[str] = None, limit: int = 50
+    ) -> Pagina[Consulta]:
+        return await self._acorrer(self.list_nuevas, vendedor_id, cursor, limit)
+
+    def iterar(
+        self,
+        usuario_ids: Optional[Iterable[str]] = None,
+        categoria_id: Optional[str] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        lote: int = 1000,
+    ) -> Iterator[Consulta]:
+        """
+        Consultas sobre items de esos vendedores, de esa categoría de item y
+        registradas en [desde, hasta), por lotes.
+        """
+        return self._recorrer(
+            _filtro_exportacion(
+                lambda k: k.vendedor.id, lambda k: k.item.categoria, lambda k: k.fecha,
+                usuario_ids, categoria_id, desde, hasta,
+            ),
+            lote,
+        )
+
+
+class InMemoryReservaRepository(InMemoryRepository[Reserva]):
+    """
+    Reservas con índice por consulta. El estado solo cambia con
+    `comparar_y_fijar_estado`, así confirmar, liberar y vencer la misma
+    reserva desde hilos distintos nunca aplican dos transiciones.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._por_consulta: Dict[str, List[str]] = {}
+        self._locks_estado = LocksPorClave()
+
+    def _guardar(self, reserva: Reserva) -> None:
+        if reserva.id not in self.db:
+            self._por_consulta.setdefault(reserva.consulta_id, []).append(reserva.id)
+        super()._guardar(reserva)
+
+    def get_activa_por_consulta(self, consulta_id: str) -> Optional[Reserva]:
+        with self._lock.lectura():
+            for id in self._por_consulta.get(consulta_id, ()):
+                if self.db[id].activa:
+                    return self.db[id]
+        return None
+
+    def list_activas(self) -> List[Reserva]:
+        return [r for r in self.list_all() if r.activa]
+
+    def comparar_y_fijar_estado(
+        self, reserva_id: str, esperado: EstadoReserva, nuevo: EstadoReserva
+    ) -> bool:
+        """Cambia el estado solo si todavía es `esperado` (compare-and-set)."""
+        with self._locks_estado.para(reserva_id):
+            reserva = self.db.get(reserva_id)
+            if reserva is None or reserva.estado is not esperado:
+                return False
+            reserva.estado = nuevo
+            self.add(reserva)
+        return True
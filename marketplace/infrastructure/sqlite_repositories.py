@@ -0,0 +1,1494 @@
+"""
+Repositorios SQLite con la misma interfaz que los repositorios InMemory.
+
+Todos comparten una SQLiteDatabase (un archivo en modo WAL), de modo que varios
+procesos pueden leer y escribir el mismo almacén y los datos sobreviven reinicios.
+Las sentencias son constantes del módulo: sqlite3 cachea la versión preparada de
+cada una y solo se enlazan parámetros en cada llamada.
+Las variantes asíncronas (`aget`, `alist_page`...) corren en el pool de E/S
+de `asincrono`, con la conexión de cada hilo del pool.
+"""
+
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..domain.usuario import Usuario
+from ..domain.categoria import Categoria
+from ..domain.producto import Producto
+from ..domain.unidad_residencial import UnidadResidencial, nuevos_residentes
+from ..domain.servicio import Servicio
+from ..domain.consulta import Consulta, EstadoConsulta
+from ..domain.reserva import EstadoReserva, Reserva
+from ..domain.dinero import Dinero, limites_enteros
+from ..domain.exceptions import ResourceAlreadyExistsError
+from ..domain.facetas import LIMITES_PRECIO, Facetas
+from ..domain.indice_precios import es_descendente
+from ..domain.validadores import construir_confiable, normalizar_email, normalizar_telefono
+from .asincrono import RepositorioAsincrono
+from .outbox import EventoOutbox
+from .paginacion import (
+    Pagina,
+    codificar_cursor,
+    codificar_posicion_precio,
+    decodificar_entero,
+    decodificar_posicion_precio,
+)
+
+logger = logging.getLogger(__name__)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    nombre TEXT NOT NULL,
+    email TEXT NOT NULL,
+    apartamento TEXT,
+    telefono TEXT
+);
+
+CREATE TABLE IF NOT EXISTS categorias (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    nombre TEXT NOT NULL,
+    descripcion TEXT
+);
+
+CREATE TABLE IF NOT EXISTS unidades (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    nombre TEXT NOT NULL,
+    direccion TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS unidad_residentes (
+    seq INTEGER PRIMARY KEY,
+    unidad_id TEXT NOT NULL,
+    usuario_id TEXT NOT NULL,
+    UNIQUE (unidad_id, usuario_id)
+);
+
+CREATE TABLE IF NOT EXISTS productos (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    nombre TEXT NOT NULL,
+    descripcion TEXT,
+    precio INTEGER NOT NULL,
+    stock INTEGER NOT NULL,
+    vendedor_id TEXT NOT NULL,
+    categoria_id TEXT,
+    imagenes TEXT NOT NULL,
+    fecha_publicacion TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_productos_vendedor ON productos (vendedor_id);
+DROP INDEX IF EXISTS ix_productos_categoria;
+CREATE INDEX IF NOT EXISTS ix_productos_categoria_precio ON productos (categoria_id, precio);
+CREATE INDEX IF NOT EXISTS ix_productos_precio ON productos (precio);
+
+CREATE TABLE IF NOT EXISTS servicios (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    nombre TEXT NOT NULL,
+    descripcion TEXT,
+    precio INTEGER NOT NULL,
+    disponible INTEGER NOT NULL,
+    proveedor_id TEXT NOT NULL,
+    categoria_id TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_servicios_proveedor ON servicios (proveedor_id);
+DROP INDEX IF EXISTS ix_servicios_categoria;
+CREATE INDEX IF NOT EXISTS ix_servicios_categoria_precio ON servicios (categoria_id, precio);
+CREATE INDEX IF NOT EXISTS ix_servicios_precio ON servicios (precio);
+
+CREATE TABLE IF NOT EXISTS consultas (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    comprador_id TEXT NOT NULL,
+    vendedor_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    item_type TEXT NOT NULL,
+    mensaje TEXT,
+    fecha TEXT NOT NULL,
+    estado TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_consultas_comprador ON consultas (comprador_id);
+CREATE INDEX IF NOT EXISTS ix_consultas_vendedor ON consultas (vendedor_id);
+CREATE INDEX IF NOT EXISTS ix_consultas_item ON consultas (item_id);
+
+CREATE TABLE IF NOT EXISTS reservas (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    consulta_id TEXT NOT NULL,
+    producto_id TEXT NOT NULL,
+    cantidad INTEGER NOT NULL,
+    vence TEXT NOT NULL,
+    estado TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_reservas_consulta ON reservas (consulta_id);
+CREATE INDEX IF NOT EXISTS ix_reservas_activas ON reservas (vence) WHERE estado = 'activa';
+
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    tipo TEXT NOT NULL,
+    destino TEXT,
+    titulo TEXT NOT NULL,
+    creado TEXT NOT NULL,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    entregado INTEGER NOT NULL DEFAULT 0,
+    reclamado_por TEXT,
+    reclamado_hasta REAL
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_pendientes ON outbox (seq) WHERE entregado = 0;
+
+CREATE TABLE IF NOT EXISTS versiones (
+    coleccion TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# Colecciones con versión en la tabla `versiones` (ETag de los listados).
+# Cada una arranca en un valor aleatorio al crearse la base y la incrementan
+# triggers en la misma transacción que la escritura, la haga quien la haga.
+_COLECCIONES_VERSIONADAS = ("categorias", "productos", "servicios")
+
+_ESQUEMA_VERSIONES = "".join(
+    f"INSERT OR IGNORE INTO versiones (coleccion, version) "
+    f"VALUES ('{tabla}', abs(random() % 4294967296));\n"
+    + "".join(
+        f"CREATE TRIGGER IF NOT EXISTS tr_version_{tabla}_{evento.lower()} "
+        f"AFTER {evento} ON {tabla} BEGIN "
+        f"UPDATE versiones SET version = version + 1 WHERE coleccion = '{tabla}'; END;\n"
+        for evento in ("INSERT", "UPDATE", "DELETE")
+    )
+    for tabla in _COLECCIONES_VERSIONADAS
+)
+
+
+# Conteos de facetas del catálogo: (tabla, categoría, rango de precio,
+# disponible) -> cantidad. Los mantienen triggers en la misma transacción que
+# cada escritura, así `?facetas=true` sin filtro de precio suma unas pocas
+# filas en vez de agrupar el catálogo entero. Un filtro de precio parte los
+# rangos: esas facetas siguen agrupando las filas filtradas. Los rangos
+# guardados siguen LIMITES_PRECIO; si los límites cambian, hay que borrar la
+# tabla `facetas` para que se vuelva a crear al abrir la base.
+_DISPONIBLE = {"productos": "{f}.stock > 0", "servicios": "{f}.disponible = 1"}
+
+
+def _rango_precio(fila: str) -> str:
+    """Posición del precio de `fila` en RANGOS_PRECIO, como expresión SQL."""
+    return "CASE " + " ".join(
+        f"WHEN {fila}.precio < {limite} THEN {i}" for i, limite in enumerate(LIMITES_PRECIO)
+    ) + f" ELSE {len(LIMITES_PRECIO)} END"
+
+
+def _clave_faceta(tabla: str, fila: str) -> str:
+    """(categoría, rango, disponible) de `fila`; sin categoría se guarda ''."""
+    disponible = _DISPONIBLE[tabla].format(f=fila)
+    return f"coalesce({fila}.categoria_id, ''), {_rango_precio(fila)}, {disponible}"
+
+
+def _crear_conteos_facetas(conexion: sqlite3.Connection) -> None:
+    """Crea la tabla de conteos, la llena con el catálogo actual y crea sus triggers."""
+    conexion.execute(
+        "CREATE TABLE facetas (tabla TEXT NOT NULL, categoria_id TEXT NOT NULL, "
+        "rango INTEGER NOT NULL, disponible INTEGER NOT NULL, cantidad INTEGER NOT NULL, "
+        "PRIMARY KEY (tabla, categoria_id, rango, disponible)) WITHOUT ROWID"
+    )
+    for tabla in _DISPONIBLE:
+        conexion.execute(
+            "INSERT INTO facetas (tabla, categoria_id, rango, disponible, cantidad) "
+            f"SELECT '{tabla}', {_clave_faceta(tabla, 't')}, COUNT(*) FROM {tabla} t "
+            "GROUP BY 2, 3, 4"
+        )
+        sumar = (
+            "INSERT INTO facetas (tabla, categoria_id, rango, disponible, cantidad) "
+            f"VALUES ('{tabla}', {_clave_faceta(tabla, 'new')}, 1) "
+            "ON CONFLICT (tabla, categoria_id, rango, disponible) "
+            "DO UPDATE SET cantidad = cantidad + 1;"
+        )
+        restar = (
+            f"UPDATE facetas SET cantidad = cantidad - 1 WHERE tabla = '{tabla}' "
+            f"AND (categoria_id, rango, disponible) = ({_clave_faceta(tabla, 'old')});"
+        )
+        conexion.execute(
+            f"CREATE TRIGGER tr_facetas_{tabla}_insert AFTER INSERT ON {tabla} "
+            f"BEGIN {sumar} END"
+        )
+        conexion.execute(
+            f"CREATE TRIGGER tr_facetas_{tabla}_delete AFTER DELETE ON {tabla} "
+            f"BEGIN {restar} END"
+        )
+        conexion.execute(
+            f"CREATE TRIGGER tr_facetas_{tabla}_update AFTER UPDATE ON {tabla} "
+            f"WHEN ({_clave_faceta(tabla, 'old')}) IS NOT ({_clave_faceta(tabla, 'new')}) "
+            f"BEGIN {restar} {sumar} END"
+        )
+
+
+# Columnas agregadas después de la primera versión del esquema:
+# (tabla, columna, tipo, valor para las filas existentes). Las bases creadas
+# antes las reciben con ALTER TABLE al abrirse.
+_COLUMNAS_AGREGADAS = [
+    ("productos", "fecha_publicacion", "TEXT", lambda: datetime.now().isoformat()),
+    ("outbox", "reclamado_por", "TEXT", lambda: None),
+    ("outbox", "reclamado_hasta", "REAL", lambda: None),
+]
+
+
+
+def _contactos_duplicados(columna: str) -> Callable[[sqlite3.Connection], Optional[str]]:
+    """
+    Busca usuarios que comparten `columna`. No se resuelven solos (habría que
+    decidir qué cuenta conservar): se reportan y el índice espera.
+    """
+    def resolver(conexion: sqlite3.Connection) -> Optional[str]:
+        repetidos = conexion.execute(
+            f"SELECT {columna}, group_concat(id, ', ') FROM usuarios "
+            f"WHERE {columna} IS NOT NULL GROUP BY {columna} HAVING COUNT(*) > 1"
+        ).fetchall()
+        if not repetidos:
+            return None
+        return "; ".join(f"{valor}: {ids}" for valor, ids in repetidos)
+    return resolver
+
+
+def _liberar_reservas_duplicadas(conexion: sqlite3.Connection) -> Optional[str]:
+    """
+    Deja una sola reserva activa por consulta: libera las más nuevas y
+    devuelve su stock (una base anterior pudo guardar dos en una carrera).
+    """
+    duplicadas = conexion.execute(
+        "SELECT r.seq, r.producto_id, r.cantidad FROM reservas r "
+        "WHERE r.estado = 'activa' AND EXISTS (SELECT 1 FROM reservas o "
+        "WHERE o.consulta_id = r.consulta_id AND o.estado = 'activa' AND o.seq < r.seq)"
+    ).fetchall()
+    conexion.executemany(
+        "UPDATE reservas SET estado = 'liberada' WHERE seq = ?", [(seq,) for seq, _, _ in duplicadas]
+    )
+    conexion.executemany(
+        "UPDATE productos SET stock = stock + ? WHERE id = ?",
+        [(cantidad, producto_id) for _, producto_id, cantidad in duplicadas],
+    )
+    return None
+
+
+# Índices únicos que una base existente puede violar: (nombre, columnas,
+# resolver). `resolver(conexion)` corrige las filas que lo violan en la misma
+# transacción en que se crea el índice, o retorna una descripción de las que
+# no puede corregir: entonces el índice no se crea, se registra un error y
+# se vuelve a intentar al abrir la base la próxima vez.
+_INDICES_UNICOS = [
+    ("ux_usuarios_email", "usuarios (email)", _contactos_duplicados("email")),
+    ("ux_usuarios_telefono", "usuarios (telefono)", _contactos_duplicados("telefono")),
+    ("ux_reservas_activa_consulta", "reservas (consulta_id) WHERE estado = 'activa'",
+     _liberar_reservas_duplicadas),
+]
+
+_MAX_PARAMETROS = 500
+
+
+def _marcadores(cantidad: int) -> str:
+    return ", ".join("?" * cantidad)
+
+
+class SQLiteDatabase:
+    """
+    Base SQLite compartida por los repositorios.
+
+    Cada hilo usa su propia conexión (se abre la primera vez que el hilo la
+    necesita): con WAL los lectores no se bloquean entre sí ni con el
+    escritor, y SQLite serializa las escrituras con BEGIN IMMEDIATE y
+    busy_timeout en vez de un lock global del proceso. Una base ":memory:"
+    existe solo dentro de su conexión, así que en ese caso todos los hilos
+    comparten una y se turnan con un lock.
+
+    Las conexiones trabajan en modo autocommit; `transaccion()` abre una
+    transacción explícita y es reentrante (por hilo), así varias escrituras
+    (de uno o varios repositorios) pueden confirmarse juntas.
+    """
+
+    def __init__(self, ruta: str = "marketplace.db"):
+        self.ruta = ruta
+        self._compartida = ruta == ":memory:"
+        self._local = threading.local()
+        self._lock = threading.RLock()  # Turnos sobre la conexión compartida
+        self._conexiones: List[sqlite3.Connection] = []
+        self._conexion().executescript(_ESQUEMA + _ESQUEMA_VERSIONES)
+        self._migrar()
+
+    def _abrir(self) -> sqlite3.Connection:
+        conexion = sqlite3.connect(
+            self.ruta, check_same_thread=False, isolation_level=None, cached_statements=256
+        )
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        conexion.execute("PRAGMA busy_timeout=5000")
+        with self._lock:
+            self._conexiones.append(conexion)
+        return conexion
+
+    def _conexion(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (o la compartida con ":memory:")."""
+        if self._compartida:
+            if not self._conexiones:
+                self._abrir()
+            return self._conexiones[0]
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = self._local.conexion = self._abrir()
+        return conexion
+
+    @contextmanager
+    def _turno(self):
+        """Exclusión entre hilos solo cuando comparten la conexión."""
+        if self._compartida:
+            with self._lock:
+                yield
+        else:
+            yield
+
+    def _migrar(self) -> None:
+        """
+        Agrega a una base existente las columnas de _COLUMNAS_AGREGADAS, los
+        índices de _INDICES_UNICOS y los conteos de facetas que le falten.
+        """
+        for tabla, columna, tipo, relleno in _COLUMNAS_AGREGADAS:
+            existentes = {f[1] for f in self.consultar(f"PRAGMA table_info({tabla})")}
+            if columna not in existentes:
+                with self.transaccion() as conexion:
+                    conexion.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}")
+                    conexion.execute(f"UPDATE {tabla} SET {columna} = ?", (relleno(),))
+        for nombre, columnas, resolver in _INDICES_UNICOS:
+            with self.transaccion() as conexion:
+                existe = conexion.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (nombre,)
+                ).fetchone()
+                if existe:
+                    continue
+                problema = resolver(conexion)
+                if problema is None:
+                    conexion.execute(f"CREATE UNIQUE INDEX {nombre} ON {columnas}")
+                    continue
+            logger.error(
+                "No se creó el índice %s de %s: hay filas repetidas que corregir a mano (%s)",
+                nombre, self.ruta, problema,
+            )
+        with self.transaccion() as conexion:
+            existe = conexion.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'facetas'"
+            ).fetchone()
+            if not existe:
+                _crear_conteos_facetas(conexion)
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Transacción reentrante: solo la más externa hace COMMIT o ROLLBACK.
+        Después del COMMIT corre lo registrado con `al_confirmar`; un ROLLBACK
+        lo descarta.
+        """
+        pendientes: List[Callable[[], None]] = []
+        with self._turno():
+            conexion = self._conexion()
+            profundidad = getattr(self._local, "profundidad", 0)
+            if profundidad == 0:
+                conexion.execute("BEGIN IMMEDIATE")
+                self._local.al_confirmar = []
+            self._local.profundidad = profundidad + 1
+            try:
+                yield conexion
+            except BaseException:
+                self._local.profundidad = profundidad
+                if profundidad == 0:
+                    self._local.al_confirmar = []
+                    conexion.execute("ROLLBACK")
+                raise
+            self._local.profundidad = profundidad
+            if profundidad == 0:
+                conexion.execute("COMMIT")
+                pendientes, self._local.al_confirmar = self._local.al_confirmar, []
+        for accion in pendientes:
+            accion()
+
+    def al_confirmar(self, accion: Callable[[], None]) -> None:
+        """
+        Corre `accion` cuando se confirme la transacción en curso del hilo
+        (no corre si se revierte); sin transacción abierta, la corre ya.
+        """
+        if getattr(self._local, "profundidad", 0):
+            self._local.al_confirmar.append(accion)
+        else:
+            accion()
+
+    def ejecutar(self, sql: str, parametros: Iterable = ()) -> int:
+        """Ejecuta una sentencia en una transacción; retorna las filas afectadas."""
+        with self.transaccion() as conexion:
+            return conexion.execute(sql, tuple(parametros)).rowcount
+
+    def ejecutar_muchos(self, sql: str, filas: Iterable[tuple]) -> None:
+        """Ejecuta la misma sentencia para todas las filas en una sola transacción."""
+        with self.transaccion() as conexion:
+            conexion.executemany(sql, filas)
+
+    def consultar(self, sql: str, parametros: Iterable = ()) -> List[tuple]:
+        with self._turno():
+            return self._conexion().execute(sql, tuple(parametros)).fetchall()
+
+    def consultar_por_ids(self, select: str, columna: str, ids: Iterable[str]) -> List[tuple]:
+        """`select WHERE columna IN (...)`, en bloques para no exceder el límite de parámetros."""
+        ids = list(dict.fromkeys(ids))
+        filas: List[tuple] = []
+        for i in range(0, len(ids), _MAX_PARAMETROS):
+            bloque = ids[i:i + _MAX_PARAMETROS]
+            sql = f"{select} WHERE {columna} IN ({_marcadores(len(bloque))})"
+            filas.extend(self.consultar(sql, bloque))
+        return filas
+
+    def cerrar(self) -> None:
+        """Cierra las conexiones de todos los hilos."""
+        with self._lock:
+            for conexion in self._conexiones:
+                conexion.close()
+            self._conexiones.clear()
+        self._local = threading.local()
+
+
+class SQLiteVersionesColecciones:
+    """
+    Versiones de colecciones guardadas en la base (misma interfaz que
+    VersionesColecciones). Las incrementan triggers dentro de la transacción
+    de cada escritura, así todos los procesos que comparten el archivo ven
+    la misma versión (y emiten el mismo ETag) en cuanto la escritura se
+    confirma. `incrementar` no hace nada: la escritura ya la cambió.
+    """
+
+    _VERSION = "SELECT version FROM versiones WHERE coleccion = ?"
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def version(self, coleccion: str) -> int:
+        filas = self.db.consultar(self._VERSION, (coleccion,))
+        return filas[0][0] if filas else 0
+
+    def incrementar(self, *colecciones: str) -> None:
+        pass
+
+
+def _pagina(
+    filas: List[tuple],
+    limit: int,
+    convertir: Callable[[List[tuple]], list],
+    cursor_de: Callable[[tuple], str] = lambda fila: codificar_cursor(fila[-1]),
+) -> Pagina:
+    """
+    Arma una página a partir de `limit + 1` filas ordenadas.
+    Por defecto la última columna de cada fila es su seq, que se usa como
+    cursor (keyset); `cursor_de` permite otra posición, p. ej. (precio, seq).
+    """
+    hay_mas = len(filas) > limit
+    filas = filas[:limit]
+    siguiente = cursor_de(filas[-1]) if hay_mas else None
+    return Pagina(convertir(filas), siguiente)
+
+
+def _condiciones_catalogo(
+    alias: str,
+    condicion_disponible: str,
+    categoria_id: Optional[str],
+    precio_min: Optional[Decimal],
+    precio_max: Optional[Decimal],
+    solo_disponibles: bool,
+) -> Tuple[List[str], List]:
+    """Condiciones (y parámetros) de los filtros de catálogo de productos o servicios."""
+    condiciones, parametros = [], []
+    if categoria_id is not None:
+        condiciones.append(f"{alias}.categoria_id = ?")
+        parametros.append(categoria_id)
+    precio_min, precio_max = limites_enteros(precio_min, precio_max)  # COP enteros
+    if precio_min is not None:
+        condiciones.append(f"{alias}.precio >= ?")
+        parametros.append(precio_min)
+    if precio_max is not None:
+        condiciones.append(f"{alias}.precio <= ?")
+        parametros.append(precio_max)
+    if solo_disponibles:
+        condiciones.append(condicion_disponible)
+    return condiciones, parametros
+
+
+def _filtros_catalogo(
+    alias: str,
+    condicion_disponible: str,
+    cursor: Optional[str],
+    categoria_id: Optional[str],
+    precio_min: Optional[Decimal],
+    precio_max: Optional[Decimal],
+    orden: Optional[str],
+    solo_disponibles: bool,
+) -> Tuple[str, tuple]:
+    """
+    WHERE y ORDER BY de un listado de productos o servicios ordenado por
+    (precio, seq). Los índices (categoria_id, precio) y (precio) llevan el seq
+    implícito (rowid), así SQLite recorre el índice sin ordenar filas.
+    """
+    condiciones, parametros = _condiciones_catalogo(
+        alias, condicion_disponible, categoria_id, precio_min, precio_max, solo_disponibles
+    )
+    descendente = es_descendente(orden)
+    posicion = decodificar_posicion_precio(cursor)
+    if posicion is not None:
+        condiciones.append(f"({alias}.precio, {alias}.seq) {'<' if descendente else '>'} (?, ?)")
+        parametros.extend(posicion)
+
+    direccion = "DESC" if descendente else "ASC"
+    sql = (" WHERE " + " AND ".join(condiciones)) if condiciones else ""
+    sql += f" ORDER BY {alias}.precio {direccion}, {alias}.seq {direccion} LIMIT ?"
+    return sql, tuple(parametros)
+
+
+def _facetas_catalogo(
+    db: "SQLiteDatabase",
+    tabla: str,
+    alias: str,
+    categoria_id: Optional[str],
+    precio_min: Optional[Decimal],
+    precio_max: Optional[Decimal],
+    solo_disponibles: bool,
+) -> Facetas:
+    """
+    Facetas de productos o servicios por categoría, rango de precio (mismos
+    límites que el dominio) y disponibilidad. Sin filtro de precio se leen de
+    la tabla `facetas`; con él, una consulta agrupada cuenta las filas
+    filtradas. En ambos casos aquí solo se suman los grupos.
+    """
+    if precio_min is None and precio_max is None:
+        sql = (
+            "SELECT nullif(f.categoria_id, ''), c.nombre, f.rango, f.disponible, f.cantidad "
+            "FROM facetas f LEFT JOIN categorias c ON c.id = f.categoria_id WHERE f.tabla = ?"
+        )
+        parametros: Tuple = (tabla,)
+        if categoria_id is not None:
+            sql += " AND f.categoria_id = ?"
+            parametros += (categoria_id,)
+        if solo_disponibles:
+            sql += " AND f.disponible = 1"
+    else:
+        disponible = _DISPONIBLE[tabla].format(f=alias)
+        condiciones, parametros = _condiciones_catalogo(
+            alias, disponible, categoria_id, precio_min, precio_max, solo_disponibles
+        )
+        sql = (
+            f"SELECT {alias}.categoria_id, c.nombre, {_rango_precio(alias)}, {disponible}, "
+            f"COUNT(*) FROM {tabla} {alias} LEFT JOIN categorias c ON c.id = {alias}.categoria_id"
+        )
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += " GROUP BY 1, 3, 4"
+
+    categorias, nombres, precios, disponibles = Counter(), {}, Counter(), Counter()
+    for categoria, nombre, posicion, disponible, cantidad in db.consultar(sql, parametros):
+        categorias[categoria] += cantidad
+        if nombre is not None:
+            nombres[categoria] = nombre
+        precios[posicion] += cantidad
+        disponibles[bool(disponible)] += cantidad
+    return Facetas.desde_conteos(categorias, nombres, precios, disponibles)
+
+
+def _cursor_precio(fila: tuple) -> str:
+    """Cursor (precio, seq) de una fila de producto o servicio (precio en la columna 3)."""
+    return codificar_posicion_precio(fila[3], fila[-1])
+
+
+def _condiciones_exportacion(
+    columna_usuario: str,
+    columna_fecha: Optional[str],
+    usuario_ids: Optional[Iterable[str]],
+    desde: Optional[datetime],
+    hasta: Optional[datetime],
+) -> Tuple[List[str], List]:
+    """
+    Condiciones de usuario y rango [desde, hasta) de una exportación. Los ids
+    van como un solo parámetro JSON (json_each), sin límite de cantidad.
+    """
+    condiciones, parametros = [], []
+    if usuario_ids is not None:
+        condiciones.append(f"{columna_usuario} IN (SELECT value FROM json_each(?))")
+        parametros.append(json.dumps(list(usuario_ids)))
+    if columna_fecha is not None and desde is not None:
+        condiciones.append(f"{columna_fecha} >= ?")
+        parametros.append(desde.isoformat())
+    if columna_fecha is not None and hasta is not None:
+        condiciones.append(f"{columna_fecha} < ?")
+        parametros.append(hasta.isoformat())
+    return condiciones, parametros
+
+
+def _recorrer(
+    db: "SQLiteDatabase",
+    select: str,
+    alias: str,
+    condiciones: List[str],
+    parametros: List,
+    convertir: Callable[[List[tuple]], list],
+    lote: int,
+) -> Iterator:
+    """
+    Recorre por seq de a `lote` filas (keyset: cada lote es una consulta
+    corta por la clave primaria), así la memoria no depende del total y
+    ningún cursor queda abierto entre lotes. La última columna es el seq.
+    """
+    where = " AND ".join([f"{alias}.seq > ?", *condiciones])
+    sql = f"{select} WHERE {where} ORDER BY {alias}.seq LIMIT ?"
+    ultimo = 0
+    while True:
+        filas = db.consultar(sql, [ultimo, *parametros, lote])
+        if not filas:
+            return
+        ultimo = filas[-1][-1]
+        yield from convertir(filas)
+        if len(filas) < lote:
+            return
+
+
+# ============================================================================
+# Usuarios, categorías y unidades
+# ============================================================================
+
+_USUARIO_COLUMNAS = "u.id, u.nombre, u.email, u.apartamento, u.telefono"
+
+
+def _usuario(fila: tuple) -> Usuario:
+    # Las filas se escribieron desde entidades ya validadas: no se repite __post_init__
+    return construir_confiable(
+        Usuario, id=sys.intern(fila[0]), nombre=fila[1], email=fila[2],
+        apartamento=fila[3], telefono=fila[4],
+    )
+
+
+@contextmanager
+def _contactos_unicos(usuario: Optional[Usuario] = None):
+    """Traduce un choque de email o teléfono (índices únicos) a ResourceAlreadyExistsError."""
+    try:
+        yield
+    except sqlite3.IntegrityError as e:
+        for columna, campo in (("email", "email"), ("telefono", "teléfono")):
+            if f"usuarios.{columna}" in str(e):
+                mensaje = (
+                    f"Ya existe un usuario con el {campo} {getattr(usuario, columna)}."
+                    if usuario is not None else f"Ya existe un usuario con ese {campo}."
+                )
+                raise ResourceAlreadyExistsError(mensaje) from e
+        raise
+
+
+class SQLiteUsuarioRepository(RepositorioAsincrono):
+    """
+    Usuarios con índices únicos por email y teléfono (ux_usuarios_email,
+    ux_usuarios_telefono). En una base anterior con contactos repetidos los
+    índices se crean recién cuando se corrigen (ver _INDICES_UNICOS).
+    """
+
+    _UPSERT = (
+        "INSERT INTO usuarios (id, nombre, email, apartamento, telefono) "
+        "VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, email = excluded.email, "
+        "apartamento = excluded.apartamento, telefono = excluded.telefono"
+    )
+    _SELECT = f"SELECT {_USUARIO_COLUMNAS}, u.seq FROM usuarios u"
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    @staticmethod
+    def _fila(usuario: Usuario) -> tuple:
+        return (usuario.id, usuario.nombre, usuario.email, usuario.apartamento, usuario.telefono)
+
+    def add(self, usuario: Usuario):
+        with _contactos_unicos(usuario):
+            self.db.ejecutar(self._UPSERT, self._fila(usuario))
+
+    def add_many(self, usuarios: Iterable[Usuario]):
+        """Guarda el lote en una transacción: si un email o teléfono choca, no se guarda ninguno."""
+        with _contactos_unicos():
+            self.db.ejecutar_muchos(self._UPSERT, [self._fila(u) for u in usuarios])
+
+    def get(self, id: str) -> Optional[Usuario]:
+        filas = self.db.consultar(self._SELECT + " WHERE u.id = ?", (id,))
+        return _usuario(filas[0]) if filas else None
+
+    def get_by_email(self, email: str) -> Optional[Usuario]:
+        filas = self.db.consultar(self._SELECT + " WHERE u.email = ?", (normalizar_email(email),))
+        return _usuario(filas[0]) if filas else None
+
+    def get_by_telefono(self, telefono: str) -> Optional[Usuario]:
+        sql = self._SELECT + " WHERE u.telefono = ?"
+        filas = self.db.consultar(sql, (normalizar_telefono(telefono),))
+        return _usuario(filas[0]) if filas else None
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Usuario]:
+        return {f[0]: _usuario(f) for f in self.db.consultar_por_ids(self._SELECT, "u.id", ids)}
+
+    def get_many_by_email(self, emails: Iterable[str]) -> Dict[str, Usuario]:
+        """Busca varios emails a la vez: {email normalizado: usuario} de los registrados."""
+        filas = self.db.consultar_por_ids(self._SELECT, "u.email", map(normalizar_email, emails))
+        return {f[2]: _usuario(f) for f in filas}
+
+    def get_many_by_telefono(self, telefonos: Iterable[str]) -> Dict[str, Usuario]:
+        """Busca varios teléfonos a la vez: {teléfono normalizado: usuario} de los registrados."""
+        filas = self.db.consultar_por_ids(
+            self._SELECT, "u.telefono", map(normalizar_telefono, telefonos)
+        )
+        return {f[4]: _usuario(f) for f in filas}
+
+    def list_all(self) -> List[Usuario]:
+        return [_usuario(f) for f in self.db.consultar(self._SELECT + " ORDER BY u.seq")]
+
+    def list_page(self, cursor: Optional[str] = None, limit: int = 50) -> Pagina[Usuario]:
+        sql = self._SELECT + " WHERE u.seq > ? ORDER BY u.seq LIMIT ?"
+        filas = self.db.consultar(sql, (decodificar_entero(cursor), limit + 1))
+        return _pagina(filas, limit, lambda fs: [_usuario(f) for f in fs])
+
+
+_CATEGORIA_COLUMNAS = "c.id, c.nombre, c.descripcion"
+
+
+def _categoria(fila: tuple) -> Optional[Categoria]:
+    if fila[0] is None:
+        return None
+    return construir_confiable(
+        Categoria, id=sys.intern(fila[0]), nombre=sys.intern(fila[1]), descripcion=fila[2]
+    )
+
+
+class _Compartidos:
+    """
+    Una sola instancia por usuario y categoría dentro de un lote de filas:
+    los items de un mismo vendedor o categoría comparten la referencia en vez
+    de rehidratar una copia por fila.
+    """
+
+    def __init__(self):
+        self._usuarios: Dict[str, Usuario] = {}
+        self._categorias: Dict[str, Categoria] = {}
+
+    def usuario(self, fila: tuple) -> Usuario:
+        usuario = self._usuarios.get(fila[0])
+        if usuario is None:
+            usuario = self._usuarios[fila[0]] = _usuario(fila)
+        return usuario
+
+    def categoria(self, fila: tuple) -> Optional[Categoria]:
+        if fila[0] is None:
+            return None
+        categoria = self._categorias.get(fila[0])
+        if categoria is None:
+            categoria = self._categorias[fila[0]] = _categoria(fila)
+        return categoria
+
+
+class SQLiteCategoriaRepository(RepositorioAsincrono):
+    _UPSERT = (
+        "INSERT INTO categorias (id, nombre, descripcion) VALUES (?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, "
+        "descripcion = excluded.descripcion"
+    )
+    _SELECT = f"SELECT {_CATEGORIA_COLUMNAS}, c.seq FROM categorias c"
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def add(self, categoria: Categoria):
+        self.db.ejecutar(self._UPSERT, (categoria.id, categoria.nombre, categoria.descripcion))
+
+    def add_many(self, categorias: Iterable[Categoria]):
+        self.db.ejecutar_muchos(
+            self._UPSERT, [(c.id, c.nombre, c.descripcion) for c in categorias]
+        )
+
+    def get(self, id: str) -> Optional[Categoria]:
+        filas = self.db.consultar(self._SELECT + " WHERE c.id = ?", (id,))
+        return _categoria(filas[0]) if filas else None
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Categoria]:
+        return {f[0]: _categoria(f) for f in self.db.consultar_por_ids(self._SELECT, "c.id", ids)}
+
+    def list_all(self) -> List[Categoria]:
+        return [_categoria(f) for f in self.db.consultar(self._SELECT + " ORDER BY c.seq")]
+
+    def list_page(self, cursor: Optional[str] = None, limit: int = 50) -> Pagina[Categoria]:
+        sql = self._SELECT + " WHERE c.seq > ? ORDER BY c.seq LIMIT ?"
+        filas = self.db.consultar(sql, (decodificar_entero(cursor), limit + 1))
+        return _pagina(filas, limit, lambda fs: [_categoria(f) for f in fs])
+
+
+class SQLiteUnidadResidencialRepository(RepositorioAsincrono):
+    """Persiste la unidad y la lista de residentes (tabla unidad_residentes)."""
+
+    _UPSERT = (
+        "INSERT INTO unidades (id, nombre, direccion) VALUES (?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, direccion = excluded.direccion"
+    )
+    _BORRAR_RESIDENTES = "DELETE FROM unidad_residentes WHERE unidad_id = ?"
+    _INSERTAR_RESIDENTE = "INSERT INTO unidad_residentes (unidad_id, usuario_id) VALUES (?, ?)"
+    _SELECT = "SELECT id, nombre, direccion, seq FROM unidades"
+    _SELECT_RESIDENTES = (
+        f"SELECT {_USUARIO_COLUMNAS} FROM unidad_residentes r "
+        "JOIN usuarios u ON u.id = r.usuario_id WHERE r.unidad_id = ? ORDER BY r.seq"
+    )
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def add(self, unidad: UnidadResidencial):
+        with self.db.transaccion() as conexion:
+            conexion.execute(self._UPSERT, (unidad.id, unidad.nombre, unidad.direccion))
+            conexion.execute(self._BORRAR_RESIDENTES, (unidad.id,))
+            conexion.executemany(
+                self._INSERTAR_RESIDENTE, [(unidad.id, r.id) for r in unidad.residentes]
+            )
+
+    def _unidad(self, fila: tuple) -> UnidadResidencial:
+        residentes = self.db.consultar(self._SELECT_RESIDENTES, (fila[0],))
+        return construir_confiable(
+            UnidadResidencial, id=fila[0], nombre=fila[1], direccion=fila[2],
+            residentes=nuevos_residentes(_usuario(r) for r in residentes),
+        )
+
+    def get(self, id: str) -> Optional[UnidadResidencial]:
+        filas = self.db.consultar(self._SELECT + " WHERE id = ?", (id,))
+        return self._unidad(filas[0]) if filas else None
+
+    def list_all(self) -> List[UnidadResidencial]:
+        return [self._unidad(f) for f in self.db.consultar(self._SELECT + " ORDER BY seq")]
+
+    def list_page(
+        self, cursor: Optional[str] = None, limit: int = 50
+    ) -> Pagina[UnidadResidencial]:
+        sql = self._SELECT + " WHERE seq > ? ORDER BY seq LIMIT ?"
+        filas = self.db.consultar(sql, (decodificar_entero(cursor), limit + 1))
+        return _pagina(filas, limit, lambda fs: [self._unidad(f) for f in fs])
+
+
+# ============================================================================
+# Productos y servicios (el vendedor y la categoría se cargan con JOIN)
+# ============================================================================
+
+class SQLiteProductoRepository(RepositorioAsincrono):
+    _UPSERT = (
+        "INSERT INTO productos "
+        "(id, nombre, descripcion, precio, stock, vendedor_id, categoria_id, imagenes, "
+        "fecha_publicacion) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, "
+        "descripcion = excluded.descripcion, precio = excluded.precio, "
+        "stock = excluded.stock, vendedor_id = excluded.vendedor_id, "
+        "categoria_id = excluded.categoria_id, imagenes = excluded.imagenes"
+    )
+    _SELECT = (
+        "SELECT p.id, p.nombre, p.descripcion, p.precio, p.stock, p.imagenes, "
+        f"{_USUARIO_COLUMNAS}, {_CATEGORIA_COLUMNAS}, p.fecha_publicacion, p.seq "
+        "FROM productos p JOIN usuarios u ON u.id = p.vendedor_id "
+        "LEFT JOIN categorias c ON c.id = p.categoria_id"
+    )
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+        self._observadores: List[Callable[[Producto], None]] = []
+
+    def suscribir(self, observador: Callable[[Producto], None]) -> None:
+        """
+        Recibe cada producto guardado por este repositorio (no los de otros
+        procesos), recién cuando la escritura se confirma.
+        """
+        self._observadores.append(observador)
+
+    def _notificar(self, productos: List[Producto]) -> None:
+        for observador in self._observadores:
+            for producto in productos:
+                observador(producto)
+
+    @staticmethod
+    def _producto(fila: tuple, compartidos: _Compartidos) -> Producto:
+        return construir_confiable(
+            Producto,
+            id=fila[0],
+            nombre=fila[1],
+            descripcion=fila[2],
+            precio=Dinero(fila[3]),
+            stock=fila[4],
+            imagenes=tuple(json.loads(fila[5])),
+            vendedor=compartidos.usuario(fila[6:11]),
+            categoria=compartidos.categoria(fila[11:14]),
+            fecha_publicacion=datetime.fromisoformat(fila[14]),
+        )
+
+    @staticmethod
+    def _fila(producto: Producto) -> tuple:
+        return (
+            producto.id,
+            producto.nombre,
+            producto.descripcion,
+            int(producto.precio),
+            producto.stock,
+            producto.vendedor.id,
+            producto.categoria.id if producto.categoria else None,
+            json.dumps(list(producto.imagenes)),
+            producto.fecha_publicacion.isoformat(),
+        )
+
+    def _convertir(self, filas: List[tuple]) -> List[Producto]:
+        compartidos = _Compartidos()
+        return [self._producto(f, compartidos) for f in filas]
+
+    def add(self, producto: Producto):
+        self.add_many([producto])
+
+    def add_many(self, productos: Iterable[Producto]):
+        productos = list(productos)
+        self.db.ejecutar_muchos(self._UPSERT, [self._fila(p) for p in productos])
+        if self._observadores:
+            self.db.al_confirmar(lambda: self._notificar(productos))
+
+    def comparar_y_fijar_stock(self, producto_id: str, esperado: int, nuevo: int) -> bool:
+        """
+        Fija el stock en `nuevo` solo si todavía es `esperado` (compare-and-set
+        con un UPDATE condicional). Retorna False si otra escritura lo cambió
+        antes (o el producto no existe): quien llama vuelve a leer y reintenta.
+        Los observadores reciben el producto releído tras el COMMIT.
+        """
+        sql = "UPDATE productos SET stock = ? WHERE id = ? AND stock = ?"
+        if not self.db.ejecutar(sql, (nuevo, producto_id, esperado)):
+            return False
+        if self._observadores:
+            self.db.al_confirmar(lambda: self._notificar([self.get(producto_id)]))
+        return True
+
+    def get(self, id: str) -> Optional[Producto]:
+        filas = self.db.consultar(self._SELECT + " WHERE p.id = ?", (id,))
+        return self._convertir(filas)[0] if filas else None
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Producto]:
+        filas = self.db.consultar_por_ids(self._SELECT, "p.id", ids)
+        return {p.id: p for p in self._convertir(filas)}
+
+    def list_all(self) -> List[Producto]:
+        return self._convertir(self.db.consultar(self._SELECT + " ORDER BY p.seq"))
+
+    def list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        orden: Optional[str] = None,
+        solo_disponibles: bool = False,
+    ) -> Pagina[Producto]:
+        """
+        Sin filtros pagina por seq. Con categoría, rango de precio, `orden` o
+        `solo_disponibles` ordena por (precio, seq) usando los índices de precio.
+        """
+        if (categoria_id is None and precio_min is None and precio_max is None
+                and orden is None and not solo_disponibles):
+            sql = self._SELECT + " WHERE p.seq > ? ORDER BY p.seq LIMIT ?"
+            filas = self.db.consultar(sql, (decodificar_entero(cursor), limit + 1))
+            return _pagina(filas, limit, self._convertir)
+
+        filtros, parametros = _filtros_catalogo(
+            "p", "p.stock > 0", cursor, categoria_id, precio_min, precio_max, orden, solo_disponibles
+        )
+        filas = self.db.consultar(self._SELECT + filtros, parametros + (limit + 1,))
+        return _pagina(filas, limit, self._convertir, _cursor_precio)
+
+    def iterar(
+        self,
+        usuario_ids: Optional[Iterable[str]] = None,
+        categoria_id: Optional[str] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        lote: int = 1000,
+    ) -> Iterator[Producto]:
+        """Productos de esos vendedores, categoría y publicados en [desde, hasta), por lotes."""
+        condiciones, parametros = _condiciones_exportacion(
+            "p.vendedor_id", "p.fecha_publicacion", usuario_ids, desde, hasta
+        )
+        if categoria_id is not None:
+            condiciones.append("p.categoria_id = ?")
+            parametros.append(categoria_id)
+        return _recorrer(self.db, self._SELECT, "p", condiciones, parametros, self._convertir, lote)
+
+    def facetas(
+        self,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        solo_disponibles: bool = False,
+    ) -> Facetas:
+        """Conteos por categoría, rango de precio y disponibilidad de los productos filtrados."""
+        return _facetas_catalogo(
+            self.db, "productos", "p", categoria_id, precio_min, precio_max, solo_disponibles,
+        )
+
+
+class SQLiteServicioRepository(RepositorioAsincrono):
+    _UPSERT = (
+        "INSERT INTO servicios "
+        "(id, nombre, descripcion, precio, disponible, proveedor_id, categoria_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET nombre = excluded.nombre, "
+        "descripcion = excluded.descripcion, precio = excluded.precio, "
+        "disponible = excluded.disponible, proveedor_id = excluded.proveedor_id, "
+        "categoria_id = excluded.categoria_id"
+    )
+    _SELECT = (
+        "SELECT s.id, s.nombre, s.descripcion, s.precio, s.disponible, "
+        f"{_USUARIO_COLUMNAS}, {_CATEGORIA_COLUMNAS}, s.seq "
+        "FROM servicios s JOIN usuarios u ON u.id = s.proveedor_id "
+        "LEFT JOIN categorias c ON c.id = s.categoria_id"
+    )
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    @staticmethod
+    def _servicio(fila: tuple, compartidos: _Compartidos) -> Servicio:
+        return construir_confiable(
+            Servicio,
+            id=fila[0],
+            nombre=fila[1],
+            descripcion=fila[2],
+            precio=Dinero(fila[3]),
+            disponible=bool(fila[4]),
+            proveedor=compartidos.usuario(fila[5:10]),
+            categoria=compartidos.categoria(fila[10:13]),
+        )
+
+    @staticmethod
+    def _fila(servicio: Servicio) -> tuple:
+        return (
+            servicio.id,
+            servicio.nombre,
+            servicio.descripcion,
+            int(servicio.precio),
+            int(servicio.disponible),
+            servicio.proveedor.id,
+            servicio.categoria.id if servicio.categoria else None,
+        )
+
+    def _convertir(self, filas: List[tuple]) -> List[Servicio]:
+        compartidos = _Compartidos()
+        return [self._servicio(f, compartidos) for f in filas]
+
+    def add(self, servicio: Servicio):
+        self.db.ejecutar(self._UPSERT, self._fila(servicio))
+
+    def add_many(self, servicios: Iterable[Servicio]):
+        self.db.ejecutar_muchos(self._UPSERT, [self._fila(s) for s in servicios])
+
+    def fijar_disponibilidad(self, servicio_id: str, disponible: bool) -> Optional[Servicio]:
+        """Marca el servicio como disponible o no. Retorna el servicio, o None si no existe."""
+        sql = "UPDATE servicios SET disponible = ? WHERE id = ?"
+        if not self.db.ejecutar(sql, (int(disponible), servicio_id)):
+            return None
+        return self.get(servicio_id)
+
+    def get(self, id: str) -> Optional[Servicio]:
+        filas = self.db.consultar(self._SELECT + " WHERE s.id = ?", (id,))
+        return self._convertir(filas)[0] if filas else None
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Servicio]:
+        filas = self.db.consultar_por_ids(self._SELECT, "s.id", ids)
+        return {s.id: s for s in self._convertir(filas)}
+
+    def list_all(self) -> List[Servicio]:
+        return self._convertir(self.db.consultar(self._SELECT + " ORDER BY s.seq"))
+
+    def list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        orden: Optional[str] = None,
+        solo_disponibles: bool = False,
+    ) -> Pagina[Servicio]:
+        """
+        Sin filtros pagina por seq. Con categoría, rango de precio, `orden` o
+        `solo_disponibles` ordena por (precio, seq) usando los índices de precio.
+        """
+        if (categoria_id is None and precio_min is None and precio_max is None
+                and orden is None and not solo_disponibles):
+            sql = self._SELECT + " WHERE s.seq > ? ORDER BY s.seq LIMIT ?"
+            filas = self.db.consultar(sql, (decodificar_entero(cursor), limit + 1))
+            return _pagina(filas, limit, self._convertir)
+
+        filtros, parametros = _filtros_catalogo(
+            "s", "s.disponible = 1", cursor, categoria_id, precio_min, precio_max, orden, solo_disponibles
+        )
+        filas = self.db.consultar(self._SELECT + filtros, parametros + (limit + 1,))
+        return _pagina(filas, limit, self._convertir, _cursor_precio)
+
+    def iterar(
+        self,
+        usuario_ids: Optional[Iterable[str]] = None,
+        categoria_id: Optional[str] = None,
+        lote: int = 1000,
+    ) -> Iterator[Servicio]:
+        """Servicios de esos proveedores y categoría, por lotes (no tienen fecha)."""
+        condiciones, parametros = _condiciones_exportacion(
+            "s.proveedor_id", None, usuario_ids, None, None
+        )
+        if categoria_id is not None:
+            condiciones.append("s.categoria_id = ?")
+            parametros.append(categoria_id)
+        return _recorrer(self.db, self._SELECT, "s", condiciones, parametros, self._convertir, lote)
+
+    def facetas(
+        self,
+        categoria_id: Optional[str] = None,
+        precio_min: Optional[Decimal] = None,
+        precio_max: Optional[Decimal] = None,
+        solo_disponibles: bool = False,
+    ) -> Facetas:
+        """Conteos por categoría, rango de precio y disponibilidad de los servicios filtrados."""
+        return _facetas_catalogo(
+            self.db, "servicios", "s", categoria_id, precio_min, precio_max, solo_disponibles,
+        )
+
+
+# ============================================================================
+# Consultas (índices por comprador, vendedor e item)
+# ============================================================================
+
+class SQLiteConsultaRepository(RepositorioAsincrono):
+    """
+    Guarda ids de comprador, vendedor e item; al leer, los items de una página
+    se cargan en una sola consulta por tipo. Volver a guardar una consulta no
+    toca su estado: solo lo cambia un UPDATE condicional
+    (`comparar_y_fijar_estado`), así un proceso no pisa la transición de otro.
+    """
+
+    _UPSERT = (
+        "INSERT INTO consultas "
+        "(id, comprador_id, vendedor_id, item_id, item_type, mensaje, fecha, estado) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET mensaje = excluded.mensaje"
+    )
+    _SELECT = (
+        "SELECT k.id, k.item_id, k.item_type, k.mensaje, k.fecha, k.estado, "
+        f"{_USUARIO_COLUMNAS}, k.seq "
+        "FROM consultas k JOIN usuarios u ON u.id = k.comprador_id"
+    )
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+        self._productos = SQLiteProductoRepository(db)
+        self._servicios = SQLiteServicioRepository(db)
+
+    def add(self, consulta: Consulta):
+        item_type = "producto" if isinstance(consulta.item, Producto) else "servicio"
+        self.db.ejecutar(
+            self._UPSERT,
+            (
+                consulta.id,
+                consulta.comprador.id,
+                consulta.vendedor.id,
+                consulta.item.id,
+                item_type,
+                consulta.mensaje,
+                consulta.fecha.isoformat(),
+                consulta.estado.value,
+            ),
+        )
+
+    def comparar_y_fijar_estado(
+        self, consulta_id: str, esperado: EstadoConsulta, nuevo: EstadoConsulta
+    ) -> bool:
+        """Cambia el estado solo si todavía es `esperado` (compare-and-set)."""
+        sql = "UPDATE consultas SET estado = ? WHERE id = ? AND estado = ?"
+        return bool(self.db.ejecutar(sql, (nuevo.value, consulta_id, esperado.value)))
+
+    def _consultas(self, filas: List[tuple]) -> List[Consulta]:
+        productos = self._productos.get_many(f[1] for f in filas if f[2] == "producto")
+        servicios = self._servicios.get_many(f[1] for f in filas if f[2] == "servicio")
+        compartidos = _Compartidos()
+        consultas = []
+        for fila in filas:
+            item = (productos if fila[2] == "producto" else servicios).get(fila[1])
+            if item is None:
+                continue  # El item ya no existe en el almacén
+            consultas.append(
+                construir_confiable(
+                    Consulta,
+                    id=fila[0],
+                    comprador=compartidos.usuario(fila[6:11]),
+                    item=item,
+                    mensaje=fila[3],
+                    fecha=datetime.fromisoformat(fila[4]),
+                    estado=EstadoConsulta(fila[5]),
+                )
+            )
+        return consultas
+
+    def get(self, id: str) -> Optional[Consulta]:
+        consultas = self._consultas(self.db.consultar(self._SELECT + " WHERE k.id = ?", (id,)))
+        return consultas[0] if consultas else None
+
+    def list_all(self) -> List[Consulta]:
+        return self._consultas(self.db.consultar(self._SELECT + " ORDER BY k.seq"))
+
+    def list_by_comprador(self, comprador_id: str) -> List[Consulta]:
+        sql = self._SELECT + " WHERE k.comprador_id = ? ORDER BY k.seq"
+        return self._consultas(self.db.consultar(sql, (comprador_id,)))
+
+    def list_by_vendedor(self, vendedor_id: str) -> List[Consulta]:
+        sql = self._SELECT + " WHERE k.vendedor_id = ? ORDER BY k.seq"
+        return self._consultas(self.db.consultar(sql, (vendedor_id,)))
+
+    def list_by_item(self, item_id: str) -> List[Consulta]:
+        sql = self._SELECT + " WHERE k.item_id = ? ORDER BY k.seq"
+        return self._consultas(self.db.consultar(sql, (item_id,)))
+
+    def list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        comprador_id: Optional[str] = None,
+        vendedor_id: Optional[str] = None,
+    ) -> Pagina[Consulta]:
+        """Página de consultas, opcionalmente restringida por comprador o vendedor."""
+        condiciones, parametros = ["k.seq > ?"], [decodificar_entero(cursor)]
+        if vendedor_id is not None:
+            condiciones.append("k.vendedor_id = ?")
+            parametros.append(vendedor_id)
+        elif comprador_id is not None:
+            condiciones.append("k.comprador_id = ?")
+            parametros.append(comprador_id)
+        sql = f"{self._SELECT} WHERE {' AND '.join(condiciones)} ORDER BY k.seq LIMIT ?"
+        filas = self.db.consultar(sql, parametros + [limit + 1])
+        return _pagina(filas, limit, self._consultas)
+
+    def list_nuevas(
+        self, vendedor_id: str, cursor: Optional[str] = None, limit: int = 50
+    ) -> Pagina[Consulta]:
+        """
+        Consultas recibidas por el vendedor después de `cursor` (buzón).
+        A diferencia de `list_page` el cursor siguiente siempre está: sin
+        consultas nuevas es el mismo, para volver a preguntar desde ahí.
+        """
+        desde = decodificar_entero(cursor)
+        sql = self._SELECT + " WHERE k.vendedor_id = ? AND k.seq > ? ORDER BY k.seq LIMIT ?"
+        filas = self.db.consultar(sql, (vendedor_id, desde, limit))
+        return Pagina(self._consultas(filas), codificar_cursor(filas[-1][-1] if filas else desde))
+
+    async def alist_nuevas(
+        self, vendedor_id: str, cursor: Optional[str] = None, limit: int = 50
+    ) -> Pagina[Consulta]:
+        return await self._acorrer(self.list_nuevas, vendedor_id, cursor, limit)
+
+    def iterar(
+        self,
+        usuario_ids: Optional[Iterable[str]] = None,
+        categoria_id: Optional[str] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        lote: int = 1000,
+    ) -> Iterator[Consulta]:
+        """
+        Consultas sobre items de esos vendedores, de esa categoría de item y
+        registradas en [desde, hasta), por lotes.
+        """
+        condiciones, parametros = _condiciones_exportacion(
+            "k.vendedor_id", "k.fecha", usuario_ids, desde, hasta
+        )
+        if categoria_id is not None:
+            condiciones.append(
+                "k.item_id IN (SELECT id FROM productos WHERE categoria_id = ? "
+                "UNION ALL SELECT id FROM servicios WHERE categoria_id = ?)"
+            )
+            parametros.extend((categoria_id, categoria_id))
+        return _recorrer(self.db, self._SELECT, "k", condiciones, parametros, self._consultas, lote)
+
+
+# ============================================================================
+# Reservas
+# ============================================================================
+
+@contextmanager
+def _reserva_unica(reserva: Optional[Reserva] = None):
+    """Traduce un choque en ux_reservas_activa_consulta a ResourceAlreadyExistsError."""
+    try:
+        yield
+    except sqlite3.IntegrityError as e:
+        if "reservas.consulta_id" in str(e):
+            consulta = f" {reserva.consulta_id}" if reserva is not None else ""
+            raise ResourceAlreadyExistsError(
+                f"La consulta{consulta} ya tiene una reserva activa."
+            ) from e
+        raise
+
+
+class SQLiteReservaRepository(RepositorioAsincrono):
+    """
+    Reservas de stock. El estado solo cambia con un UPDATE condicional
+    (`comparar_y_fijar_estado`), así dos procesos nunca aplican dos
+    transiciones a la misma reserva. El índice único parcial
+    ux_reservas_activa_consulta impide dos reservas activas de una consulta.
+    """
+
+    _UPSERT = (
+        "INSERT INTO reservas (id, consulta_id, producto_id, cantidad, vence, estado) "
+        "VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET vence = excluded.vence, estado = excluded.estado"
+    )
+    _SELECT = "SELECT id, consulta_id, producto_id, cantidad, vence, estado, seq FROM reservas"
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    @staticmethod
+    def _reserva(fila: tuple) -> Reserva:
+        return construir_confiable(
+            Reserva, id=fila[0], consulta_id=fila[1], producto_id=fila[2], cantidad=fila[3],
+            vence=datetime.fromisoformat(fila[4]), estado=EstadoReserva(fila[5]),
+        )
+
+    @staticmethod
+    def _fila(reserva: Reserva) -> tuple:
+        return (reserva.id, reserva.consulta_id, reserva.producto_id, reserva.cantidad,
+                reserva.vence.isoformat(), reserva.estado.value)
+
+    def add(self, reserva: Reserva):
+        """
+        Raises:
+            ResourceAlreadyExistsError: Si la consulta ya tiene otra reserva activa.
+        """
+        with _reserva_unica(reserva):
+            self.db.ejecutar(self._UPSERT, self._fila(reserva))
+
+    def add_many(self, reservas: Iterable[Reserva]):
+        with _reserva_unica():
+            self.db.ejecutar_muchos(self._UPSERT, [self._fila(r) for r in reservas])
+
+    def get(self, id: str) -> Optional[Reserva]:
+        filas = self.db.consultar(self._SELECT + " WHERE id = ?", (id,))
+        return self._reserva(filas[0]) if filas else None
+
+    def get_activa_por_consulta(self, consulta_id: str) -> Optional[Reserva]:
+        sql = self._SELECT + " WHERE consulta_id = ? AND estado = 'activa' LIMIT 1"
+        filas = self.db.consultar(sql, (consulta_id,))
+        return self._reserva(filas[0]) if filas else None
+
+    def list_activas(self) -> List[Reserva]:
+        sql = self._SELECT + " WHERE estado = 'activa' ORDER BY vence"
+        return [self._reserva(f) for f in self.db.consultar(sql)]
+
+    def list_all(self) -> List[Reserva]:
+        return [self._reserva(f) for f in self.db.consultar(self._SELECT + " ORDER BY seq")]
+
+    def comparar_y_fijar_estado(
+        self, reserva_id: str, esperado: EstadoReserva, nuevo: EstadoReserva
+    ) -> bool:
+        """Cambia el estado solo si todavía es `esperado` (compare-and-set)."""
+        sql = "UPDATE reservas SET estado = ? WHERE id = ? AND estado = ?"
+        return bool(self.db.ejecutar(sql, (nuevo.value, reserva_id, esperado.value)))
+
+
+# ============================================================================
+# Outbox
+# ============================================================================
+
+class SQLiteOutboxRepository:
+    """
+    Outbox en la misma base que las entidades: si el `add` se hace dentro de
+    `db.transaccion()`, evento y entidad se confirman (o descartan) juntos.
+
+    Varios procesos comparten la tabla: `reclamar` marca el lote con su dueño
+    y vencimiento en una sola transacción, así cada evento lo entrega un solo
+    relay mientras el reclamo esté vigente. Los entregados se borran.
+    """
+
+    _INSERT = (
+        "INSERT INTO outbox (id, tipo, destino, titulo, creado, intentos) "
+        "VALUES (?, ?, ?, ?, ?, ?)"
+    )
+    _PENDIENTES = (
+        "SELECT id, tipo, destino, titulo, creado, intentos FROM outbox "
+        "WHERE entregado = 0 AND intentos < ? ORDER BY seq LIMIT ?"
+    )
+    _RECLAMAR = (
+        "UPDATE outbox SET reclamado_por = ?, reclamado_hasta = ? WHERE seq IN ("
+        "SELECT seq FROM outbox WHERE entregado = 0 AND intentos < ? "
+        "AND (reclamado_hasta IS NULL OR reclamado_hasta <= ?) ORDER BY seq LIMIT ?)"
+    )
+    _RECLAMADOS = (
+        "SELECT id, tipo, destino, titulo, creado, intentos FROM outbox "
+        "WHERE entregado = 0 AND reclamado_por = ? AND reclamado_hasta = ? ORDER BY seq"
+    )
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+        # Bases anteriores marcaban los entregados en vez de borrarlos
+        db.ejecutar("DELETE FROM outbox WHERE entregado = 1")
+
+    @staticmethod
+    def _evento(fila: tuple) -> EventoOutbox:
+        return EventoOutbox(
+            id=fila[0], tipo=fila[1], destino=fila[2], titulo=fila[3],
+            creado=datetime.fromisoformat(fila[4]), intentos=fila[5],
+        )
+
+    @staticmethod
+    def _fila(evento: EventoOutbox) -> tuple:
+        return (evento.id, evento.tipo, evento.destino, evento.titulo,
+                evento.creado.isoformat(), evento.intentos)
+
+    def add(self, evento: EventoOutbox):
+        self.db.ejecutar(self._INSERT, self._fila(evento))
+
+    def add_many(self, eventos: Iterable[EventoOutbox]):
+        self.db.ejecutar_muchos(self._INSERT, [self._fila(e) for e in eventos])
+
+    def pendientes(self, limit: int = 100, max_intentos: Optional[int] = None) -> List[EventoOutbox]:
+        """Pendientes en orden de llegada; con `max_intentos`, sin los apartados."""
+        tope = sys.maxsize if max_intentos is None else max_intentos
+        return [self._evento(f) for f in self.db.consultar(self._PENDIENTES, (tope, limit))]
+
+    def reclamar(
+        self, dueno: str, limit: int = 100, max_intentos: Optional[int] = None, duracion: float = 60.0
+    ) -> List[EventoOutbox]:
+        """Reserva para `dueno`, por `duracion` segundos, hasta `limit` pendientes libres."""
+        tope = sys.maxsize if max_intentos is None else max_intentos
+        ahora = time.time()
+        hasta = ahora + duracion
+        with self.db.transaccion() as conexion:
+            conexion.execute(self._RECLAMAR, (dueno, hasta, tope, ahora, limit))
+            filas = conexion.execute(self._RECLAMADOS, (dueno, hasta)).fetchall()
+        return [self._evento(f) for f in filas]
+
+    def marcar_entregados(self, ids: Iterable[str]) -> None:
+        ids = list(ids)
+        if ids:
+            self.db.ejecutar(f"DELETE FROM outbox WHERE id IN ({_marcadores(len(ids))})", ids)
+
+    def registrar_fallo(self, ids: Iterable[str], espera: float = 0.0) -> None:
+        """Suma un intento y libera el reclamo; el evento vuelve a estar libre en `espera` segundos."""
+        ids = list(ids)
+        if ids:
+            self.db.ejecutar(
+                "UPDATE outbox SET intentos = intentos + 1, reclamado_por = NULL, "
+                f"reclamado_hasta = ? WHERE id IN ({_marcadores(len(ids))})",
+                [time.time() + espera, *ids],
+            )
@@ -0,0 +1,37 @@
+"""
+Versiones de colecciones para validar cachés de respuestas HTTP.
+
+Los servicios incrementan la versión de una colección después de confirmar
+una escritura que cambia sus listados (alta, stock, disponibilidad). Mientras
+la versión no cambie, un listado renderizado sigue siendo válido: la interfaz
+lo sirve desde caché y responde 304 a los clientes que ya lo tienen.
+"""
+
+import threading
+from typing import Dict
+
+
+class VersionesColecciones:
+    """
+    Contador de versión por nombre de colección ("productos", "categorias"...).
+
+    Los contadores viven en el proceso: sirven para los repositorios en
+    memoria, que tampoco se comparten. Con SQLite se usa
+    SQLiteVersionesColecciones, guardada en la base. Con un `inicial` distinto
+    en cada arranque (p. ej. aleatorio), un ETag emitido antes de reiniciar no
+    coincide por casualidad con uno nuevo.
+    """
+
+    def __init__(self, inicial: int = 0):
+        self._inicial = inicial
+        self._versiones: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, coleccion: str) -> int:
+        return self._versiones.get(coleccion, self._inicial)
+
+    def incrementar(self, *colecciones: str) -> None:
+        """Invalida lo renderizado de esas colecciones; llamar después de confirmar la escritura."""
+        with self._lock:
+            for coleccion in colecciones:
+                self._versiones[coleccion] = self._versiones.get(coleccion, self._inicial) + 1
@@ -0,0 +1,105 @@
+"""
+Caché HTTP de los listados del catálogo: ETag fuerte, GET condicional y bytes renderizados.
+
+El ETag sale de la versión de la colección (ver VersionesColecciones) y de la
+consulta, así que se calcula sin tocar el repositorio: un cliente que repite
+el pedido con `If-None-Match` recibe 304 sin serializar nada. Si el ETag no
+coincide pero otro cliente ya pidió lo mismo en esa versión, la respuesta sale
+de los bytes JSON ya renderizados.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from ..infrastructure.versiones import VersionesColecciones
+
+
+class CacheRespuestas:
+    """LRU de respuestas renderizadas: clave → (bytes, content type)."""
+
+    def __init__(self, tamano: int = 512):
+        self.tamano = tamano
+        self._entradas: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+            return entrada
+
+    def guardar(self, clave: str, contenido: bytes, tipo: str) -> None:
+        with self._lock:
+            self._entradas[clave] = (contenido, tipo)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.tamano:
+                self._entradas.popitem(last=False)
+
+
+def _etag(coleccion: str, version: int, request) -> str:
+    """ETag fuerte: colección, versión, formato y parámetros (sin importar su orden)."""
+    consulta = "&".join(
+        f"{clave}={valor}"
+        for clave, valores in sorted(request.query_params.lists())
+        for valor in valores
+    )
+    huella = f"{coleccion}:{version}:{request.accepted_media_type}:{consulta}"
+    return '"' + hashlib.sha1(huella.encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    """`If-None-Match` usa comparación débil: se ignora el prefijo W/."""
+    candidatos = (c.strip() for c in if_none_match.split(","))
+    return any(c == "*" or c.removeprefix("W/") == etag for c in candidatos)
+
+
+def _con_validadores(respuesta, etag: str):
+    respuesta["ETag"] = etag
+    # El cliente puede guardar la respuesta pero debe revalidarla en cada uso
+    respuesta["Cache-Control"] = "no-cache"
+    return respuesta
+
+
+def responder_cacheado(
+    vista,
+    request,
+    coleccion: str,
+    versiones: VersionesColecciones,
+    cache: CacheRespuestas,
+    listar: Callable[[], Response],
+):
+    """
+    Responde un GET de listado con validación por ETag.
+
+    304 si `If-None-Match` coincide; si no, los bytes en caché para la misma
+    versión y consulta, o `listar()` renderizado y guardado. Solo se cachean
+    respuestas 200 en JSON: el HTML de la API navegable depende del usuario.
+    """
+    etag = _etag(coleccion, versiones.version(coleccion), request)
+    if _coincide(request.headers.get("If-None-Match", ""), etag):
+        return _con_validadores(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+    if request.accepted_renderer.format != "json":
+        return listar()
+
+    entrada = cache.get(etag)
+    if entrada is None:
+        respuesta = listar()
+        if respuesta.status_code != status.HTTP_200_OK:
+            return respuesta
+        respuesta.accepted_renderer = request.accepted_renderer
+        respuesta.accepted_media_type = request.accepted_media_type
+        respuesta.renderer_context = vista.get_renderer_context()
+        respuesta.render()
+        entrada = (respuesta.content, respuesta["Content-Type"])
+        cache.guardar(etag, *entrada)
+
+    contenido, tipo = entrada
+    return _con_validadores(HttpResponse(contenido, content_type=tipo), etag)
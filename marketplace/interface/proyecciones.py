@@ -0,0 +1,234 @@
+"""
+Proyecciones compiladas: salida de listados sin la maquinaria de campos de DRF.
+
+Un serializer DRF con `many=True` resuelve, fila por fila y campo por campo,
+el `source` con puntos (`vendedor.id`, `categoria.nombre`, `estado.value`) y
+despacha `to_representation`. Una Proyeccion lee una vez los campos del
+serializer de salida y genera una función que arma el diccionario de cada
+entidad con accesos directos a atributos: mismo JSON, una fracción del costo.
+RenderizadorJSONRapido lo codifica con orjson cuando está instalado.
+
+Una proyección puede limitarse a algunos campos (`?fields=`) y los listados
+pueden embeber recursos relacionados (`?expand=`): `expandir` los busca con
+un solo `get_many` por repositorio para toda la página, no uno por fila.
+
+orjson es opcional (ver requirements.txt): sin él se usa el JSONRenderer de DRF.
+"""
+
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple, Type
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+from rest_framework import serializers
+from rest_framework.utils import encoders
+from rest_framework.fields import empty
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+# Campos cuya representación es una conversión de tipo: se emite en línea
+_CONVERSIONES = {
+    serializers.CharField.to_representation: "str",
+    serializers.IntegerField.to_representation: "int",
+    serializers.BooleanField.to_representation: "bool",
+}
+
+
+class Proyeccion:
+    """
+    Versión compilada, solo lectura, de un serializer de salida.
+
+    Produce lo mismo que `serializer_class(entidades, many=True).data` para
+    entidades de dominio (atributos y propiedades, no métodos). Como en DRF,
+    un valor `None` da `null` y un `None` a mitad del `source` (p. ej. un
+    producto sin categoría en `categoria.nombre`) omite la clave. Los campos
+    que no son conversiones simples usan el `to_representation` del campo.
+    Con `incluir` solo se emiten esos campos, en el orden del serializer.
+    """
+
+    def __init__(
+        self,
+        serializer_class: Type[serializers.Serializer],
+        incluir: Optional[FrozenSet[str]] = None,
+    ):
+        self.serializer_class = serializer_class
+        legibles = [c for c in serializer_class().fields.values() if not c.write_only]
+        if incluir is not None:
+            legibles = [c for c in legibles if c.field_name in incluir]
+        self.campos: Tuple[str, ...] = tuple(c.field_name for c in legibles)
+        self._proyectar = self._compilar(legibles)
+
+    @staticmethod
+    def _compilar(campos) -> Callable[[Any], Dict[str, Any]]:
+        lineas = ["def proyectar(o):", "    d = {}"]
+        entorno: Dict[str, Any] = {}
+        for i, campo in enumerate(campos):
+            if campo.source == "*":
+                raise ValueError(f"Proyeccion no soporta source='*' ({campo.field_name}).")
+            conversion = _CONVERSIONES.get(type(campo).to_representation)
+            if conversion is None:
+                conversion = f"_c{i}"
+                entorno[conversion] = campo.to_representation
+            clave = repr(campo.field_name)
+            *intermedios, final = campo.source.split(".")
+            sangria, ruta = "    ", "o"
+            for atributo in intermedios:
+                lineas.append(f"{sangria}v = {ruta}.{atributo}")
+                if campo.allow_null or campo.default is not empty:
+                    entorno[f"_d{i}"] = None if campo.default is empty else campo.get_default
+                    faltante = "None" if campo.default is empty else f"_d{i}()"
+                    lineas.append(f"{sangria}if v is None: d[{clave}] = {faltante}")
+                    lineas.append(f"{sangria}else:")
+                else:
+                    # DRF omite la clave si el source se corta en un None intermedio
+                    lineas.append(f"{sangria}if v is not None:")
+                sangria, ruta = sangria + "    ", "v"
+            lineas.append(f"{sangria}v = {ruta}.{final}")
+            lineas.append(f"{sangria}d[{clave}] = None if v is None else {conversion}(v)")
+        lineas.append("    return d")
+        exec("\n".join(lineas), entorno)
+        return entorno["proyectar"]
+
+    def __call__(self, entidad: Any) -> Dict[str, Any]:
+        return self._proyectar(entidad)
+
+    def muchos(self, entidades: Iterable[Any]) -> List[Dict[str, Any]]:
+        return list(map(self._proyectar, entidades))
+
+
+_PROYECCIONES: Dict[Tuple[type, Optional[FrozenSet[str]]], Proyeccion] = {}
+_lock = threading.Lock()
+
+
+def proyeccion(
+    serializer_class: Type[serializers.Serializer], incluir: Optional[FrozenSet[str]] = None
+) -> Proyeccion:
+    """
+    Proyección compilada (y cacheada) del serializer de salida, completa o
+    solo con los campos de `incluir`. Hay a lo sumo una por subconjunto de
+    campos del serializer.
+    """
+    clave = (serializer_class, incluir)
+    compilada = _PROYECCIONES.get(clave)
+    if compilada is None:
+        with _lock:
+            compilada = _PROYECCIONES.get(clave)
+            if compilada is None:
+                compilada = _PROYECCIONES[clave] = Proyeccion(serializer_class, incluir)
+    return compilada
+
+
+@dataclass(frozen=True)
+class Expansion:
+    """
+    Recurso relacionado que un listado puede embeber con `?expand=`:
+    cómo leer su id en cada entidad, cómo buscar varios ids de una vez
+    (p. ej. `get_many` del repositorio, vía el servicio) y cómo representarlo.
+    """
+
+    id_de: Callable[[Any], Optional[str]]
+    buscar: Callable[[Iterable[str]], Mapping[str, Any]]
+    serializer_class: Type[serializers.Serializer]
+
+
+def expandir(
+    filas: List[Dict[str, Any]], entidades: List[Any], expansiones: Mapping[str, Expansion]
+) -> None:
+    """
+    Agrega a cada fila, bajo el nombre de cada expansión, el recurso
+    relacionado proyectado (o `null` si no tiene o ya no existe).
+
+    Las expansiones que comparten `buscar` (vendedor y comprador salen del
+    mismo repositorio) se resuelven juntas: una búsqueda por repositorio para
+    toda la página, y cada recurso se proyecta una sola vez.
+    """
+    ids_por_expansion = {
+        nombre: [expansion.id_de(e) for e in entidades] for nombre, expansion in expansiones.items()
+    }
+    pendientes: Dict[Callable, set] = {}
+    for nombre, expansion in expansiones.items():
+        pendientes.setdefault(expansion.buscar, set()).update(
+            i for i in ids_por_expansion[nombre] if i is not None
+        )
+    encontrados = {buscar: buscar(ids) if ids else {} for buscar, ids in pendientes.items()}
+
+    for nombre, expansion in expansiones.items():
+        proyectar = proyeccion(expansion.serializer_class)
+        recursos = encontrados[expansion.buscar]
+        representados: Dict[Optional[str], Optional[Dict[str, Any]]] = {None: None}
+        for fila, id in zip(filas, ids_por_expansion[nombre]):
+            if id not in representados:
+                recurso = recursos.get(id)
+                representados[id] = None if recurso is None else proyectar(recurso)
+            fila[nombre] = representados[id]
+
+
+def linea_ndjson(dato: Any) -> bytes:
+    """Un valor como línea NDJSON (JSON compacto en UTF-8 terminado en salto de línea)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(dato, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass  # Tipos que orjson no conoce: los codifica el json de DRF
+    return json.dumps(
+        dato, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(",", ":")
+    ).encode() + b"\n"
+
+
+class RenderizadorJSONRapido(JSONRenderer):
+    """
+    JSONRenderer que codifica con orjson (compacto, UTF-8) cuando puede: los
+    mismos bytes para datos primitivos. Con indentación pedida, sin orjson o
+    con tipos que orjson no conoce (Decimal, textos perezosos) delega en DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            contenido = orjson.dumps(data)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que DRF: JSON que también es JavaScript válido
+        return contenido.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class RenderizadorNDJSON(BaseRenderer):
+    """
+    Tipo de las exportaciones NDJSON. Los datos se transmiten ya codificados
+    (StreamingHttpResponse); este renderizador solo codifica las respuestas de
+    error de esas vistas, como una única línea.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b"" if data is None else linea_ndjson(data)
+
+
+class NegociacionConRespaldo(DefaultContentNegotiation):
+    """
+    Negociación que no responde 406: si el cliente no acepta ningún
+    renderizador de la vista, se usa el primero. Sirve a las exportaciones,
+    que transmiten NDJSON aunque el cliente pida `Accept: application/json`.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            return renderers[0], renderers[0].media_type
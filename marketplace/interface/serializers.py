@@ -7,6 +7,56 @@ NO contiene lógica de negocio ni creación de entidades.
 from rest_framework import serializers
 
 
+class PaginacionSerializer(serializers.Serializer):
+    """Serializer para validación de parámetros de paginación por cursor."""
+    cursor = serializers.CharField(required=False)
+    limite = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class SeleccionCamposSerializer(serializers.Serializer):
+    """
+    Serializer para `?fields=` (campos a incluir) y `?expand=` (recursos a
+    embeber) de un listado, ambos separados por comas. Los valores permitidos
+    llegan en el contexto: `campos` y `expansiones`.
+    """
+    fields = serializers.CharField(required=False)
+    expand = serializers.CharField(required=False)
+
+    @staticmethod
+    def _nombres(valor, permitidos):
+        nombres = [n.strip() for n in valor.split(",") if n.strip()]
+        if not nombres:
+            raise serializers.ValidationError("Indique al menos un valor.")
+        desconocidos = [n for n in nombres if n not in permitidos]
+        if desconocidos:
+            raise serializers.ValidationError(
+                f"No disponible: {', '.join(desconocidos)}. Opciones: {', '.join(permitidos) or 'ninguna'}."
+            )
+        return frozenset(nombres)
+
+    def validate_fields(self, valor):
+        return self._nombres(valor, self.context["campos"])
+
+    def validate_expand(self, valor):
+        return self._nombres(valor, self.context["expansiones"])
+
+
+class FiltroCatalogoSerializer(PaginacionSerializer):
+    """Serializer para filtros de productos y servicios (categoría, precio, orden)."""
+    categoria_id = serializers.CharField(required=False)
+    precio_min = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=0, required=False)
+    precio_max = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=0, required=False)
+    orden = serializers.ChoiceField(choices=["precio", "-precio"], required=False)
+    solo_disponibles = serializers.BooleanField(default=False)
+    facetas = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if (data.get("precio_min") is not None and data.get("precio_max") is not None
+                and data["precio_min"] > data["precio_max"]):
+            raise serializers.ValidationError("precio_min no puede ser mayor que precio_max.")
+        return data
+
+
 class UsuarioSerializer(serializers.Serializer):
     """Serializer para validación de datos de Usuario."""
     id = serializers.CharField(max_length=50)
@@ -39,6 +89,7 @@ class ProductoSerializer(serializers.Serializer):
     stock = serializers.IntegerField(read_only=True)
     vendedor_id = serializers.CharField(source='vendedor.id', read_only=True)
     categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True)
+    fecha_publicacion = serializers.DateTimeField(read_only=True)
 
 
 class PublicarProductoSerializer(serializers.Serializer):
@@ -77,25 +128,58 @@ class PublicarServicioSerializer(serializers.Serializer):
     categoria_id = serializers.CharField(max_length=50)
 
 
+class ConteoFacetaSerializer(serializers.Serializer):
+    """Serializer para salida de un valor de faceta."""
+    valor = serializers.CharField(read_only=True)
+    etiqueta = serializers.CharField(read_only=True)
+    cantidad = serializers.IntegerField(read_only=True)
+
+
+class FacetasSerializer(serializers.Serializer):
+    """Serializer para salida de facetas por categoría, precio y disponibilidad."""
+    categorias = ConteoFacetaSerializer(many=True, read_only=True)
+    precios = ConteoFacetaSerializer(many=True, read_only=True)
+    disponibilidad = ConteoFacetaSerializer(many=True, read_only=True)
+
+
 class ConsultaSerializer(serializers.Serializer):
     """Serializer para salida de datos de Consulta."""
     id = serializers.CharField(read_only=True)
     comprador_nombre = serializers.CharField(source='comprador.nombre', read_only=True)
     item_nombre = serializers.CharField(source='item.nombre', read_only=True)
-    item_vendedor = serializers.SerializerMethodField()
+    item_vendedor = serializers.CharField(source='vendedor.nombre', read_only=True)
     mensaje = serializers.CharField(read_only=True)
     estado = serializers.CharField(source='estado.value', read_only=True)
     fecha = serializers.DateTimeField(read_only=True)
 
-    def get_item_vendedor(self, obj):
-        if hasattr(obj.item, 'vendedor'):
-            return obj.item.vendedor.nombre
-        return obj.item.proveedor.nombre
-
 class RegistrarConsultaSerializer(serializers.Serializer):
     """Serializer para entrada de datos de Consulta."""
     comprador_id = serializers.CharField(max_length=50)
-    item_id = serializers.CharField(max_length=20)
+    item_id = serializers.CharField(max_length=50)
     item_type = serializers.ChoiceField(choices=['producto', 'servicio'])
     mensaje = serializers.CharField(required=False, allow_blank=True, max_length=500)
 
+
+class CambiarEstadoConsultaSerializer(serializers.Serializer):
+    """Serializer para entrada del cambio de estado de una Consulta."""
+    estado = serializers.ChoiceField(choices=['contactado', 'cerrada'])
+    concretada = serializers.BooleanField(required=False, default=False)
+
+
+class BuzonConsultasSerializer(PaginacionSerializer):
+    """Serializer para los parámetros del buzón de consultas (long polling)."""
+    vendedor_id = serializers.CharField(max_length=50)
+    timeout = serializers.FloatField(min_value=0, max_value=60, default=25)
+
+
+class ExportacionSerializer(serializers.Serializer):
+    """Serializer para los filtros de una exportación NDJSON."""
+    unidad_id = serializers.CharField(max_length=50, required=False)
+    categoria_id = serializers.CharField(max_length=50, required=False)
+    desde = serializers.DateField(required=False)
+    hasta = serializers.DateField(required=False)  # Incluido: se exporta el día completo
+
+    def validate(self, data):
+        if data.get("desde") and data.get("hasta") and data["desde"] > data["hasta"]:
+            raise serializers.ValidationError("desde no puede ser posterior a hasta.")
+        return data
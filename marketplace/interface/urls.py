@@ -1,14 +1,36 @@
 from django.urls import path
 from .views import (
     UsuarioView, 
+    ImportarUsuariosView,
     UnidadResidencialView, 
     CategoriaView, 
-    PublicarProductoView
+    PublicarProductoView,
+    PublicarServicioView,
+    PublicarProductosLoteView,
+    PublicarServiciosLoteView,
+    ProductoListView,
+    ServicioView,
+    ConsultaView,
+    RegistrarConsultaView,
+    ConsultaDetalleView,
+    BuzonConsultasView,
+    ExportacionView,
 )
 
 urlpatterns = [
     path('usuarios/', UsuarioView.as_view(), name='usuarios-list-create'),
+    path('usuarios/importar/', ImportarUsuariosView.as_view(), name='usuarios-importar'),
     path('unidades/', UnidadResidencialView.as_view(), name='unidades-list-create'),
     path('categorias/', CategoriaView.as_view(), name='categorias-list-create'),
     path('publicar-producto/', PublicarProductoView.as_view(), name='publicar-producto'),
+    path('publicar-servicio/', PublicarServicioView.as_view(), name='publicar-servicio'),
+    path('publicar-productos-lote/', PublicarProductosLoteView.as_view(), name='publicar-productos-lote'),
+    path('publicar-servicios-lote/', PublicarServiciosLoteView.as_view(), name='publicar-servicios-lote'),
+    path('productos/', ProductoListView.as_view(), name='productos-list'),
+    path('servicios/', ServicioView.as_view(), name='servicios-list-create'),
+    path('consultas/', ConsultaView.as_view(), name='consultas-list-create'),
+    path('registrar-consulta/', RegistrarConsultaView.as_view(), name='registrar-consulta'),
+    path('consultas/buzon/', BuzonConsultasView.as_view(), name='consultas-buzon'),
+    path('consultas/<str:consulta_id>/', ConsultaDetalleView.as_view(), name='consultas-detalle'),
+    path('exportar/<str:coleccion>/', ExportacionView.as_view(), name='exportar'),
 ]
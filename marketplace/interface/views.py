@@ -4,18 +4,38 @@ Responsabilidad: Validar entrada HTTP, delegar a servicios, mapear respuestas HT
 NO contiene lógica de negocio.
 """
 
+import atexit
+import json
+import os
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Iterator, Optional
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.settings import api_settings
 
 from .serializers import (
+    PaginacionSerializer,
+    SeleccionCamposSerializer,
+    FiltroCatalogoSerializer,
+    FacetasSerializer,
     UsuarioSerializer, 
     UnidadResidencialSerializer, 
     CategoriaSerializer,
     ProductoSerializer, 
     PublicarProductoSerializer,
     ServicioSerializer,
-    PublicarServicioSerializer
+    PublicarServicioSerializer,
+    ConsultaSerializer,
+    RegistrarConsultaSerializer,
+    CambiarEstadoConsultaSerializer,
+    BuzonConsultasSerializer,
+    ExportacionSerializer,
 )
 from ..application.services import (
     UsuarioService,
@@ -23,47 +43,344 @@ from ..application.services import (
     CategoriaService,
     PublicacionService,
     ServicioService,
+    ConsultaService,
+    ReservaService,
+    ExportacionService,
     CrearUsuarioCommand,
     CrearUnidadResidencialCommand,
     CrearCategoriaCommand,
     PublicarProductoCommand,
     PublicarServicioCommand,
+    RegistrarConsultaCommand,
+    ExportarCommand,
+    ResultadoLote,
     ResourceAlreadyExistsError,
     ResourceNotFoundError,
 )
 from ..domain.exceptions import DomainError, PermissionError
-from ..infrastructure.repositories import (
-    InMemoryProductoRepository, 
-    InMemoryUsuarioRepository, 
-    InMemoryCategoriaRepository, 
-    InMemoryUnidadResidencialRepository,
-    InMemoryServicioRepository
+from ..infrastructure.factories import NotifierFactory, RepositoryFactory
+from ..infrastructure.importadores import LECTORES, abrir_texto
+from ..infrastructure.outbox import OutboxRelay
+from .cache_http import CacheRespuestas, responder_cacheado
+from .proyecciones import (
+    Expansion,
+    NegociacionConRespaldo,
+    RenderizadorJSONRapido,
+    RenderizadorNDJSON,
+    expandir,
+    linea_ndjson,
+    proyeccion,
 )
 
 # ============================================================================
 # Dependency Injection (repositorios y servicios globales)
 # ============================================================================
 
-_producto_repo = InMemoryProductoRepository()
-_usuario_repo = InMemoryUsuarioRepository()
-_categoria_repo = InMemoryCategoriaRepository()
-_unidad_repo = InMemoryUnidadResidencialRepository()
-_servicio_repo = InMemoryServicioRepository()
+# MARKETPLACE_DB=/ruta/marketplace.db usa SQLite; sin la variable, repositorios en memoria
+_repos = RepositoryFactory.create(os.environ.get("MARKETPLACE_DB"))
+
+_producto_repo = _repos.productos
+_usuario_repo = _repos.usuarios
+_categoria_repo = _repos.categorias
+_unidad_repo = _repos.unidades
+_servicio_repo = _repos.servicios
+_consulta_repo = _repos.consultas
+
+# Notificaciones vía outbox: publicar solo registra el evento junto a la entidad
+# y el relay lo entrega en segundo plano (al menos una vez). Cada worker tiene
+# su relay; con SQLite se reparten los eventos reclamándolos en la base
+_outbox_relay = OutboxRelay(_repos.outbox, NotifierFactory.create()).iniciar()
+atexit.register(_outbox_relay.detener)
+
+# Versiones de los listados del catálogo (ETag) y sus respuestas ya renderizadas;
+# con SQLite las versiones están en la base, compartidas por todos los workers
+_versiones = _repos.versiones
+_cache_respuestas = CacheRespuestas()
 
 # Servicios
 _usuario_service = UsuarioService(_usuario_repo)
 _unidad_service = UnidadResidencialService(_unidad_repo)
-_categoria_service = CategoriaService(_categoria_repo)
+_categoria_service = CategoriaService(_categoria_repo, versiones=_versiones)
 _publicacion_service = PublicacionService(
     producto_repo=_producto_repo,
     usuario_repo=_usuario_repo,
-    categoria_repo=_categoria_repo
+    categoria_repo=_categoria_repo,
+    outbox_repo=_repos.outbox,
+    unidad_de_trabajo=_repos.unidad_de_trabajo,
+    versiones=_versiones
 )
 _servicio_service = ServicioService(
     servicio_repo=_servicio_repo,
     usuario_repo=_usuario_repo,
-    categoria_repo=_categoria_repo
+    categoria_repo=_categoria_repo,
+    outbox_repo=_repos.outbox,
+    unidad_de_trabajo=_repos.unidad_de_trabajo,
+    versiones=_versiones
+)
+# Reservas: pasar una consulta a "contactado" aparta stock; un hilo de fondo
+# devuelve el de las reservas que vencen sin confirmarse
+_reserva_service = ReservaService(
+    reserva_repo=_repos.reservas,
+    producto_repo=_producto_repo,
+    unidad_de_trabajo=_repos.unidad_de_trabajo,
+    versiones=_versiones
+).iniciar()
+atexit.register(_reserva_service.detener)
+_consulta_service = ConsultaService(
+    consulta_repo=_consulta_repo,
+    usuario_repo=_usuario_repo,
+    producto_repo=_producto_repo,
+    servicio_repo=_servicio_repo,
+    reserva_service=_reserva_service,
+    unidad_de_trabajo=_repos.unidad_de_trabajo
 )
+_exportacion_service = ExportacionService(
+    producto_repo=_producto_repo,
+    servicio_repo=_servicio_repo,
+    consulta_repo=_consulta_repo,
+    unidad_repo=_unidad_repo
+)
+
+
+# Los listados se arman con proyecciones compiladas y se codifican con orjson
+# (si está instalado); los demás renderizadores configurados siguen disponibles
+_RENDERIZADORES = [RenderizadorJSONRapido, *api_settings.DEFAULT_RENDERER_CLASSES]
+
+# Recursos que los listados embeben con ?expand=: una búsqueda por página
+_EXPANSION_CATEGORIA = Expansion(
+    lambda e: e.categoria.id if e.categoria else None,
+    _categoria_service.obtener_varias,
+    CategoriaSerializer
+)
+_EXPANSIONES_PRODUCTO = {
+    'vendedor': Expansion(lambda p: p.vendedor.id, _usuario_service.obtener_varios, UsuarioSerializer),
+    'categoria': _EXPANSION_CATEGORIA,
+}
+_EXPANSIONES_SERVICIO = {
+    'proveedor': Expansion(lambda s: s.proveedor.id, _usuario_service.obtener_varios, UsuarioSerializer),
+    'categoria': _EXPANSION_CATEGORIA,
+}
+_EXPANSIONES_CONSULTA = {
+    'comprador': Expansion(lambda k: k.comprador.id, _usuario_service.obtener_varios, UsuarioSerializer),
+    'vendedor': Expansion(lambda k: k.vendedor.id, _usuario_service.obtener_varios, UsuarioSerializer),
+}
+
+
+# ============================================================================
+# Paginación
+# ============================================================================
+
+def _listar_paginado(
+    request, listar, serializer_class, parametros_class=PaginacionSerializer,
+    facetar=None, expansiones=None, **filtros
+):
+    """
+    Valida `?cursor=&limite=` (y los filtros de `parametros_class`), delega la
+    consulta de una página al servicio y responde con los resultados y el
+    cursor opaco de la siguiente página.
+    Con `?facetas=true` y un `facetar` del servicio agrega los conteos del
+    resultado completo (no solo de la página).
+    `?fields=` limita los campos de cada resultado y `?expand=` embebe los
+    recursos de `expansiones` pedidos.
+    """
+    paginacion = parametros_class(data=request.query_params)
+    if not paginacion.is_valid():
+        return Response(paginacion.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    expansiones = expansiones or {}
+    seleccion = SeleccionCamposSerializer(
+        data=request.query_params,
+        context={"campos": proyeccion(serializer_class).campos, "expansiones": tuple(expansiones)}
+    )
+    if not seleccion.is_valid():
+        return Response(seleccion.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    parametros = dict(paginacion.validated_data)
+    con_facetas = parametros.pop("facetas", False) and facetar is not None
+    try:
+        pagina = listar(**filtros, **parametros)
+        if con_facetas:
+            for clave in ("cursor", "limite", "orden"):
+                parametros.pop(clave, None)
+            facetas = facetar(**filtros, **parametros)
+    except DomainError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    resultados = proyeccion(serializer_class, seleccion.validated_data.get("fields")).muchos(pagina.items)
+    expandidas = seleccion.validated_data.get("expand", ())
+    if expandidas:
+        expandir(
+            resultados, pagina.items,
+            {nombre: e for nombre, e in expansiones.items() if nombre in expandidas}
+        )
+
+    respuesta = {
+        "resultados": resultados,
+        "siguiente_cursor": pagina.siguiente_cursor,
+    }
+    if con_facetas:
+        respuesta["facetas"] = FacetasSerializer(facetas).data
+    return Response(respuesta)
+
+
+# ============================================================================
+# Exportación NDJSON
+# ============================================================================
+
+_TAMANO_BLOQUE = 64 * 1024
+
+
+def _inicio_del_dia(dia: Optional[date]) -> Optional[datetime]:
+    return None if dia is None else datetime.combine(dia, time.min)
+
+
+def _fin_del_dia(dia: Optional[date]) -> Optional[datetime]:
+    """
+    Límite exclusivo que incluye el día completo: el inicio del siguiente.
+    date.max no tiene siguiente ni deja nada afuera: sin límite.
+    """
+    if dia is None or dia == date.max:
+        return None
+    return _inicio_del_dia(dia + timedelta(days=1))
+
+
+def _acepta_gzip(accept_encoding: str) -> bool:
+    """
+    True si el Accept-Encoding admite gzip con q > 0, nombrado o con `*`.
+    `gzip;q=0` lo rechaza aunque haya un `*` que admita el resto.
+    """
+    comodin = False
+    for parte in accept_encoding.split(','):
+        codificacion, _, parametros = parte.partition(';')
+        q = 1.0
+        for parametro in parametros.split(';'):
+            clave, _, valor = parametro.partition('=')
+            if clave.strip().lower() == 'q':
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        codificacion = codificacion.strip().lower()
+        if codificacion in ('gzip', 'x-gzip'):
+            return q > 0
+        if codificacion == '*':
+            comodin = q > 0
+    return comodin
+
+
+def _ndjson(entidades: Iterable, serializer_class, comprimir: bool) -> Iterator[bytes]:
+    """
+    Transmite las entidades como NDJSON en bloques de ~64 KB, comprimidos con
+    gzip si se pide. Se consume a medida que se envía: la memoria depende del
+    tamaño del bloque (y del lote del repositorio), no del total de filas.
+    """
+    proyectar = proyeccion(serializer_class)
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None  # 31: formato gzip
+    bloque, tamano = [], 0
+    for entidad in entidades:
+        linea = linea_ndjson(proyectar(entidad))
+        bloque.append(linea)
+        tamano += len(linea)
+        if tamano >= _TAMANO_BLOQUE:
+            datos = b"".join(bloque)
+            bloque, tamano = [], 0
+            if compresor is not None:
+                datos = compresor.compress(datos)
+            if datos:
+                yield datos
+    datos = b"".join(bloque)
+    if compresor is not None:
+        datos = compresor.compress(datos) + compresor.flush()
+    if datos:
+        yield datos
+
+
+# ============================================================================
+# Publicación por lotes
+# ============================================================================
+
+MAX_LOTE = 5000
+
+
+def _comando_producto(data) -> PublicarProductoCommand:
+    """Mapea los campos validados del serializer al comando."""
+    return PublicarProductoCommand(
+        vendedor_id=data['vendedor_id'],
+        vendedor_status=data['vendedor_status'],
+        nombre=data['nombre'],
+        descripcion=data['descripcion'],
+        precio_cop=data['precio'],  # Mapeo: precio -> precio_cop
+        categoria_id=data['categoria_id'],
+        imagenes=data.get('imagenes', [])
+    )
+
+
+def _comando_servicio(data) -> PublicarServicioCommand:
+    """Mapea los campos validados del serializer al comando."""
+    return PublicarServicioCommand(
+        proveedor_id=data['proveedor_id'],
+        proveedor_status=data['proveedor_status'],
+        nombre=data['nombre'],
+        descripcion=data['descripcion'],
+        precio_cop=data['precio'],
+        categoria_id=data['categoria_id']
+    )
+
+
+def _publicar_lote(request, entrada_serializer, a_comando, publicar_batch, salida_serializer):
+    """
+    Valida cada elemento del lote, publica los válidos con una sola llamada al
+    servicio y reporta los errores con la posición del elemento en el lote.
+
+    201 si todo se publicó, 207 si hubo errores parciales, 400 si nada se publicó.
+    """
+    items = request.data
+    if not isinstance(items, list) or not items:
+        return Response(
+            {"error": "Se espera una lista no vacía de elementos."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(items) > MAX_LOTE:
+        return Response(
+            {"error": f"Máximo {MAX_LOTE} elementos por lote."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    comandos, posiciones, errores = [], [], []
+    for indice, item in enumerate(items):
+        serializer = entrada_serializer(data=item)
+        if serializer.is_valid():
+            comandos.append(a_comando(serializer.validated_data))
+            posiciones.append(indice)
+        else:
+            errores.append({"indice": indice, "error": serializer.errors})
+
+    try:
+        resultado = publicar_batch(comandos) if comandos else ResultadoLote()
+    except Exception:
+        return Response(
+            {"error": "Error interno del servidor."},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    errores.extend(
+        {"indice": posiciones[e.indice], "error": e.error} for e in resultado.errores
+    )
+    errores.sort(key=lambda e: e["indice"])
+
+    if not errores:
+        codigo = status.HTTP_201_CREATED
+    elif resultado.creados:
+        codigo = status.HTTP_207_MULTI_STATUS
+    else:
+        codigo = status.HTTP_400_BAD_REQUEST
+    return Response(
+        {
+            "creados": proyeccion(salida_serializer).muchos(resultado.creados),
+            "errores": errores,
+        },
+        status=codigo
+    )
 
 
 # ============================================================================
@@ -75,12 +392,11 @@ class UsuarioView(APIView):
     Vista para gestión de usuarios.
     Responsabilidad: Validar HTTP y delegar a UsuarioService.
     """
+    renderer_classes = _RENDERIZADORES
 
     def get(self, request):
-        """Lista todos los usuarios."""
-        usuarios = _usuario_service.listar_usuarios()
-        serializer = UsuarioSerializer(usuarios, many=True)
-        return Response(serializer.data)
+        """Lista usuarios paginados por cursor."""
+        return _listar_paginado(request, _usuario_service.listar_usuarios, UsuarioSerializer)
 
     def post(self, request):
         """Crea un nuevo usuario."""
@@ -102,17 +418,57 @@ class UsuarioView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
 
 
+class ImportarUsuariosView(APIView):
+    """
+    Vista para importación masiva de residentes desde un archivo CSV o NDJSON.
+    Responsabilidad: Abrir el archivo como stream y delegar a UsuarioService.
+    """
+
+    def post(self, request):
+        """
+        Importa el archivo del campo `archivo` (multipart).
+        El formato sale de `?formato=csv|ndjson` o de la extensión del archivo.
+        """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response(
+                {"error": "Debe enviar el archivo en el campo 'archivo'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        formato = request.query_params.get('formato') or archivo.name.rsplit('.', 1)[-1].lower()
+        lector = LECTORES.get(formato)
+        if lector is None:
+            return Response(
+                {"error": f"Formato no soportado: {formato}. Use csv o ndjson."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # El archivo se lee como stream de texto: nunca se carga completo en memoria.
+        # Las líneas que no son UTF-8 se rechazan una a una (no cortan la importación)
+        resultado = _usuario_service.importar_usuarios(lector(abrir_texto(archivo.file)))
+
+        return Response({
+            "importados": resultado.importados,
+            "total_rechazados": resultado.total_rechazados,
+            "rechazados": [
+                {"linea": r.indice, "error": r.error} for r in resultado.rechazados
+            ],
+        })
+
+
 class UnidadResidencialView(APIView):
     """
     Vista para gestión de unidades residenciales.
     Responsabilidad: Validar HTTP y delegar a UnidadResidencialService.
     """
+    renderer_classes = _RENDERIZADORES
 
     def get(self, request):
-        """Lista todas las unidades."""
-        unidades = _unidad_service.listar_unidades()
-        serializer = UnidadResidencialSerializer(unidades, many=True)
-        return Response(serializer.data)
+        """Lista unidades paginadas por cursor."""
+        return _listar_paginado(
+            request, _unidad_service.listar_unidades, UnidadResidencialSerializer
+        )
 
     def post(self, request):
         """Crea una nueva unidad residencial."""
@@ -137,12 +493,16 @@ class CategoriaView(APIView):
     Vista para gestión de categorías.
     Responsabilidad: Validar HTTP y delegar a CategoriaService.
     """
+    renderer_classes = _RENDERIZADORES
 
     def get(self, request):
-        """Lista todas las categorías."""
-        categorias = _categoria_service.listar_categorias()
-        serializer = CategoriaSerializer(categorias, many=True)
-        return Response(serializer.data)
+        """Lista categorías paginadas por cursor (con ETag: 304 si no cambiaron)."""
+        return responder_cacheado(
+            self, request, "categorias", _versiones, _cache_respuestas,
+            lambda: _listar_paginado(
+                request, _categoria_service.listar_categorias, CategoriaSerializer
+            )
+        )
 
     def post(self, request):
         """Crea una nueva categoría."""
@@ -162,47 +522,22 @@ class CategoriaView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
 
 
-class PublicarProductoView(APIView):
+class PublicarProductosLoteView(APIView):
     """
-    Vista para publicación de productos.
+    Vista para publicación masiva de productos (catálogo completo de una unidad).
     Responsabilidad: Validar HTTP y delegar a PublicacionService.
     """
+    renderer_classes = _RENDERIZADORES
 
     def post(self, request):
-        """Publica un producto."""
-        serializer = PublicarProductoSerializer(data=request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            # Delegar a servicio (toda la lógica está en el servicio)
-            # Mapear campos del serializer al comando
-            cmd = PublicarProductoCommand(
-                vendedor_id=serializer.validated_data['vendedor_id'],
-                vendedor_status=serializer.validated_data['vendedor_status'],
-                nombre=serializer.validated_data['nombre'],
-                descripcion=serializer.validated_data['descripcion'],
-                precio_cop=serializer.validated_data['precio'],  # Mapeo: precio -> precio_cop
-                categoria_id=serializer.validated_data['categoria_id'],
-                imagenes=serializer.validated_data.get('imagenes', [])
-            )
-            producto = _publicacion_service.publicar_producto(cmd)
-            
-            return Response(
-                ProductoSerializer(producto).data,
-                status=status.HTTP_201_CREATED
-            )
-        except ResourceNotFoundError as e:
-            return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
-        except PermissionError as e:
-            return Response({"error": str(e)}, status=status.HTTP_403_FORBIDDEN)
-        except DomainError as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            return Response(
-                {"error": "Error interno del servidor."}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        """Publica una lista de productos; reporta errores por elemento."""
+        return _publicar_lote(
+            request,
+            PublicarProductoSerializer,
+            _comando_producto,
+            _publicacion_service.publicar_productos_batch,
+            ProductoSerializer
+        )
 
 
 class ProductoListView(APIView):
@@ -210,12 +545,24 @@ class ProductoListView(APIView):
     Vista para listar productos.
     Responsabilidad: Validar HTTP y delegar a PublicacionService.
     """
+    renderer_classes = _RENDERIZADORES
 
     def get(self, request):
-        """Lista todos los productos."""
-        productos = _publicacion_service.listar_productos()
-        serializer = ProductoSerializer(productos, many=True)
-        return Response(serializer.data)
+        """
+        Lista productos paginados por cursor.
+        Filtros: ?categoria_id=&precio_min=&precio_max=&orden=precio|-precio&solo_disponibles=
+        Con ?facetas=true incluye conteos por categoría, precio y disponibilidad.
+        ?fields=id,nombre,precio limita los campos; ?expand=vendedor,categoria los embebe.
+        Responde con ETag y 304 a `If-None-Match` mientras el catálogo no cambie.
+        """
+        return responder_cacheado(
+            self, request, "productos", _versiones, _cache_respuestas,
+            lambda: _listar_paginado(
+                request, _publicacion_service.listar_productos, ProductoSerializer,
+                FiltroCatalogoSerializer, _publicacion_service.facetas_productos,
+                _EXPANSIONES_PRODUCTO
+            )
+        )
 
 
 class ServicioView(APIView):
@@ -223,12 +570,24 @@ class ServicioView(APIView):
     Vista para gestión de servicios.
     Responsabilidad: Validar HTTP y delegar a ServicioService.
     """
+    renderer_classes = _RENDERIZADORES
 
     def get(self, request):
-        """Lista todos los servicios."""
-        servicios = _servicio_service.listar_servicios()
-        serializer = ServicioSerializer(servicios, many=True)
-        return Response(serializer.data)
+        """
+        Lista servicios paginados por cursor.
+        Filtros: ?categoria_id=&precio_min=&precio_max=&orden=precio|-precio&solo_disponibles=
+        Con ?facetas=true incluye conteos por categoría, precio y disponibilidad.
+        ?fields= limita los campos; ?expand=proveedor,categoria los embebe.
+        Responde con ETag y 304 a `If-None-Match` mientras el catálogo no cambie.
+        """
+        return responder_cacheado(
+            self, request, "servicios", _versiones, _cache_respuestas,
+            lambda: _listar_paginado(
+                request, _servicio_service.listar_servicios, ServicioSerializer,
+                FiltroCatalogoSerializer, _servicio_service.facetas_servicios,
+                _EXPANSIONES_SERVICIO
+            )
+        )
 
     def post(self, request):
         """Publica un servicio."""
@@ -237,15 +596,7 @@ class ServicioView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            # Mapear campos del serializer al comando
-            cmd = PublicarServicioCommand(
-                proveedor_id=serializer.validated_data['proveedor_id'],
-                proveedor_status=serializer.validated_data['proveedor_status'],
-                nombre=serializer.validated_data['nombre'],
-                descripcion=serializer.validated_data['descripcion'],
-                precio_cop=serializer.validated_data['precio'],
-                categoria_id=serializer.validated_data['categoria_id']
-            )
+            cmd = _comando_servicio(serializer.validated_data)
             servicio = _servicio_service.publicar_servicio(cmd)
             
             return Response(
@@ -265,11 +616,30 @@ class ServicioView(APIView):
             )
 
 
+class PublicarServiciosLoteView(APIView):
+    """
+    Vista para publicación masiva de servicios.
+    Responsabilidad: Validar HTTP y delegar a ServicioService.
+    """
+    renderer_classes = _RENDERIZADORES
+
+    def post(self, request):
+        """Publica una lista de servicios; reporta errores por elemento."""
+        return _publicar_lote(
+            request,
+            PublicarServicioSerializer,
+            _comando_servicio,
+            _servicio_service.publicar_servicios_batch,
+            ServicioSerializer
+        )
+
+
 class ConsultaView(APIView):
     """
     Vista para gestión de consultas (contacto).
     Responsabilidad: Validar HTTP y delegar a ConsultaService.
     """
+    renderer_classes = _RENDERIZADORES
 
     def post(self, request):
         """Registra una nueva consulta."""
@@ -278,12 +648,7 @@ class ConsultaView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            cmd = RegistrarConsultaCommand(
-                comprador_id=serializer.validated_data['comprador_id'],
-                item_id=serializer.validated_data['item_id'],
-                item_type=serializer.validated_data['item_type'],
-                mensaje=serializer.validated_data.get('mensaje')
-            )
+            cmd = _comando_consulta(serializer.validated_data)
             consulta = _consulta_service.registrar_consulta(cmd)
             
             return Response(
@@ -301,19 +666,250 @@ class ConsultaView(APIView):
             )
 
     def get(self, request):
-        """Lista consultas por comprador o vendedor."""
+        """
+        Lista consultas por comprador o vendedor, paginadas por cursor.
+        ?fields= limita los campos; ?expand=comprador,vendedor los embebe.
+        """
         vendedor_id = request.query_params.get('vendedor_id')
         comprador_id = request.query_params.get('comprador_id')
 
         if vendedor_id:
-            consultas = _consulta_service.listar_consultas_vendedor(vendedor_id)
+            return _listar_paginado(
+                request, _consulta_service.listar_consultas_vendedor, ConsultaSerializer,
+                expansiones=_EXPANSIONES_CONSULTA, vendedor_id=vendedor_id
+            )
         elif comprador_id:
-            consultas = _consulta_service.listar_consultas_comprador(comprador_id)
+            return _listar_paginado(
+                request, _consulta_service.listar_consultas_comprador, ConsultaSerializer,
+                expansiones=_EXPANSIONES_CONSULTA, comprador_id=comprador_id
+            )
         else:
             return Response(
                 {"error": "Debe especificar vendedor_id o comprador_id"}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        return Response(ConsultaSerializer(consultas, many=True).data)
 
+class ConsultaDetalleView(APIView):
+    """
+    Vista para el avance de una consulta.
+    Responsabilidad: Validar HTTP y delegar a ConsultaService.
+    """
+
+    def patch(self, request, consulta_id):
+        """Marca la consulta como contactada (reserva stock) o la cierra."""
+        serializer = CambiarEstadoConsultaSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if serializer.validated_data['estado'] == 'contactado':
+                consulta = _consulta_service.marcar_contactado(consulta_id)
+            else:
+                consulta = _consulta_service.cerrar_consulta(
+                    consulta_id, concretada=serializer.validated_data['concretada']
+                )
+            return Response(ConsultaSerializer(consulta).data)
+        except ResourceNotFoundError as e:
+            return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except DomainError as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+
+
+class ExportacionView(APIView):
+    """
+    Vista de exportación masiva en NDJSON (una entidad JSON por línea).
+    Responsabilidad: Validar HTTP, delegar a ExportacionService y transmitir.
+    Filtros: ?unidad_id=&categoria_id=&desde=AAAA-MM-DD&hasta=AAAA-MM-DD (días incluidos).
+    Con `Accept-Encoding: gzip` (q > 0) la respuesta sale comprimida. Los
+    datos siempre salen en NDJSON; los errores, en JSON si el cliente lo pide.
+    """
+    renderer_classes = [RenderizadorNDJSON, RenderizadorJSONRapido]
+    content_negotiation_class = NegociacionConRespaldo
+
+    _EXPORTACIONES = {
+        'productos': (_exportacion_service.exportar_productos, ProductoSerializer),
+        'servicios': (_exportacion_service.exportar_servicios, ServicioSerializer),
+        'consultas': (_exportacion_service.exportar_consultas, ConsultaSerializer),
+    }
+
+    def get(self, request, coleccion):
+        """Exporta productos, servicios o consultas filtrados."""
+        if coleccion not in self._EXPORTACIONES:
+            return Response(
+                {"error": f"No se puede exportar '{coleccion}'. Use productos, servicios o consultas."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        serializer = ExportacionSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        cmd = ExportarCommand(
+            unidad_id=data.get('unidad_id'),
+            categoria_id=data.get('categoria_id'),
+            desde=_inicio_del_dia(data.get('desde')),
+            hasta=_fin_del_dia(data.get('hasta'))
+        )
+        exportar, serializer_class = self._EXPORTACIONES[coleccion]
+        try:
+            entidades = exportar(cmd)
+        except ResourceNotFoundError as e:
+            return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except DomainError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        comprimir = _acepta_gzip(request.headers.get('Accept-Encoding', ''))
+        respuesta = StreamingHttpResponse(
+            _ndjson(entidades, serializer_class, comprimir),
+            content_type=RenderizadorNDJSON.media_type
+        )
+        respuesta['Content-Disposition'] = f'attachment; filename="{coleccion}.ndjson"'
+        respuesta['Vary'] = 'Accept-Encoding'
+        if comprimir:
+            respuesta['Content-Encoding'] = 'gzip'
+        return respuesta
+
+
+# ============================================================================
+# Vistas asíncronas
+# ============================================================================
+
+class VistaAsincrona(View):
+    """
+    Base de las vistas asíncronas: vistas nativas de Django, porque APIView
+    (DRF 3.x) no despacha handlers `async`. Bajo ASGI corren en el event loop
+    y una espera no ocupa un hilo; bajo WSGI Django las ejecuta igual.
+    Como APIView quedan exentas de CSRF, leen cuerpos JSON o de formulario
+    y responden JSON codificado como los listados.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        vista = super().as_view(**initkwargs)
+        vista.csrf_exempt = True
+        return vista
+
+    @staticmethod
+    def cuerpo(request):
+        """Datos del cuerpo (JSON o formulario); None si el JSON es inválido."""
+        if request.content_type == 'application/json':
+            try:
+                return json.loads(request.body or b'{}')
+            except ValueError:
+                return None
+        return request.POST
+
+    @staticmethod
+    def responder(datos, codigo: int = status.HTTP_200_OK) -> HttpResponse:
+        return HttpResponse(
+            RenderizadorJSONRapido().render(datos),
+            status=codigo,
+            content_type=RenderizadorJSONRapido.media_type
+        )
+
+    async def crear(self, request, entrada_serializer, a_comando, crear, salida_serializer):
+        """Valida el cuerpo, espera a `crear(comando)` y responde 201 con la entidad creada."""
+        datos = self.cuerpo(request)
+        if datos is None:
+            return self.responder({"error": "JSON inválido."}, status.HTTP_400_BAD_REQUEST)
+        serializer = entrada_serializer(data=datos)
+        if not serializer.is_valid():
+            return self.responder(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            entidad = await crear(a_comando(serializer.validated_data))
+        except ResourceNotFoundError as e:
+            return self.responder({"error": str(e)}, status.HTTP_404_NOT_FOUND)
+        except PermissionError as e:
+            return self.responder({"error": str(e)}, status.HTTP_403_FORBIDDEN)
+        except DomainError as e:
+            return self.responder({"error": str(e)}, status.HTTP_400_BAD_REQUEST)
+        except Exception:
+            return self.responder(
+                {"error": "Error interno del servidor."}, status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return self.responder(salida_serializer(entidad).data, status.HTTP_201_CREATED)
+
+
+def _comando_consulta(data) -> RegistrarConsultaCommand:
+    """Mapea los campos validados del serializer al comando."""
+    return RegistrarConsultaCommand(
+        comprador_id=data['comprador_id'],
+        item_id=data['item_id'],
+        item_type=data['item_type'],
+        mensaje=data.get('mensaje')
+    )
+
+
+class PublicarProductoView(VistaAsincrona):
+    """
+    Vista para publicación de productos.
+    Responsabilidad: Validar HTTP y esperar en PublicacionService.
+    """
+
+    async def post(self, request):
+        """Publica un producto."""
+        return await self.crear(
+            request, PublicarProductoSerializer, _comando_producto,
+            _publicacion_service.apublicar_producto, ProductoSerializer
+        )
+
+
+class PublicarServicioView(VistaAsincrona):
+    """
+    Vista para publicación de servicios (POST servicios/ hace lo mismo en
+    una vista síncrona).
+    Responsabilidad: Validar HTTP y esperar en ServicioService.
+    """
+
+    async def post(self, request):
+        """Publica un servicio."""
+        return await self.crear(
+            request, PublicarServicioSerializer, _comando_servicio,
+            _servicio_service.apublicar_servicio, ServicioSerializer
+        )
+
+
+class RegistrarConsultaView(VistaAsincrona):
+    """
+    Vista para registrar consultas (POST consultas/ hace lo mismo en una
+    vista síncrona).
+    Responsabilidad: Validar HTTP y esperar en ConsultaService.
+    """
+
+    async def post(self, request):
+        """Registra una nueva consulta y despierta el buzón del vendedor."""
+        return await self.crear(
+            request, RegistrarConsultaSerializer, _comando_consulta,
+            _consulta_service.aregistrar_consulta, ConsultaSerializer
+        )
+
+
+class BuzonConsultasView(VistaAsincrona):
+    """
+    Buzón de consultas de un vendedor con long polling.
+    Responsabilidad: Validar HTTP y esperar en ConsultaService.
+    GET ?vendedor_id=&cursor=&limite=&timeout= responde en cuanto hay
+    consultas nuevas, o sin resultados al vencer `timeout` (segundos);
+    `siguiente_cursor` es el cursor del próximo pedido.
+    """
+
+    async def get(self, request):
+        """Espera consultas nuevas para el vendedor."""
+        parametros = BuzonConsultasSerializer(data=request.GET)
+        if not parametros.is_valid():
+            return self.responder(parametros.errors, status.HTTP_400_BAD_REQUEST)
+
+        data = parametros.validated_data
+        try:
+            pagina = await _consulta_service.aesperar_consultas(
+                data['vendedor_id'], data.get('cursor'), data['limite'], data['timeout']
+            )
+        except DomainError as e:
+            return self.responder({"error": str(e)}, status.HTTP_400_BAD_REQUEST)
+
+        return self.responder({
+            "resultados": proyeccion(ConsultaSerializer).muchos(pagina.items),
+            "siguiente_cursor": pagina.siguiente_cursor,
+        })
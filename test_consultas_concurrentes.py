@@ -0,0 +1,98 @@
+"""
+Regresión: contactar y cerrar las mismas consultas desde dos procesos que
+comparten una base SQLite no deja consultas cerradas con su reserva activa,
+ni stock apartado de más.
+"""
+
+import multiprocessing
+import os
+import tempfile
+from decimal import Decimal
+
+from marketplace.application.services import ConsultaService, ReservaService, ValidationError
+from marketplace.domain.categoria import Categoria
+from marketplace.domain.consulta import Consulta, EstadoConsulta
+from marketplace.domain.producto import Producto
+from marketplace.domain.usuario import Usuario
+from marketplace.infrastructure.factories import RepositoryFactory
+
+CONSULTAS = 300
+STOCK = 1000
+TANDA = 3
+
+
+def _servicio(ruta: str) -> ConsultaService:
+    repos = RepositoryFactory.create(ruta)
+    reservas = ReservaService(
+        reserva_repo=repos.reservas,
+        producto_repo=repos.productos,
+        unidad_de_trabajo=repos.unidad_de_trabajo,
+        versiones=repos.versiones
+    )
+    return ConsultaService(
+        consulta_repo=repos.consultas,
+        usuario_repo=repos.usuarios,
+        producto_repo=repos.productos,
+        servicio_repo=repos.servicios,
+        reserva_service=reservas,
+        unidad_de_trabajo=repos.unidad_de_trabajo
+    )
+
+
+def _trabajar(ruta: str, accion: str, ids, barrera) -> None:
+    servicio = _servicio(ruta)
+    for inicio in range(0, len(ids), TANDA):
+        barrera.wait()  # Resincroniza: ambos procesos van sobre las mismas consultas
+        for consulta_id in ids[inicio:inicio + TANDA]:
+            try:
+                if accion == "contactar":
+                    servicio.marcar_contactado(consulta_id)
+                else:
+                    servicio.cerrar_consulta(consulta_id)
+            except ValidationError:
+                pass  # Ya cerrada: contactarla se rechaza
+
+
+def test_contactar_y_cerrar_desde_dos_procesos():
+    ruta = os.path.join(tempfile.mkdtemp(), "marketplace.db")
+    repos = RepositoryFactory.create(ruta)
+    vendedor = Usuario(id="u-vende", nombre="Vendedor", email="vende@test.com")
+    comprador = Usuario(id="u-compra", nombre="Comprador", email="compra@test.com")
+    repos.usuarios.add_many([vendedor, comprador])
+    categoria = Categoria(id="c-hogar", nombre="Hogar")
+    repos.categorias.add(categoria)
+    producto = Producto(
+        id="p-silla", nombre="Silla", precio=Decimal(50000), vendedor=vendedor,
+        categoria=categoria, stock=STOCK
+    )
+    repos.productos.add(producto)
+    ids = [f"k{i}" for i in range(CONSULTAS)]
+    for consulta_id in ids:
+        repos.consultas.add(Consulta(id=consulta_id, comprador=comprador, item=producto))
+
+    contexto = multiprocessing.get_context("spawn")
+    barrera = contexto.Barrier(2)
+    procesos = [
+        contexto.Process(target=_trabajar, args=(ruta, accion, ids, barrera))
+        for accion in ("contactar", "cerrar")
+    ]
+    for proceso in procesos:
+        proceso.start()
+    for proceso in procesos:
+        proceso.join(120)
+        assert proceso.exitcode == 0
+
+    repos = RepositoryFactory.create(ruta, tamano_cache=0)
+    activas = 0
+    for consulta_id in ids:
+        consulta = repos.consultas.get(consulta_id)
+        reserva = repos.reservas.get_activa_por_consulta(consulta_id)
+        if consulta.estado is EstadoConsulta.CERRADA:
+            assert reserva is None, f"{consulta_id} quedó cerrada con su reserva activa"
+        activas += reserva is not None
+    assert repos.productos.get("p-silla").stock == STOCK - activas
+
+
+if __name__ == "__main__":
+    test_contactar_y_cerrar_desde_dos_procesos()
+    print("OK")